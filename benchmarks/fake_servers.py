@@ -0,0 +1,335 @@
+"""Local stand-ins for the Anthropic Messages API and the MediaWiki action API.
+
+Both run a ThreadingHTTPServer on a free localhost port with configurable
+latency and error rate. Point the agent at them with ANTHROPIC_BASE_URL and
+WIKIPEDIA_API_URL (set before importing src, which reads them at import).
+"""
+
+import json
+import math
+import multiprocessing
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class Latency:
+    """Log-normal latency given its median and 95th percentile in milliseconds."""
+
+    median_ms: float = 100.0
+    p95_ms: float = 300.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds to wait for one response."""
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """Parse 'MEDIAN:P95' (or just 'MEDIAN') in milliseconds."""
+        median, _, p95 = spec.partition(":")
+        return cls(float(median), float(p95 or median))
+
+
+@dataclass
+class AnthropicScript:
+    """How the fake model behaves.
+
+    Args:
+        latency: Per-request latency.
+        error_rate: Share of requests answered with 529 overloaded.
+        tool_turns: Turns that end in tool_use before the final answer.
+        tools_per_turn: Parallel search_wikipedia calls per tool-use turn.
+        answer_words: Length of the final answer.
+        batch_polls: Retrieves of a Message Batch that still report it in progress.
+        batch_failures: Result type ('errored', 'canceled' or 'expired') by
+            custom_id, for batch requests that should not succeed.
+    """
+
+    latency: Latency
+    error_rate: float = 0.0
+    tool_turns: int = 1
+    tools_per_turn: int = 1
+    answer_words: int = 60
+    batch_polls: int = 1
+    batch_failures: dict[str, str] = field(default_factory=dict)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connection bursts, which shows up as 1s SYN retries
+    request_queue_size = 1024
+
+
+class _Server:
+    """Runs a handler class on a background thread."""
+
+    def __init__(self, handler: type):
+        self.httpd = _HTTPServer(("127.0.0.1", 0), handler)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.rng = random.Random(0)
+        handler.server_state = self
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def draw(self, latency: Latency, error_rate: float) -> tuple[float, bool]:
+        """Sample (delay, fail) for one request under the shared seeded RNG."""
+        with self._lock:
+            self.requests += 1
+            fail = self.rng.random() < error_rate
+            self.errors += fail
+            return latency.sample(self.rng), fail
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_state: Optional[_Server] = None
+
+    def _send(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _usage(body: dict, output_tokens: int) -> dict:
+    return {
+        "input_tokens": len(json.dumps(body)) // 4,
+        "output_tokens": output_tokens,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+
+
+def _model_reply(body: dict, script: AnthropicScript) -> dict:
+    """Scripted response: tool_use for the first tool_turns turns, then an answer.
+
+    Requests without tools are judge calls and get every score key the
+    prompt asks for (an array of entries for packed prompts).
+    """
+    prompt = body["messages"][0]["content"]
+    if "tools" not in body:
+        keys = re.findall(r'"(\w+)": N', prompt)
+        entry = {"scores": {k: 3 for k in keys}, "reasoning": "Accurate and well grounded."}
+        count = len(re.findall(r'<item index="', prompt))
+        text = json.dumps([{"index": i, **entry} for i in range(count)] if count else entry)
+        content, stop = [{"type": "text", "text": text}], "end_turn"
+    else:
+        turn = sum(1 for m in body["messages"] if m["role"] == "assistant")
+        if turn < script.tool_turns:
+            query = prompt if isinstance(prompt, str) else "query"
+            content = [{"type": "text", "text": "Let me look that up."}] + [
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{uuid.uuid4().hex[:12]}",
+                    "name": "search_wikipedia",
+                    "input": {"query": f"{query} {turn}.{i}"},
+                }
+                for i in range(script.tools_per_turn)
+            ]
+            stop = "tool_use"
+        else:
+            content = [{"type": "text", "text": " ".join(["answer"] * script.answer_words)}]
+            stop = "end_turn"
+    output_tokens = sum(len(json.dumps(block)) for block in content) // 4
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:12]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body["model"],
+        "content": content,
+        "stop_reason": stop,
+        "stop_sequence": None,
+        "usage": _usage(body, output_tokens),
+    }
+
+
+def _batch_result(custom_id: str, params: dict, script: AnthropicScript) -> dict:
+    failure = script.batch_failures.get(custom_id)
+    if failure == "errored":
+        result = {"type": "errored", "error": {"type": "error", "error": {"type": "api_error", "message": "Internal"}}}
+    elif failure is not None:
+        result = {"type": failure}
+    else:
+        result = {"type": "succeeded", "message": _model_reply(params, script)}
+    return {"custom_id": custom_id, "result": result}
+
+
+class FakeAnthropic(_Server):
+    """Messages API stand-in: non-streaming POST /v1/messages and the Message Batches endpoints.
+
+    Batches are answered as soon as they are created, but report
+    in_progress for the first script.batch_polls retrieves.
+    """
+
+    def __init__(self, script: AnthropicScript):
+        self.script = script
+        # Batch id -> {"results": [...], "polls": retrieves so far, "created_at": ...}
+        self.batches: dict[str, dict] = {}
+
+        class Handler(_JSONHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if urlparse(self.path).path == "/v1/messages/batches":
+                    self._send(200, self.server_state.create_batch(body["requests"]))
+                    return
+                delay, fail = self.server_state.draw(script.latency, script.error_rate)
+                time.sleep(delay)
+                if fail:
+                    self._send(
+                        529,
+                        {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+                        {"retry-after-ms": "100"},
+                    )
+                else:
+                    self._send(200, _model_reply(body, script))
+
+            def do_GET(self):
+                match = re.fullmatch(r"/v1/messages/batches/([\w-]+)(/results)?", urlparse(self.path).path)
+                state = self.server_state
+                if match is None or match.group(1) not in state.batches:
+                    self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+                elif match.group(2):
+                    body = "".join(json.dumps(r) + "\n" for r in state.batches[match.group(1)]["results"]).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/binary")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._send(200, state.retrieve_batch(match.group(1)))
+
+        super().__init__(Handler)
+
+    def create_batch(self, requests: list[dict]) -> dict:
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.batches[batch_id] = {
+                "results": [_batch_result(r["custom_id"], r["params"], self.script) for r in requests],
+                "polls": 0,
+                "created_at": datetime.now(timezone.utc),
+            }
+        return self._batch_object(batch_id)
+
+    def retrieve_batch(self, batch_id: str) -> dict:
+        with self._lock:
+            self.batches[batch_id]["polls"] += 1
+        return self._batch_object(batch_id)
+
+    def _batch_object(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        ended = batch["polls"] > self.script.batch_polls
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        for result in batch["results"]:
+            counts[result["result"]["type"] if ended else "processing"] += 1
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": batch["created_at"].isoformat(),
+            "expires_at": (batch["created_at"] + timedelta(hours=24)).isoformat(),
+            "ended_at": datetime.now(timezone.utc).isoformat() if ended else None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+
+class FakeMediaWiki(_Server):
+    """Action API stand-in: generator=search queries get intro extracts, titles= queries a sectioned article."""
+
+    def __init__(self, latency: Latency, error_rate: float = 0.0, extract_words: int = 120):
+        class Handler(_JSONHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                delay, fail = self.server_state.draw(latency, error_rate)
+                time.sleep(delay)
+                if fail:
+                    self._send(503, {"error": "unavailable"})
+                    return
+                if "titles" in params:
+                    # Full-article request (prop=extracts without exintro)
+                    title = params["titles"]
+                    sections = "".join(
+                        f"\n\n== Section {i} ==\n" + " ".join([f"fact{i}"] * extract_words) for i in range(8)
+                    )
+                    page = {"pageid": 1, "title": title, "extract": " ".join(["lorem"] * extract_words) + sections}
+                    self._send(200, {"batchcomplete": True, "query": {"pages": [page]}})
+                    return
+                limit = int(params.get("gsrlimit", 3))
+                query = params.get("gsrsearch", "")
+                pages = [
+                    {
+                        "pageid": i,
+                        "title": f"{query.title()} ({i})",
+                        "index": i + 1,
+                        "extract": " ".join(["lorem"] * extract_words),
+                    }
+                    for i in range(limit)
+                ]
+                self._send(200, {"batchcomplete": True, "query": {"pages": pages}})
+
+        super().__init__(Handler)
+
+    @property
+    def url(self) -> str:
+        return super().url + "/w/api.php"
+
+
+def _serve(script: AnthropicScript, wiki_latency: Latency, wiki_error_rate: float, conn) -> None:
+    servers = [FakeAnthropic(script), FakeMediaWiki(wiki_latency, error_rate=wiki_error_rate)]
+    conn.send([s.url for s in servers])
+    conn.recv()
+    conn.send([(s.requests, s.errors) for s in servers])
+    for server in servers:
+        server.close()
+
+
+class StandIns:
+    """Both stand-ins in a child process, so they do not compete with the client for the GIL.
+
+    Usage:
+        with StandIns(script, wiki_latency) as (anthropic_url, wikipedia_url):
+            ...
+    """
+
+    def __init__(self, script: AnthropicScript, wiki_latency: Latency, wiki_error_rate: float = 0.0):
+        self._conn, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(script, wiki_latency, wiki_error_rate, child), daemon=True
+        )
+        self.counts: Optional[list[tuple[int, int]]] = None
+
+    def __enter__(self) -> tuple[str, str]:
+        self._process.start()
+        return tuple(self._conn.recv())
+
+    def __exit__(self, *exc) -> None:
+        self._conn.send("stop")
+        self.counts = self._conn.recv()
+        self._process.join()
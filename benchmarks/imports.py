@@ -0,0 +1,96 @@
+"""Import-time benchmark for the CLI and the SDK-free eval modules.
+
+Each entry point is imported in a fresh interpreter --repeats times and the
+median import time is compared against benchmarks/import_baseline.json. The
+command also fails if an entry point loads a module it must not: the
+Anthropic SDK and httpx are only imported by the commands that call out.
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --update-baseline
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import click
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCHMARKS_DIR.parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "import_baseline.json"
+
+# Modules that must stay light, and the heavy modules none of them may load
+ENTRY_POINTS = ("src.cli", "src.eval.report", "src.eval.warehouse")
+HEAVY_MODULES = ("anthropic", "httpx")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"s": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeats: int) -> dict:
+    """Median import time of module in a fresh interpreter, and the heavy modules it pulled in."""
+    times, loaded = [], set()
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        probe = json.loads(out)
+        times.append(probe["s"])
+        loaded.update(probe["loaded"])
+    return {"median_ms": round(statistics.median(times) * 1000, 1), "heavy_modules": sorted(loaded)}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Entry points that load a heavy module or import slower than baseline beyond threshold."""
+    problems = []
+    for name, current in results.items():
+        if current["heavy_modules"]:
+            problems.append(f"{name}: imports {', '.join(current['heavy_modules'])}")
+        previous = baseline.get(name)
+        if previous is not None and current["median_ms"] > previous["median_ms"] * (1 + threshold):
+            problems.append(f"{name}: {current['median_ms']}ms vs baseline {previous['median_ms']}ms")
+    return problems
+
+
+@click.command()
+@click.option("--repeats", default=7, show_default=True, help="Fresh interpreters per entry point.")
+@click.option("--threshold", default=0.5, show_default=True, help="Allowed relative slowdown.")
+@click.option("--baseline", "baseline_path", type=click.Path(dir_okay=False), default=str(DEFAULT_BASELINE))
+@click.option("--update-baseline", is_flag=True, help="Store these results as the new baseline.")
+def main(repeats, threshold, baseline_path, update_baseline):
+    """Measure import time of the CLI and the SDK-free eval modules."""
+    results = {module: measure(module, repeats) for module in ENTRY_POINTS}
+
+    click.echo("| Module | Median import | Heavy modules loaded |")
+    click.echo("|--------|---------------|----------------------|")
+    for name, r in results.items():
+        click.echo(f"| {name} | {r['median_ms']}ms | {', '.join(r['heavy_modules']) or '-'} |")
+
+    path = Path(baseline_path)
+    if update_baseline:
+        path.write_text(json.dumps(results, indent=2) + "\n")
+        click.echo(f"Baseline written to {path}")
+        return
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    problems = compare(results, baseline, threshold)
+    if problems:
+        click.echo("Import regressions:", err=True)
+        for line in problems:
+            click.echo(f"  {line}", err=True)
+        sys.exit(1)
+    click.echo(f"No import regressions beyond {threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Offline performance benchmarks for the agent loop and the eval runner.
+
+Starts local Anthropic and MediaWiki stand-ins (benchmarks/fake_servers.py)
+in a child process, then measures throughput and latency of arun_agent (the loop behind
+run_agent) and run_eval at several concurrency levels. Results are compared
+against benchmarks/baseline.json; the command exits non-zero if throughput
+drops or p95 latency rises by more than --threshold.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --update-baseline
+    python -m benchmarks.run --llm-latency 300:900 --error-rate 0.02 --tool-turns 2
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import click
+import yaml
+
+from benchmarks.fake_servers import AnthropicScript, Latency, StandIns
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+def _summary(latencies: list[float], elapsed: float) -> dict:
+    return {
+        "throughput_per_s": round(len(latencies) / elapsed, 2),
+        "p50_s": round(_percentile(latencies, 50), 3),
+        "p95_s": round(_percentile(latencies, 95), 3),
+        "n": len(latencies),
+    }
+
+
+def _queries(n: int) -> list[str]:
+    from src.config import PROJECT_ROOT
+
+    queries = []
+    for path in sorted((PROJECT_ROOT / "eval_data").glob("*.yaml")):
+        queries += [item["query"] for item in yaml.safe_load(path.read_text()) or []]
+    return [queries[i % len(queries)] for i in range(n)]
+
+
+def bench_agent(agent: str, queries: list[str], concurrency: int) -> dict:
+    """Run queries through arun_agent with at most concurrency in flight on one loop."""
+    import anthropic
+
+    from src.agent import arun_agent
+    from src.config import load_agent_config
+    from src.mediawiki import aclose_async_mediawiki_client
+
+    async def _run() -> dict:
+        client = anthropic.AsyncAnthropic(max_retries=0)
+        config = load_agent_config(agent)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def _one(query: str) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                await arun_agent(query, agent_config=config, client=client)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(_one(q) for q in queries))
+        finally:
+            await client.close()
+            await aclose_async_mediawiki_client()
+        return _summary(latencies, time.perf_counter() - started)
+
+    return asyncio.run(_run())
+
+
+def bench_eval(base: str, test: str, concurrency: int) -> dict:
+    """Run the full eval suite into a temporary folder; latency is per agent query."""
+    from src.eval.runner import run_eval
+    from src.eval.transcripts import iter_transcripts
+    from src.scheduler import ModelBudget, RateLimitScheduler
+
+    unlimited = ModelBudget(1e9, 1e12, 1e12)
+    scheduler = RateLimitScheduler(
+        default_budget=unlimited, initial_concurrency=concurrency, max_concurrency=concurrency
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        run_dir = run_eval(base, test, max_concurrency=concurrency, output_root=Path(tmp), scheduler=scheduler)
+        elapsed = time.perf_counter() - started
+        latencies = [
+            record["wall_time_s"]
+            for path in run_dir.glob("transcripts_*/*.jsonl.gz")
+            for record in iter_transcripts(path)
+        ]
+    return _summary(latencies, elapsed)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions of results against baseline beyond threshold (e.g. 0.2 = 20%)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput_per_s']}/s vs baseline {previous['throughput_per_s']}/s"
+            )
+        if current["p95_s"] > previous["p95_s"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_s']}s vs baseline {previous['p95_s']}s")
+    return regressions
+
+
+def _int_list(ctx, param, value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+@click.command()
+@click.option("--agent-concurrency", default="1,8,32", callback=_int_list, show_default=True)
+@click.option("--eval-concurrency", default="8,32", callback=_int_list, show_default=True)
+@click.option("--queries", default=64, show_default=True, help="Queries per run_agent level.")
+@click.option("--base", default="agent_v2", show_default=True, help="Base agent for run_agent and run_eval.")
+@click.option("--test", default="agent_v3", show_default=True, help="Test agent for run_eval.")
+@click.option("--llm-latency", default="100:300", show_default=True, help="Model latency MEDIAN:P95 in ms.")
+@click.option("--wiki-latency", default="40:120", show_default=True, help="MediaWiki latency MEDIAN:P95 in ms.")
+@click.option("--error-rate", default=0.0, show_default=True, help="Share of model calls answered with 529.")
+@click.option("--wiki-error-rate", default=0.0, show_default=True, help="Share of MediaWiki calls answered with 503.")
+@click.option("--tool-turns", default=1, show_default=True, help="Tool-use turns before the final answer.")
+@click.option("--tools-per-turn", default=1, show_default=True, help="Parallel tool calls per tool-use turn.")
+@click.option("--threshold", default=0.2, show_default=True, help="Allowed relative regression.")
+@click.option("--baseline", "baseline_path", type=click.Path(dir_okay=False), default=str(DEFAULT_BASELINE))
+@click.option("--update-baseline", is_flag=True, help="Store these results as the new baseline.")
+def main(
+    agent_concurrency, eval_concurrency, queries, base, test, llm_latency, wiki_latency, error_rate,
+    wiki_error_rate, tool_turns, tools_per_turn, threshold, baseline_path, update_baseline,
+):
+    """Benchmark run_agent and run_eval against local stand-in servers."""
+    script = AnthropicScript(
+        latency=Latency.parse(llm_latency),
+        error_rate=error_rate,
+        tool_turns=tool_turns,
+        tools_per_turn=tools_per_turn,
+    )
+    wiki = Latency.parse(wiki_latency)
+    settings = {
+        "script": asdict(script),
+        "wiki_latency": asdict(wiki),
+        "wiki_error_rate": wiki_error_rate,
+        "queries": queries,
+        "base": base,
+        "test": test,
+    }
+
+    stand_ins = StandIns(script, wiki, wiki_error_rate)
+    with stand_ins as (anthropic_url, wikipedia_url):
+        os.environ["ANTHROPIC_BASE_URL"] = anthropic_url
+        os.environ["ANTHROPIC_API_KEY"] = "benchmark"
+        os.environ["WIKIPEDIA_API_URL"] = wikipedia_url
+
+        from src.cache import set_tool_cache
+
+        # Every search should reach the stand-in, not a cache warmed by an earlier level
+        set_tool_cache(None)
+        results = {}
+        for c in agent_concurrency:
+            results[f"run_agent@{c}"] = bench_agent(base, _queries(queries), c)
+            click.echo(f"run_agent@{c}: {results[f'run_agent@{c}']}", err=True)
+        for c in eval_concurrency:
+            results[f"run_eval@{c}"] = bench_eval(base, test, c)
+            click.echo(f"run_eval@{c}: {results[f'run_eval@{c}']}", err=True)
+    (llm_requests, llm_errors), (wiki_requests, wiki_errors) = stand_ins.counts
+    click.echo(
+        f"Stand-ins served {llm_requests} model calls ({llm_errors} failed) "
+        f"and {wiki_requests} MediaWiki calls ({wiki_errors} failed).",
+        err=True,
+    )
+
+    click.echo("| Benchmark | Throughput/s | p50 | p95 | n |")
+    click.echo("|-----------|--------------|-----|-----|---|")
+    for name, r in results.items():
+        click.echo(f"| {name} | {r['throughput_per_s']} | {r['p50_s']}s | {r['p95_s']}s | {r['n']} |")
+
+    path = Path(baseline_path)
+    if update_baseline:
+        path.write_text(json.dumps({"settings": settings, "results": results}, indent=2) + "\n")
+        click.echo(f"Baseline written to {path}")
+        return
+    if not path.exists():
+        click.echo(f"No baseline at {path}; run with --update-baseline to create one.")
+        return
+    baseline = json.loads(path.read_text())
+    if baseline.get("settings") != settings:
+        click.echo("Baseline was recorded with different settings; not comparing.", err=True)
+        sys.exit(2)
+    regressions = compare(results, baseline["results"], threshold)
+    if regressions:
+        click.echo(f"Regressions beyond {threshold:.0%}:", err=True)
+        for line in regressions:
+            click.echo(f"  {line}", err=True)
+        sys.exit(1)
+    click.echo(f"No regressions beyond {threshold:.0%} against {path.name}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,21 @@
 """Agent loop using Anthropic SDK tool-use."""
 
+import asyncio
 import sys
+import time
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional, Union
 
 import anthropic
 
-from src.config import AgentConfig, load_agent_config, load_system_instruction, load_tool_description
-from src.tools import TOOL_MAP, build_tool_definition
-from src.utils import create_with_retries
+from src.compaction import acompact, apply_compaction, validate_strategy
+from src.config import USAGE_FIELDS, AgentConfig
+from src.mediawiki import aclose_async_mediawiki_client
+from src.prefetch import Prefetch
+from src.registry import get_config_registry
+from src.scheduler import estimate_input_tokens
+from src.tools import build_async_tool_map, build_tool_definitions
+from src.utils import CallStats, acreate_with_retries, astream_with_retries
 
 
 @dataclass
@@ -19,95 +26,276 @@ class AgentResult:
     messages: list = field(repr=False)
     turn_count: int = 0
     tool_calls_made: list = field(default_factory=list)
+    usage: dict = field(default_factory=dict)
+    # One dict per messages call: turn, model, wall_time_s, token counts, stop_reason, retries.
+    # Summaries made by context compaction also carry purpose="compaction".
+    llm_calls: list = field(default_factory=list)
+    wall_time_s: float = 0.0
+    # "hit" or "miss" with speculative_prefetch on, else None
+    prefetch: Optional[str] = None
 
 
-def run_agent(
-    query: str,
-    *,
-    agent_config: Optional[AgentConfig] = None,
-    system_prompt: Optional[str] = None,
-    tool_descriptions: Optional[dict[str, str]] = None,
-    config_name: str = "default",
-    verbose: bool = False,
-) -> AgentResult:
-    """Run the Wikipedia agent on a single query.
+CACHE_CONTROL = {"type": "ephemeral"}
 
-    Can be called from the CLI with a config name, or from evals
-    with pre-loaded objects.
 
-    Args:
-        query: The user question to answer.
-        agent_config: Pre-built config. If None, loaded from config_name.
-        system_prompt: Pre-built system prompt. If None, loaded per agent_config.system_instruction.
-        tool_descriptions: Pre-loaded tool descriptions dict. If None, loaded per agent_config.tool_description.
-        config_name: Name of agent config YAML (without .yaml).
-        verbose: Print intermediate tool calls to stderr.
+def _add_usage(totals: dict, usage) -> None:
+    """Accumulate a response's usage counters into totals."""
+    for name in USAGE_FIELDS:
+        totals[name] = totals.get(name, 0) + (getattr(usage, name, None) or 0)
 
-    Returns:
-        AgentResult with final response, message history, turn count,
-        and tool call records.
+
+def _with_cache_breakpoint(messages: list) -> list:
+    """Copy messages with a cache breakpoint on the last content block.
+
+    Only the copy sent with the request is marked, so breakpoints from
+    earlier turns don't pile up past the API's limit of four.
     """
-    if agent_config is None:
-        agent_config = load_agent_config(config_name)
-    if system_prompt is None:
-        system_prompt = load_system_instruction(agent_config.system_instruction)
-    if tool_descriptions is None:
-        tool_descriptions = load_tool_description(agent_config.tool_description)
-
-    client = anthropic.Anthropic()
-    tools = [build_tool_definition(tool_descriptions)]
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = [*content[:-1], {**content[-1], "cache_control": CACHE_CONTROL}]
+    return [*messages[:-1], {**last, "content": content}]
+
+
+@dataclass
+class TextDelta:
+    """A chunk of assistant text as it streams in."""
+
+    text: str
+    turn: int
+
+
+@dataclass
+class ToolCallStarted:
+    name: str
+    input: dict
+    tool_use_id: str
+    turn: int
+
+
+@dataclass
+class ToolCallFinished:
+    name: str
+    output: str
+    tool_use_id: str
+    turn: int
+
+
+@dataclass
+class AgentFinished:
+    """Always the last event; carries the same result run_agent returns."""
+
+    result: AgentResult
+
+
+AgentEvent = Union[TextDelta, ToolCallStarted, ToolCallFinished, AgentFinished]
+
+
+async def _execute_tool(tool_map: dict, block, semaphore: asyncio.Semaphore) -> tuple[str, float]:
+    """Run one tool_use block. Returns (output, wall time in seconds).
+
+    Errors are returned as text so one bad call can't sink the turn.
+    """
+    tool_fn = tool_map.get(block.name)
+    if tool_fn is None:
+        return f"Error: unknown tool '{block.name}'", 0.0
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            output = await tool_fn(**block.input)
+        except Exception as e:
+            output = f"Error calling {block.name}: {e}"
+        return output, time.perf_counter() - started
+
+
+async def _agent_events(
+    query: str,
+    *,
+    agent_config: Optional[AgentConfig],
+    system_prompt: Optional[str],
+    tool_descriptions: Optional[dict[str, str]],
+    config_name: str,
+    verbose: bool,
+    client: Optional[anthropic.AsyncAnthropic],
+    stream: bool,
+) -> AsyncIterator[AgentEvent]:
+    """The agent loop. Yields progress events and finishes with AgentFinished.
+
+    With stream=False each turn is a single messages.create call and no
+    TextDelta events are produced.
+    """
+    tool_definitions = None
+    if agent_config is None or system_prompt is None or tool_descriptions is None:
+        # One snapshot for the whole query, so a reload mid-run can't mix versions
+        snapshot = get_config_registry().snapshot()
+        if agent_config is None:
+            agent_config = snapshot.agent(config_name)
+        if system_prompt is None:
+            system_prompt = snapshot.system_instruction(agent_config.system_instruction)
+        if tool_descriptions is None:
+            tool_descriptions = snapshot.tool_description(agent_config.tool_description)
+            tool_definitions = snapshot.tool_definitions[agent_config.tool_description]
+    if tool_definitions is None:
+        tool_definitions = build_tool_definitions(tool_descriptions)
+    validate_strategy(agent_config.compaction)
+
+    owns_client = client is None
+    if owns_client:
+        client = anthropic.AsyncAnthropic(max_retries=0)
+    tool_map = build_async_tool_map(agent_config.search_backend, agent_config.search_index)
+    tools = [tool for tool in tool_definitions if tool["name"] in tool_map]
+    tool_semaphore = asyncio.Semaphore(max(1, agent_config.max_tool_concurrency))
     messages = [{"role": "user", "content": query}]
     tool_calls_made = []
+    usage = {}
+    llm_calls = []
+    # Compacted tool_result contents by tool_use_id, applied to the history sent each turn
+    replacements: dict[str, str] = {}
+    started = time.perf_counter()
 
-    turn_count = 0
-    for turn_count in range(1, agent_config.max_turns + 1):
-        response = create_with_retries(
-            client,
+    system = system_prompt
+    if agent_config.prompt_caching:
+        # Breakpoints on tools, system and the latest message let each turn
+        # read the previous turn's prefix from cache
+        if tools:
+            tools = [*tools[:-1], {**tools[-1], "cache_control": CACHE_CONTROL}]
+        system = [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+
+    def _request() -> dict:
+        sent = apply_compaction(messages, replacements)
+        return dict(
             model=agent_config.model,
             max_tokens=agent_config.max_tokens,
-            system=system_prompt,
+            system=system,
             tools=tools,
-            messages=messages,
+            messages=_with_cache_breakpoint(sent) if agent_config.prompt_caching else sent,
         )
 
-        messages.append({"role": "assistant", "content": response.content})
+    # Search for the question while the first turn is generated
+    prefetch = Prefetch(tool_map, query) if agent_config.speculative_prefetch else None
+
+    try:
+        turn_count = 0
+        for turn_count in range(1, agent_config.max_turns + 1):
+            request = _request()
+            estimated = estimate_input_tokens(request)
+            if agent_config.compaction and estimated > agent_config.compaction_token_budget:
+                compaction_stats = CallStats()
+                compaction_started = time.perf_counter()
+                compacted, summary = await acompact(
+                    messages,
+                    replacements,
+                    strategy=agent_config.compaction,
+                    keep_turns=agent_config.compaction_keep_turns,
+                    client=client,
+                    model=agent_config.model,
+                    stats=compaction_stats,
+                )
+                if summary is not None:
+                    _add_usage(usage, summary.usage)
+                    llm_calls.append({
+                        "turn": turn_count,
+                        "model": agent_config.model,
+                        "purpose": "compaction",
+                        "wall_time_s": round(time.perf_counter() - compaction_started, 4),
+                        **{f: getattr(summary.usage, f, 0) or 0 for f in USAGE_FIELDS},
+                        "stop_reason": summary.stop_reason,
+                        "retries": compaction_stats.retries,
+                    })
+                if compacted:
+                    request = _request()
+                    before, estimated = estimated, estimate_input_tokens(request)
+                    if verbose:
+                        print(
+                            f"[compaction] turn {turn_count}: {compacted} tool results "
+                            f"({agent_config.compaction}), ~{before} -> ~{estimated} input tokens",
+                            file=sys.stderr,
+                        )
+            call_stats = CallStats()
+            call_started = time.perf_counter()
+            if stream:
+                async for chunk in astream_with_retries(client, stats=call_stats, **request):
+                    if isinstance(chunk, str):
+                        yield TextDelta(text=chunk, turn=turn_count)
+                    else:
+                        response = chunk
+            else:
+                response = await acreate_with_retries(client, stats=call_stats, **request)
+
+            messages.append({"role": "assistant", "content": response.content})
+            _add_usage(usage, response.usage)
+            llm_calls.append({
+                "turn": turn_count,
+                "model": agent_config.model,
+                "wall_time_s": round(time.perf_counter() - call_started, 4),
+                **{f: getattr(response.usage, f, 0) or 0 for f in USAGE_FIELDS},
+                "stop_reason": response.stop_reason,
+                "retries": call_stats.retries,
+            })
+            if verbose:
+                print(
+                    f"[turn {turn_count}] input tokens: {response.usage.input_tokens} "
+                    f"(cache read {response.usage.cache_read_input_tokens or 0}, estimated ~{estimated})",
+                    file=sys.stderr,
+                )
 
-        if response.stop_reason == "end_turn":
-            break
+            if response.stop_reason == "end_turn":
+                break
 
-        if response.stop_reason != "tool_use":
-            break
+            if response.stop_reason != "tool_use":
+                break
 
-        # Process tool calls
-        tool_results = []
-        for block in response.content:
-            if block.type != "tool_use":
-                continue
+            # Process tool calls, running independent calls from the same turn concurrently
+            tool_blocks = [block for block in response.content if block.type == "tool_use"]
+            for block in tool_blocks:
+                if verbose:
+                    print(f"[tool call] {block.name}({block.input})", file=sys.stderr)
+                yield ToolCallStarted(name=block.name, input=block.input, tool_use_id=block.id, turn=turn_count)
 
-            if verbose:
-                print(f"[tool call] {block.name}({block.input})", file=sys.stderr)
+            prefetched_id = prefetch.match(tool_blocks) if prefetch is not None else None
+            if verbose and prefetch is not None and turn_count == 1:
+                print(f"[prefetch] {prefetch.outcome} for '{prefetch.query}'", file=sys.stderr)
 
-            tool_fn = TOOL_MAP.get(block.name)
-            if tool_fn is None:
-                result_text = f"Error: unknown tool '{block.name}'"
-            else:
-                try:
-                    result_text = tool_fn(**block.input)
-                except Exception as e:
-                    result_text = f"Error calling {block.name}: {e}"
-
-            tool_calls_made.append({
-                "tool": block.name,
-                "input": block.input,
-                "output": result_text,
-            })
-            tool_results.append({
-                "type": "tool_result",
-                "tool_use_id": block.id,
-                "content": result_text,
-            })
+            async def _run_tool(block) -> tuple:
+                if block.id == prefetched_id:
+                    waited = time.perf_counter()
+                    try:
+                        output = await prefetch.result()
+                    except Exception as e:
+                        output = f"Error calling {block.name}: {e}"
+                    return block, output, time.perf_counter() - waited
+                return block, *await _execute_tool(tool_map, block, tool_semaphore)
 
-        messages.append({"role": "user", "content": tool_results})
+            outputs = {}
+            for next_done in asyncio.as_completed([_run_tool(block) for block in tool_blocks]):
+                block, result_text, wall_time = await next_done
+                outputs[block.id] = (result_text, wall_time)
+                yield ToolCallFinished(name=block.name, output=result_text, tool_use_id=block.id, turn=turn_count)
+
+            tool_results = []
+            for block in tool_blocks:
+                result_text, wall_time = outputs[block.id]
+                tool_calls_made.append({
+                    "tool": block.name,
+                    "input": block.input,
+                    "output": result_text,
+                    "turn": turn_count,
+                    "wall_time_s": round(wall_time, 4),
+                    **({"prefetched": True} if block.id == prefetched_id else {}),
+                })
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": block.id,
+                    "content": result_text,
+                })
+
+            messages.append({"role": "user", "content": tool_results})
+    finally:
+        if prefetch is not None:
+            prefetch.detach()
+        if owns_client:
+            await client.close()
 
     # Extract final text from last assistant response
     final_text = ""
@@ -115,9 +303,149 @@ def run_agent(
         if hasattr(block, "text"):
             final_text += block.text
 
-    return AgentResult(
+    yield AgentFinished(AgentResult(
         final_text=final_text,
         messages=messages,
         turn_count=turn_count,
         tool_calls_made=tool_calls_made,
-    )
+        usage=usage,
+        llm_calls=llm_calls,
+        wall_time_s=round(time.perf_counter() - started, 4),
+        prefetch=prefetch.outcome if prefetch is not None else None,
+    ))
+
+
+async def arun_agent(
+    query: str,
+    *,
+    agent_config: Optional[AgentConfig] = None,
+    system_prompt: Optional[str] = None,
+    tool_descriptions: Optional[dict[str, str]] = None,
+    config_name: str = "default",
+    verbose: bool = False,
+    client: Optional[anthropic.AsyncAnthropic] = None,
+) -> AgentResult:
+    """Run the Wikipedia agent on a single query as a coroutine.
+
+    Takes the same arguments as run_agent. Pass a shared client to drive
+    many queries concurrently from one event loop; if None, one is created
+    and closed for this query.
+    """
+    async for event in _agent_events(
+        query,
+        agent_config=agent_config,
+        system_prompt=system_prompt,
+        tool_descriptions=tool_descriptions,
+        config_name=config_name,
+        verbose=verbose,
+        client=client,
+        stream=False,
+    ):
+        if isinstance(event, AgentFinished):
+            result = event.result
+    return result
+
+
+async def astream_agent(
+    query: str,
+    *,
+    agent_config: Optional[AgentConfig] = None,
+    system_prompt: Optional[str] = None,
+    tool_descriptions: Optional[dict[str, str]] = None,
+    config_name: str = "default",
+    client: Optional[anthropic.AsyncAnthropic] = None,
+) -> AsyncIterator[AgentEvent]:
+    """Run the agent with token streaming, yielding events as they happen.
+
+    Yields TextDelta for every streamed chunk of assistant text (including
+    text the model writes before a tool call), ToolCallStarted/Finished
+    around each tool call, and finally AgentFinished with the full result.
+    """
+    async for event in _agent_events(
+        query,
+        agent_config=agent_config,
+        system_prompt=system_prompt,
+        tool_descriptions=tool_descriptions,
+        config_name=config_name,
+        verbose=False,
+        client=client,
+        stream=True,
+    ):
+        yield event
+
+
+def stream_agent(query: str, **kwargs) -> Iterator[AgentEvent]:
+    """Synchronous generator over astream_agent events, for non-async callers.
+
+    Accepts the same keyword arguments as astream_agent and drives it on a
+    private event loop, so it must not be called from inside a running loop.
+    """
+    loop = asyncio.new_event_loop()
+    events = astream_agent(query, **kwargs)
+
+    async def _close() -> None:
+        await events.aclose()
+        await aclose_async_mediawiki_client()
+
+    try:
+        while True:
+            try:
+                event = loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        loop.run_until_complete(_close())
+        loop.close()
+
+
+def run_agent(
+    query: str,
+    *,
+    agent_config: Optional[AgentConfig] = None,
+    system_prompt: Optional[str] = None,
+    tool_descriptions: Optional[dict[str, str]] = None,
+    config_name: str = "default",
+    verbose: bool = False,
+) -> AgentResult:
+    """Run the Wikipedia agent on a single query.
+
+    Can be called from the CLI with a config name, or from evals
+    with pre-loaded objects. Runs arun_agent on a private event loop, so it
+    must not be called from inside a running loop; await arun_agent there.
+
+    Each call opens and closes its own Anthropic and MediaWiki HTTP clients
+    with that loop, so back-to-back calls reuse no connections. That suits
+    one question per process (the ask command); to answer many, drive
+    arun_agent with a shared client from one loop, as ask-batch and evals
+    do, or use AgentService in src/server.py from threads.
+
+    Args:
+        query: The user question to answer.
+        agent_config: Pre-built config. If None, taken from the config registry by config_name.
+        system_prompt: Pre-built system prompt. If None, taken from the registry per
+            agent_config.system_instruction.
+        tool_descriptions: Pre-loaded tool descriptions dict. If None, taken from the registry
+            per agent_config.tool_description.
+        config_name: Name of agent config YAML (without .yaml).
+        verbose: Print intermediate tool calls to stderr.
+
+    Returns:
+        AgentResult with final response, message history, turn count,
+        and tool call records.
+    """
+
+    async def _run() -> AgentResult:
+        try:
+            return await arun_agent(
+                query,
+                agent_config=agent_config,
+                system_prompt=system_prompt,
+                tool_descriptions=tool_descriptions,
+                config_name=config_name,
+                verbose=verbose,
+            )
+        finally:
+            await aclose_async_mediawiki_client()
+
+    return asyncio.run(_run())
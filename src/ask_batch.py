@@ -0,0 +1,223 @@
+"""Answer many questions offline: read JSONL/CSV, run the agent concurrently, stream JSONL results.
+
+Questions are read lazily and at most `concurrency` run at once, so memory
+stays flat however large the input is. Each result is written and flushed
+as soon as it is ready (or, in input order, as soon as everything before it
+is), which makes the output file its own checkpoint: re-running with the
+same output skips every question it already holds an answer for.
+"""
+
+import asyncio
+import csv
+import json
+import sys
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from src.agent import AgentResult
+
+FORMATS = ("jsonl", "csv")
+QUERY_FIELDS = ("query", "question")
+# In input order, how many finished results may wait on a slow earlier one, per concurrency slot
+REORDER_WINDOW_FACTOR = 4
+
+
+@dataclass
+class Question:
+    index: int
+    id: str
+    query: str
+
+
+@dataclass
+class BatchSummary:
+    answered: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+def detect_format(path: str) -> str:
+    """'csv' for .csv files, otherwise 'jsonl' (including stdin)."""
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _question(index: int, row: dict, where: str) -> Question:
+    query = next((row[f] for f in QUERY_FIELDS if row.get(f)), None)
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError(f"{where}: no 'query' or 'question' field")
+    return Question(index=index, id=str(row.get("id", index)), query=query)
+
+
+def iter_questions(stream: IO[str], fmt: str, name: str = "<stdin>") -> Iterator[Question]:
+    """Lazily parse questions from a JSONL stream (one object per line) or a CSV with a header row.
+
+    Each row needs a 'query' (or 'question') field; an 'id' field is passed
+    through to the output, defaulting to the row's position.
+
+    Raises:
+        ValueError: On a malformed row, naming its line.
+    """
+    if fmt == "csv":
+        for index, row in enumerate(csv.DictReader(stream)):
+            yield _question(index, row, f"{name}: row {index + 2}")
+        return
+    index = 0
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{name}:{line_number}: invalid JSON ({e})") from None
+        if not isinstance(row, dict):
+            raise ValueError(f"{name}:{line_number}: expected a JSON object")
+        yield _question(index, row, f"{name}:{line_number}")
+        index += 1
+
+
+def completed_indexes(path: Path) -> set[int]:
+    """Input indexes that already have an answer in an output file.
+
+    A partially written last line (from an interrupted run) is cut off so
+    appending can continue cleanly. Failed questions are not counted, so
+    they are retried; the last record for an index is the one that counts.
+    """
+    done: set[int] = set()
+    if not path.exists():
+        return done
+    with open(path, "rb+") as f:
+        data_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            data_end += len(line)
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" in record:
+                done.discard(record["index"])
+            else:
+                done.add(record["index"])
+        f.truncate(data_end)
+    return done
+
+
+def result_record(question: Question, config_name: str, result: "AgentResult") -> dict:
+    return {
+        "index": question.index,
+        "id": question.id,
+        "query": question.query,
+        "config": config_name,
+        "final_text": result.final_text,
+        "turn_count": result.turn_count,
+        "tool_calls": [
+            {k: call.get(k) for k in ("tool", "input", "turn", "wall_time_s")} for call in result.tool_calls_made
+        ],
+        "usage": result.usage,
+        "wall_time_s": result.wall_time_s,
+        "llm_calls": result.llm_calls,
+    }
+
+
+async def arun_ask_batch(
+    questions: Iterator[Question],
+    write: Callable[[dict], None],
+    *,
+    config_name: str,
+    concurrency: int = 8,
+    ordered: bool = False,
+    skip: Optional[set[int]] = None,
+    verbose: bool = False,
+) -> BatchSummary:
+    """Answer questions with at most concurrency agent runs in flight, writing each record once ready.
+
+    Args:
+        questions: Questions to answer, consumed lazily.
+        write: Called with each result record (or {'index', 'id', 'query', 'error'} on failure).
+        config_name: Agent config for every question.
+        concurrency: Agent runs in flight at once.
+        ordered: Write records in input order instead of completion order. Finished
+            results wait for earlier ones, up to a window of 4 x concurrency.
+        skip: Input indexes to leave out, e.g. from completed_indexes.
+        verbose: Print one progress line per question to stderr.
+    """
+    # The SDK is imported on first use, so the CLI can load this module for --help cheaply
+    import anthropic
+
+    from src.agent import arun_agent
+    from src.mediawiki import aclose_async_mediawiki_client
+    from src.registry import get_config_registry
+
+    snapshot = get_config_registry().snapshot()
+    agent_config = snapshot.agent(config_name)
+    prompts = dict(
+        system_prompt=snapshot.system_instruction(agent_config.system_instruction),
+        tool_descriptions=snapshot.tool_description(agent_config.tool_description),
+    )
+    client = anthropic.AsyncAnthropic(max_retries=0)
+    summary = BatchSummary()
+    skip = skip or set()
+    window = concurrency * REORDER_WINDOW_FACTOR
+    pending: set[asyncio.Task] = set()
+    order: deque[int] = deque()
+    finished: dict[int, dict] = {}
+
+    async def _answer(question: Question) -> dict:
+        try:
+            result = await arun_agent(question.query, agent_config=agent_config, client=client, **prompts)
+        except Exception as e:
+            summary.failed += 1
+            return {"index": question.index, "id": question.id, "query": question.query, "error": repr(e)}
+        summary.answered += 1
+        return result_record(question, config_name, result)
+
+    def _emit(record: dict) -> None:
+        if verbose:
+            status = "failed" if "error" in record else f"{record['wall_time_s']:.1f}s"
+            print(f"[ask-batch] {record['id']}: {status}", file=sys.stderr)
+        write(record)
+
+    async def _collect() -> None:
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            record = task.result()
+            if not ordered:
+                _emit(record)
+                continue
+            finished[record["index"]] = record
+            while order and order[0] in finished:
+                _emit(finished.pop(order.popleft()))
+
+    try:
+        for question in questions:
+            if question.index in skip:
+                summary.skipped += 1
+                continue
+            while len(pending) >= concurrency or (ordered and len(order) >= window):
+                await _collect()
+            pending.add(asyncio.ensure_future(_answer(question)))
+            if ordered:
+                order.append(question.index)
+        while pending:
+            await _collect()
+    finally:
+        for task in pending:
+            task.cancel()
+        await client.close()
+        await aclose_async_mediawiki_client()
+    return summary
+
+
+def jsonl_writer(stream: IO[str]) -> Callable[[dict], None]:
+    """Write one compact JSON line per record, flushed to the OS right away."""
+
+    def write(record: dict) -> None:
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        stream.flush()
+
+    return write
@@ -0,0 +1,317 @@
+"""Two-tier result cache for tools: in-process LRU in front of a SQLite store."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from src.config import PROJECT_ROOT
+
+DEFAULT_CACHE_PATH = PROJECT_ROOT / ".cache" / "tool_cache.sqlite"
+# Puts between row counts of the SQLite tier; the cap may be overshot by up to this many rows
+DISK_SIZE_CHECK_EVERY = 100
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def cache_key(namespace: str, query: str, *parts, lowercase: bool = True) -> str:
+    """Build a cache key from a namespace, a normalized query and extra parts.
+
+    Queries are lowercased and whitespace-collapsed so trivially different
+    phrasings of the same search share an entry. Pass lowercase=False where
+    case is significant, e.g. article titles ('Mercury' vs 'MERCURY').
+    """
+    normalized = " ".join((query.lower() if lowercase else query).split())
+    return "\x1f".join([namespace, normalized, *(str(p) for p in parts)])
+
+
+class _FetchAbandoned(Exception):
+    """The coroutine fetching a key was cancelled; its waiters fetch again themselves."""
+
+
+class _InFlight:
+    """A fetch in progress that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class ToolCache:
+    """Thread-safe LRU + SQLite cache with TTL, size eviction and single-flight.
+
+    Args:
+        path: SQLite file for the persistent tier. None keeps the cache in memory only.
+        max_memory_entries: LRU capacity of the in-process tier.
+        max_disk_entries: Row cap for the SQLite tier; oldest entries are evicted first.
+        ttl_seconds: Entries older than this are treated as misses. None disables expiry.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = DEFAULT_CACHE_PATH,
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 50_000,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._in_flight: dict[str, _InFlight] = {}
+        self._async_in_flight: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._puts_since_size_check = DISK_SIZE_CHECK_EVERY
+        if self.path is not None:
+            self._db = self._open_db(self.path)
+
+    @staticmethod
+    def _open_db(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL lets several eval processes share one cache file
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)")
+        db.commit()
+        return db
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _memory_put(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[tuple[float, str]]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT created_at, value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[0]):
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+        return row
+
+    def _disk_put(self, key: str, created_at: float, value: str) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, created_at),
+            )
+            # Counting rows scans the table, so the cap is only enforced every few puts
+            self._puts_since_size_check += 1
+            if self._puts_since_size_check >= DISK_SIZE_CHECK_EVERY:
+                self._puts_since_size_check = 0
+                (count,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+                overflow = count - self.max_disk_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM entries WHERE key IN"
+                        " (SELECT key FROM entries ORDER BY created_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.stats.evictions += overflow
+            self._db.commit()
+
+    def _memory_lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return entry[1]
+                del self._memory[key]
+        return None
+
+    def _disk_lookup(self, key: str) -> Optional[str]:
+        row = self._disk_get(key)
+        if row is None:
+            return None
+        with self._lock:
+            self._memory_put(key, *row)
+            self.stats.disk_hits += 1
+        return row[1]
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss. Counts hits but not misses."""
+        value = self._memory_lookup(key)
+        return value if value is not None else self._disk_lookup(key)
+
+    def put(self, key: str, value: str) -> None:
+        """Store value in both tiers."""
+        created_at = time.time()
+        with self._lock:
+            self._memory_put(key, created_at, value)
+        self._disk_put(key, created_at, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async get. The SQLite tier is read in a worker thread, off the event loop."""
+        value = self._memory_lookup(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._disk_lookup, key)
+        return value
+
+    async def aput(self, key: str, value: str) -> None:
+        """Async put. The SQLite tier is written in a worker thread, off the event loop."""
+        created_at = time.time()
+        with self._lock:
+            self._memory_put(key, created_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_put, key, created_at, value)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], str]) -> str:
+        """Return the cached value for key, calling fetch on a miss.
+
+        Concurrent callers missing on the same key share a single fetch.
+        Exceptions from fetch propagate to every waiter and are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # Another leader may have finished between the lookup and here
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self.stats.memory_hits += 1
+                return entry[1]
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value
+
+        try:
+            value = fetch()
+            self.put(key, value)
+            in_flight.value = value
+            return value
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    async def aget_or_fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        """Async get_or_fetch. Single-flight applies to coroutines on the same event loop.
+
+        If the coroutine doing the fetch is cancelled, its waiters are not:
+        one of them fetches again instead.
+        """
+        value = await self.aget(key)
+        if value is not None:
+            return value
+
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        while (future := self._async_in_flight.get(flight_key)) is not None:
+            with self._lock:
+                self.stats.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except _FetchAbandoned:
+                continue
+
+        future = self._async_in_flight[flight_key] = loop.create_future()
+        with self._lock:
+            self.stats.misses += 1
+        try:
+            value = await fetch()
+        except BaseException as e:
+            future.set_exception(_FetchAbandoned() if isinstance(e, asyncio.CancelledError) else e)
+            # Mark retrieved so an unawaited failure doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            with self._lock:
+                self._memory_put(key, time.time(), value)
+            future.set_result(value)
+        finally:
+            del self._async_in_flight[flight_key]
+        await self.aput(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+
+_default_cache: Optional[ToolCache] = None
+_default_cache_enabled = True
+_default_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> Optional[ToolCache]:
+    """Return the process-wide tool cache, creating it on first use. None if disabled."""
+    global _default_cache
+    if not _default_cache_enabled:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ToolCache()
+        return _default_cache
+
+
+def set_tool_cache(cache: Optional[ToolCache]) -> None:
+    """Replace the process-wide tool cache. Pass None to disable caching."""
+    global _default_cache, _default_cache_enabled
+    with _default_cache_lock:
+        _default_cache = cache
+        _default_cache_enabled = cache is not None
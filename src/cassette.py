@@ -0,0 +1,126 @@
+"""Record/replay cassettes for Anthropic and Wikipedia calls.
+
+A cassette is a gzipped JSONL file of {"key", "kind", "response"} records,
+where key is a hash of the full request. While a cassette is active,
+acreate_with_retries and the Wikipedia tools consult it before going to the
+network, which makes eval runs and benchmarks offline and deterministic.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+MODES = ("auto", "record", "replay")
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _to_json(obj: Any) -> Any:
+    """json.dumps default hook for SDK models (e.g. content blocks in messages)."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Cannot serialize {type(obj).__name__} for cassette key")
+
+
+def request_key(kind: str, request: dict) -> str:
+    """Stable hash of a request's kind and full kwargs."""
+    payload = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=_to_json)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded responses, keyed by request hash.
+
+    Identical requests made several times (e.g. the same eval query on two
+    runs) are recorded in order and replayed in the same order, repeating
+    the last response once they run out.
+
+    Args:
+        path: Cassette file (.jsonl.gz). Created on first record.
+        mode: 'replay' serves only recorded responses and raises CassetteMiss
+            otherwise; 'record' always calls through and appends; 'auto'
+            replays hits and records misses.
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = "auto"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[Any]] = {}
+        self._cursors: dict[str, int] = {}
+        self._file = None
+        if self.path.exists():
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._entries.setdefault(record["key"], []).append(record["response"])
+
+    def lookup(self, kind: str, request: dict) -> Optional[Any]:
+        """Return the next recorded response for request, or None to call through."""
+        if self.mode == "record":
+            return None
+        key = request_key(kind, request)
+        with self._lock:
+            responses = self._entries.get(key)
+            if not responses:
+                self.misses += 1
+                if self.mode == "replay":
+                    raise CassetteMiss(f"No recorded {kind} response in {self.path} (key {key[:12]})")
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.hits += 1
+            return responses[min(cursor, len(responses) - 1)]
+
+    def record(self, kind: str, request: dict, response: Any) -> None:
+        """Append a response to the cassette file. No-op in replay mode."""
+        if self.mode == "replay":
+            return
+        key = request_key(kind, request)
+        line = json.dumps({"key": key, "kind": kind, "response": response}, default=_to_json)
+        with self._lock:
+            self._entries.setdefault(key, []).append(response)
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Each session appends a new gzip member; readers see one stream
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_active: Optional[Cassette] = None
+
+
+def get_active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+@contextmanager
+def use_cassette(path: Union[str, Path], mode: str = "auto") -> Iterator[Cassette]:
+    """Activate a cassette process-wide for the duration of the block."""
+    global _active
+    previous = _active
+    cassette = Cassette(path, mode)
+    _active = cassette
+    try:
+        yield cassette
+    finally:
+        _active = previous
+        cassette.close()
@@ -1,8 +1,14 @@
 """CLI entrypoint using Click."""
 
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+
 import click
 
-from src.agent import run_agent
+from src.ask_batch import FORMATS as ASK_BATCH_FORMATS
+from src.cache import set_tool_cache
+from src.cassette import MODES as CASSETTE_MODES, use_cassette
 from src.config import load_agent_config
 
 
@@ -12,6 +18,28 @@ def cli():
     pass
 
 
+def cassette_options(fn):
+    """Add --cassette/--cassette-mode to a command."""
+    fn = click.option(
+        "--cassette-mode",
+        type=click.Choice(CASSETTE_MODES),
+        default="auto",
+        help="auto: replay recorded calls, record new ones. record: always call and append. "
+        "replay: never touch the network.",
+    )(fn)
+    fn = click.option(
+        "--cassette",
+        type=click.Path(dir_okay=False),
+        default=None,
+        help="Record/replay Anthropic and Wikipedia calls to this .jsonl.gz file.",
+    )(fn)
+    return fn
+
+
+def _cassette_context(path, mode):
+    return use_cassette(path, mode) if path else nullcontext()
+
+
 @cli.command()
 @click.argument("query")
 @click.option(
@@ -26,26 +54,244 @@ def cli():
     is_flag=True,
     help="Print tool calls to stderr.",
 )
-def ask(query, config_name, verbose):
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Bypass the on-disk tool result cache.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Print the answer as it is generated and tool calls as they happen.",
+)
+@cassette_options
+def ask(query, config_name, verbose, no_cache, stream, cassette, cassette_mode):
     """Ask the Wikipedia agent a question.
 
     \b
     Examples:
         python -m src.cli ask "What is the capital of France?"
         python -m src.cli ask "Explain quantum entanglement" --config agent_v1 -v
+        python -m src.cli ask "Who was Ada Lovelace?" --stream
+        python -m src.cli ask "Who was Ada Lovelace?" --cassette ada.jsonl.gz
     """
+    from src.agent import run_agent
+
+    if no_cache:
+        set_tool_cache(None)
     agent_config = load_agent_config(config_name)
 
-    result = run_agent(
-        query=query,
-        agent_config=agent_config,
-        verbose=verbose,
-    )
+    with _cassette_context(cassette, cassette_mode):
+        if stream:
+            _ask_streaming(query, agent_config)
+            return
+
+        result = run_agent(
+            query=query,
+            agent_config=agent_config,
+            verbose=verbose,
+        )
 
     click.echo(result.final_text)
 
 
+def _ask_streaming(query, agent_config):
+    """Echo streamed answer text to stdout and tool progress to stderr."""
+    from src.agent import TextDelta, ToolCallFinished, ToolCallStarted, stream_agent
+
+    at_line_start = True
+    for event in stream_agent(query, agent_config=agent_config):
+        if isinstance(event, TextDelta):
+            click.echo(event.text, nl=False)
+            at_line_start = event.text.endswith("\n")
+        elif isinstance(event, ToolCallStarted):
+            if not at_line_start:
+                click.echo()
+                at_line_start = True
+            click.echo(f"[tool call] {event.name}({event.input})", err=True)
+        elif isinstance(event, ToolCallFinished):
+            click.echo(f"[tool done] {event.name}", err=True)
+    if not at_line_start:
+        click.echo()
+
+
+@cli.command("ask-batch")
+@click.argument(
+    "input_path", default="-", metavar="INPUT", type=click.Path(exists=True, dir_okay=False, allow_dash=True)
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="JSONL file to write results to (default stdout). If it exists, answered questions are skipped.",
+)
+@click.option(
+    "--format",
+    "input_format",
+    type=click.Choice(ASK_BATCH_FORMATS),
+    default=None,
+    help="Input format. Defaults to csv for .csv files, else jsonl.",
+)
+@click.option(
+    "--config",
+    "config_name",
+    default="agent_v3",
+    show_default=True,
+    help="Agent config name (top-level key in configs/agents.yaml).",
+)
+@click.option("--concurrency", default=8, show_default=True, help="Questions answered at once.")
+@click.option(
+    "--order",
+    type=click.Choice(["completion", "input"]),
+    default="completion",
+    show_default=True,
+    help="Write results as they finish, or in the order of the input.",
+)
+@click.option("--overwrite", is_flag=True, help="Start over instead of resuming an existing output file.")
+@click.option("--verbose", "-v", is_flag=True, help="Print progress to stderr.")
+@click.option("--no-cache", is_flag=True, help="Bypass the on-disk tool result cache.")
+@cassette_options
+def ask_batch(
+    input_path, output, input_format, config_name, concurrency, order, overwrite, verbose, no_cache, cassette,
+    cassette_mode,
+):
+    """Answer every question in a JSONL or CSV file (or stdin), writing JSONL results.
+
+    Each input row needs a 'query' (or 'question') field and may have an 'id'.
+    Each output line holds the id, the answer, tool calls, token usage and
+    timings. An interrupted run resumes where it left off when re-run with
+    the same --output.
+
+    \b
+    Examples:
+        python -m src.cli ask-batch questions.jsonl -o answers.jsonl --concurrency 16
+        python -m src.cli ask-batch questions.csv -o answers.jsonl --order input
+        cut -f1 questions.tsv | jq -Rc '{query: .}' | python -m src.cli ask-batch > answers.jsonl
+    """
+    import asyncio
+
+    from src.ask_batch import arun_ask_batch, completed_indexes, detect_format, iter_questions, jsonl_writer
+    from src.scheduler import RateLimitScheduler, get_scheduler, set_scheduler
+
+    if no_cache:
+        set_tool_cache(None)
+    skip = set()
+    if output is not None and output.exists() and not overwrite:
+        skip = completed_indexes(output)
+        click.echo(f"Resuming {output}: {len(skip)} questions already answered", err=True)
+
+    input_format = input_format or detect_format(input_path)
+    # csv needs newline="" to keep line breaks inside quoted fields intact
+    input_context = nullcontext(sys.stdin) if input_path == "-" else open(input_path, encoding="utf-8", newline="")
+    previous = get_scheduler()
+    set_scheduler(RateLimitScheduler.from_config(max_concurrency=concurrency))
+    try:
+        with (
+            input_context as source,
+            click.open_file(str(output) if output else "-", "w" if overwrite else "a", encoding="utf-8") as sink,
+            _cassette_context(cassette, cassette_mode),
+        ):
+            summary = asyncio.run(arun_ask_batch(
+                iter_questions(source, input_format, name="<stdin>" if input_path == "-" else input_path),
+                jsonl_writer(sink),
+                config_name=config_name,
+                concurrency=concurrency,
+                ordered=order == "input",
+                skip=skip,
+                verbose=verbose,
+            ))
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    except KeyboardInterrupt:
+        if output is not None:
+            click.echo(f"Interrupted; re-run with -o {output} to resume.", err=True)
+        sys.exit(130)
+    finally:
+        set_scheduler(previous)
+    click.echo(
+        f"Answered {summary.answered}, failed {summary.failed}, skipped {summary.skipped} already answered.",
+        err=True,
+    )
+
+
 @cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to listen on.")
+@click.option("--port", default=8080, show_default=True, help="Port to listen on.")
+@click.option(
+    "--config",
+    "config_name",
+    default="agent_v3",
+    show_default=True,
+    help="Agent config for requests that don't name one.",
+)
+@click.option("--concurrency", default=16, show_default=True, help="Agent runs executing at once.")
+@click.option(
+    "--max-pending",
+    default=64,
+    show_default=True,
+    help="Questions allowed to wait for a slot; more are refused with 503.",
+)
+@click.option("--no-cache", is_flag=True, help="Bypass the on-disk tool result cache.")
+@click.option("--quiet", "-q", is_flag=True, help="Don't log each request to stderr.")
+def serve(host, port, config_name, concurrency, max_pending, no_cache, quiet):
+    """Serve the agent over a local HTTP API.
+
+    \b
+    Endpoints:
+        POST /ask      {"query": "...", "config": "agent_v3"}
+        GET  /healthz  200 while upstream circuits are closed, else 503
+        GET  /metrics  request counts, latency percentiles, cache and scheduler stats
+
+    \b
+    Examples:
+        python -m src.cli serve --port 8080 --concurrency 32
+        curl -s localhost:8080/ask -d '{"query": "Who wrote 1984?"}'
+    """
+    from src.server import serve as run_server
+
+    if no_cache:
+        set_tool_cache(None)
+    run_server(
+        host=host,
+        port=port,
+        default_config=config_name,
+        max_concurrency=concurrency,
+        max_pending=max_pending,
+        quiet=quiet,
+    )
+
+
+class DefaultCommandGroup(click.Group):
+    """Group that runs default_command when the first argument is not a subcommand.
+
+    Keeps `evals BASE --test TEST` working alongside `evals query ...`.
+    """
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@cli.group(cls=DefaultCommandGroup, default_command="run")
+def evals():
+    """Run evaluations and query results across runs.
+
+    \b
+    Examples:
+        python -m src.cli evals agent_v0 --test agent_v1 -v
+        python -m src.cli evals query scores agent_v3 --dimension correctness --last 10
+        python -m src.cli evals query regressions agent_v2 agent_v3
+        python -m src.cli evals report 2026-02-24_17-03-19
+    """
+
+
+@evals.command("run")
 @click.argument("base")
 @click.option(
     "--test",
@@ -61,10 +307,22 @@ def ask(query, config_name, verbose):
 @click.option(
     "--run-id",
     default=None,
-    help="Resume a previous run by its folder name (e.g. 2026-02-22_14-30-00).",
+    help="Resume a previous run by its folder name (e.g. 2026-02-22_14-30-00); only unfinished items are run.",
 )
-def evals(base, test, verbose, run_id):
-    """Run all evaluations defined in configs/evals.yaml.
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Bypass the on-disk tool result cache.",
+)
+@click.option(
+    "--concurrency",
+    type=int,
+    default=None,
+    help="Cap on concurrent API calls per model (default: max in configs/rate_limits.yaml).",
+)
+@cassette_options
+def evals_run(base, test, verbose, run_id, no_cache, concurrency, cassette, cassette_mode):
+    """Run all evaluations defined in configs/evals.yaml (the default command).
 
     \b
     BASE is the agent config name for the base side.
@@ -74,12 +332,160 @@ def evals(base, test, verbose, run_id):
         python -m src.cli evals agent_v1
         python -m src.cli evals agent_v0 --test agent_v1 -v
         python -m src.cli evals agent_v1 --run-id 2026-02-22_14-30-00
+        python -m src.cli evals agent_v2 --test agent_v3 --cassette evals.jsonl.gz --cassette-mode replay
     """
     from src.eval.runner import run_eval
 
-    run_dir = run_eval(base_agent=base, test_agent=test, verbose=verbose, run_id=run_id)
+    if no_cache:
+        set_tool_cache(None)
+    with _cassette_context(cassette, cassette_mode) as active_cassette:
+        run_dir = run_eval(
+            base_agent=base,
+            test_agent=test,
+            verbose=verbose,
+            run_id=run_id,
+            max_concurrency=concurrency,
+        )
+    if verbose and active_cassette is not None:
+        click.echo(
+            f"Cassette: {active_cassette.hits} replayed, {active_cassette.misses} not recorded",
+            err=True,
+        )
     click.echo(f"Eval run complete: {run_dir}")
 
 
+@evals.command("ingest")
+@click.option("--force", is_flag=True, help="Re-ingest runs even if unchanged.")
+def evals_ingest(force):
+    """Load all runs under eval_outputs/ into the results warehouse."""
+    from src.eval.warehouse import Warehouse
+
+    warehouse = Warehouse()
+    try:
+        loaded = warehouse.ingest_all(force=force)
+    finally:
+        warehouse.close()
+    click.echo(f"Ingested {loaded} new or changed runs into {warehouse.path}")
+
+
+@evals.command("report")
+@click.argument("run_id")
+def evals_report(run_id):
+    """Rebuild report.md of an existing run from its judge outputs and transcripts.
+
+    No agent or judge calls are made, e.g. after changing eval_outputs/TEMPLATE.md
+    or the report tables.
+
+    \b
+    Example:
+        python -m src.cli evals report 2026-02-24_17-03-19
+    """
+    from src.eval.report import write_report
+    from src.eval.warehouse import EVAL_OUTPUTS_DIR, read_manifest
+
+    run_dir = EVAL_OUTPUTS_DIR / run_id
+    manifest = read_manifest(run_dir) if run_dir.is_dir() else None
+    if manifest is None:
+        raise click.ClickException(f"No eval run at {run_dir}")
+    report_path = write_report(run_dir, manifest["base_agent"], manifest.get("test_agent"))
+    click.echo(f"Report written to: {report_path}")
+
+
+@evals.group("query")
+def evals_query():
+    """Answer questions across eval runs from the results warehouse.
+
+    New or changed runs are ingested first.
+    """
+
+
+def _run_query(method: str, *args, **kwargs) -> None:
+    from src.eval.warehouse import Warehouse, format_table
+
+    warehouse = Warehouse()
+    try:
+        warehouse.ingest_all()
+        columns, rows = getattr(warehouse, method)(*args, **kwargs)
+    finally:
+        warehouse.close()
+    click.echo(format_table(columns, rows) if rows else "No results.")
+
+
+@evals_query.command("scores")
+@click.argument("agent")
+@click.option("--dimension", default=None, help="Only this dimension (e.g. correctness, tool_triggering).")
+@click.option("--dataset", default=None, help="Only this dataset.")
+@click.option("--last", default=10, show_default=True, help="Number of most recent runs.")
+def evals_query_scores(agent, dimension, dataset, last):
+    """Mean scores of AGENT per run over its most recent runs.
+
+    \b
+    Example:
+        python -m src.cli evals query scores agent_v3 --dimension correctness --last 10
+    """
+    _run_query("agent_scores", agent, dimension=dimension, dataset=dataset, last=last)
+
+
+@evals_query.command("regressions")
+@click.argument("base")
+@click.argument("test")
+@click.option("--dimension", default=None, help="Only this dimension.")
+@click.option("--dataset", default=None, help="Only this dataset.")
+def evals_query_regressions(base, test, dimension, dataset):
+    """Items that TEST scores lower on than BASE, using each agent's latest score per item.
+
+    \b
+    Example:
+        python -m src.cli evals query regressions agent_v2 agent_v3 --dimension correctness
+    """
+    _run_query("regressions", base, test, dimension=dimension, dataset=dataset)
+
+
+@evals_query.command("sql")
+@click.argument("statement")
+def evals_query_sql(statement):
+    """Run a SQL STATEMENT against the runs, items and scores tables.
+
+    \b
+    Example:
+        python -m src.cli evals query sql "SELECT agent, AVG(tool_calls) FROM items GROUP BY agent"
+    """
+    _run_query("query", statement)
+
+
+@cli.command("build-index")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option(
+    "--format",
+    "source_format",
+    type=click.Choice(["auto", "xml", "jsonl"]),
+    default="auto",
+    help="Source format. 'auto' infers it from the file extension.",
+)
+@click.option(
+    "--verbose",
+    "-v",
+    is_flag=True,
+    help="Print progress to stderr.",
+)
+def build_index_cmd(source, output_dir, source_format, verbose):
+    """Build an offline search index for the 'offline' search backend.
+
+    \b
+    SOURCE is a pages-articles XML dump (.xml or .xml.bz2) or a JSONL file
+    of {"title": ..., "extract": ...} records.
+
+    \b
+    Examples:
+        python -m src.cli build-index enwiki-latest-pages-articles.xml.bz2 data/wiki_index -v
+        python -m src.cli build-index intros.jsonl data/wiki_index
+    """
+    from src.search_index import build_index
+
+    meta = build_index(source, output_dir, source_format=source_format, verbose=verbose)
+    click.echo(f"Indexed {meta['num_docs']} documents into {output_dir}")
+
+
 if __name__ == "__main__":
     cli()
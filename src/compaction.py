@@ -0,0 +1,167 @@
+"""Context compaction: shrink old tool results once the history passes a token budget.
+
+The agent re-sends its whole history every turn, so on long trajectories the
+search results from early turns dominate input tokens. Compaction replaces
+the content of older tool_result blocks (all but the latest keep_turns turns
+of results) using one of three strategies:
+
+- cite: keep only the passages a later assistant turn refers to; the rest
+  shrink to their title.
+- elide: replace each result with the list of titles it contained.
+- summarize: one model call condenses the results into a short note.
+
+Replacements are keyed by tool_use_id and applied to a copy of the history
+sent with each request, so AgentResult.messages keeps the full trajectory
+and compacted results stay identical (and cacheable) on later turns.
+"""
+
+from typing import Optional
+
+import anthropic
+
+from src.search_index import tokenize
+from src.utils import CallStats, acreate_with_retries
+
+STRATEGIES = ("cite", "elide", "summarize")
+PASSAGE_SEPARATOR = "\n\n---\n\n"
+SUMMARY_MAX_TOKENS = 512
+
+SUMMARY_PROMPT = """\
+You are condensing Wikipedia search results an assistant has already read while answering a question.
+
+Question: {query}
+
+<results>
+{results}
+</results>
+
+Write a short note (at most 150 words) with the facts from these results that bear on the question, \
+naming the article each fact comes from. Leave out everything else."""
+
+
+def validate_strategy(strategy: Optional[str]) -> None:
+    if strategy is not None and strategy not in STRATEGIES:
+        raise ValueError(f"Unknown compaction strategy '{strategy}'; expected one of {', '.join(STRATEGIES)}")
+
+
+def _is_tool_results(message: dict) -> bool:
+    content = message["content"]
+    return (
+        message["role"] == "user"
+        and isinstance(content, list)
+        and any(isinstance(b, dict) and b.get("type") == "tool_result" for b in content)
+    )
+
+
+def _block_text(block) -> str:
+    """Text an assistant block contributes: its text, or a tool call's input."""
+    if getattr(block, "type", None) == "text":
+        return block.text
+    if getattr(block, "type", None) == "tool_use":
+        return " ".join(str(v) for v in block.input.values())
+    return ""
+
+
+def _passages(content: str) -> list[tuple[str, str]]:
+    """(title, passage) pairs of a formatted search result."""
+    passages = []
+    for passage in content.split(PASSAGE_SEPARATOR):
+        title = passage.split("\n", 1)[0].removeprefix("## ") if passage.startswith("## ") else ""
+        passages.append((title, passage))
+    return passages
+
+
+def cite(content: str, later_tokens: set[str]) -> str:
+    """Keep passages whose title a later turn mentions; shrink the rest to their title."""
+    kept = []
+    for title, passage in _passages(content):
+        title_tokens = set(tokenize(title.split(" (")[0]))
+        if not title or (title_tokens and title_tokens <= later_tokens):
+            kept.append(passage)
+        else:
+            kept.append(f"## {title}\n[not referenced later; elided]")
+    return PASSAGE_SEPARATOR.join(kept)
+
+
+def elide(content: str) -> str:
+    titles = [title for title, _ in _passages(content) if title]
+    if not titles:
+        return "[earlier tool result elided]"
+    return "[earlier search results elided; articles: " + "; ".join(titles) + "]"
+
+
+def apply_compaction(messages: list, replacements: dict[str, str]) -> list:
+    """Copy of messages with compacted tool_result contents swapped in."""
+    if not replacements:
+        return messages
+    compacted = []
+    for message in messages:
+        if _is_tool_results(message) and any(b.get("tool_use_id") in replacements for b in message["content"]):
+            content = [
+                {**b, "content": replacements[b["tool_use_id"]]} if b.get("tool_use_id") in replacements else b
+                for b in message["content"]
+            ]
+            message = {**message, "content": content}
+        compacted.append(message)
+    return compacted
+
+
+async def acompact(
+    messages: list,
+    replacements: dict[str, str],
+    *,
+    strategy: str,
+    keep_turns: int,
+    client: anthropic.AsyncAnthropic,
+    model: str,
+    stats: Optional[CallStats] = None,
+) -> tuple[int, Optional[anthropic.types.Message]]:
+    """Add replacements for tool results older than the latest keep_turns turns.
+
+    Results compacted by an earlier call are left as they are.
+
+    Returns:
+        (number of newly compacted results, the summarize call's response or None)
+    """
+    result_turns = [i for i, m in enumerate(messages) if _is_tool_results(m)]
+    old_turns = result_turns[: max(0, len(result_turns) - keep_turns)]
+    candidates = [
+        (i, block)
+        for i in old_turns
+        for block in messages[i]["content"]
+        if block.get("type") == "tool_result"
+        and block["tool_use_id"] not in replacements
+        and isinstance(block.get("content"), str)
+    ]
+    if not candidates:
+        return 0, None
+
+    response = None
+    if strategy == "summarize":
+        query = messages[0]["content"]
+        results = "\n\n".join(block["content"] for _, block in candidates)
+        response = await acreate_with_retries(
+            client,
+            model=model,
+            stats=stats,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            messages=[{"role": "user", "content": SUMMARY_PROMPT.format(query=query, results=results)}],
+        )
+        summary = "".join(b.text for b in response.content if b.type == "text").strip()
+        first_id = candidates[0][1]["tool_use_id"]
+        for _, block in candidates:
+            replacements[block["tool_use_id"]] = (
+                f"[summary of earlier search results]\n{summary}"
+                if block["tool_use_id"] == first_id
+                else "[included in the summary of earlier search results above]"
+            )
+    else:
+        for i, block in candidates:
+            if strategy == "cite":
+                later = " ".join(
+                    _block_text(b) for m in messages[i + 1:] if m["role"] == "assistant" for b in m["content"]
+                )
+                replacements[block["tool_use_id"]] = cite(block["content"], set(tokenize(later)))
+            else:
+                replacements[block["tool_use_id"]] = elide(block["content"])
+    return len(candidates), response
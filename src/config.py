@@ -2,11 +2,20 @@
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 import yaml
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
+# Token counters of an API response's usage, as summed into AgentResult.usage
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
 
 @dataclass
 class AgentConfig:
@@ -15,6 +24,16 @@ class AgentConfig:
     max_turns: int = 10
     system_instruction: str = "default"
     tool_description: str = "default"
+    search_backend: str = "mediawiki"
+    search_index: Optional[str] = None
+    max_tool_concurrency: int = 4
+    prompt_caching: bool = False
+    # Shrink old tool results once a request's estimated input passes the budget: cite, elide or summarize
+    compaction: Optional[str] = None
+    compaction_token_budget: int = 6000
+    compaction_keep_turns: int = 1
+    # Search for the question during the first model call; serve a close enough first search from it
+    speculative_prefetch: bool = False
 
 
 def load_agent_config(name: str = "default") -> AgentConfig:
@@ -27,6 +46,11 @@ def load_agent_config(name: str = "default") -> AgentConfig:
     entry = data.get(name)
     if entry is None:
         raise KeyError(f"Agent config '{name}' not found in {path}")
+    return agent_config_from_entry(entry)
+
+
+def agent_config_from_entry(entry: dict) -> AgentConfig:
+    """Build an AgentConfig from one agents.yaml entry, ignoring unknown keys."""
     return AgentConfig(**{k: v for k, v in entry.items() if k in AgentConfig.__dataclass_fields__})
 
 
@@ -55,3 +79,28 @@ def load_tool_description(name: str = "default") -> dict[str, str]:
     if name not in data:
         raise KeyError(f"Tool description '{name}' not found in {path}")
     return data[name]
+
+
+def load_pricing() -> dict[str, dict[str, float]]:
+    """Load per-model USD prices per million tokens from configs/pricing.yaml.
+
+    Returns an empty dict if the file is missing.
+    """
+    path = PROJECT_ROOT / "configs" / "pricing.yaml"
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def estimate_cost(model: str, usage: dict, pricing: dict[str, dict[str, float]]) -> Optional[float]:
+    """Estimated USD cost of a call's usage, or None if the model has no price."""
+    prices = pricing.get(model)
+    if prices is None:
+        return None
+    return (
+        usage.get("input_tokens", 0) * prices.get("input", 0)
+        + usage.get("output_tokens", 0) * prices.get("output", 0)
+        + usage.get("cache_creation_input_tokens", 0) * prices.get("cache_write", 0)
+        + usage.get("cache_read_input_tokens", 0) * prices.get("cache_read", 0)
+    ) / 1_000_000
@@ -0,0 +1,138 @@
+"""Message Batches: submit many Messages requests at once and collect results by custom_id.
+
+Batched requests cost half as much as individual calls and do not count
+against the per-minute rate limits, at the price of latency (usually
+minutes, at most 24 hours).
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import anthropic
+
+from src.cassette import get_active_cassette
+from src.retry import acall_with_retries, get_circuit_breaker
+from src.utils import CASSETTE_KIND
+
+POLL_INITIAL_DELAY = 5.0
+POLL_MAX_DELAY = 60.0
+POLL_BACKOFF = 1.5
+
+
+@dataclass
+class BatchOutcome:
+    """Per-request outcome of a batch, keyed by custom_id."""
+
+    messages: dict[str, anthropic.types.Message] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+async def _api(fn, name: str):
+    return await acall_with_retries(fn, name, breaker=get_circuit_breaker("anthropic"))
+
+
+async def asubmit_batch(client: anthropic.AsyncAnthropic, requests: dict[str, dict]) -> str:
+    """Create a batch from {custom_id: messages.create kwargs}. Returns the batch id."""
+    batch = await _api(
+        lambda: client.messages.batches.create(
+            requests=[{"custom_id": custom_id, "params": params} for custom_id, params in requests.items()]
+        ),
+        "batch create",
+    )
+    return batch.id
+
+
+async def await_batch(client: anthropic.AsyncAnthropic, batch_id: str, verbose: bool = False) -> None:
+    """Poll a batch with backoff until it has ended."""
+    delay = POLL_INITIAL_DELAY
+    while True:
+        batch = await _api(lambda: client.messages.batches.retrieve(batch_id), "batch retrieve")
+        if batch.processing_status == "ended":
+            return
+        if verbose:
+            counts = batch.request_counts
+            print(
+                f"[batch] {batch_id}: {counts.processing} processing, {counts.succeeded} succeeded, "
+                f"{counts.errored} errored; next check in {delay:.0f}s",
+                file=sys.stderr,
+            )
+        await asyncio.sleep(delay)
+        delay = min(POLL_MAX_DELAY, delay * POLL_BACKOFF)
+
+
+async def afetch_batch_results(client: anthropic.AsyncAnthropic, batch_id: str) -> BatchOutcome:
+    """Collect an ended batch's results. Errored, canceled and expired requests go to errors."""
+    outcome = BatchOutcome()
+    decoder = await _api(lambda: client.messages.batches.results(batch_id), "batch results")
+    async for entry in decoder:
+        result = entry.result
+        if result.type == "succeeded":
+            outcome.messages[entry.custom_id] = result.message
+        elif result.type == "errored":
+            outcome.errors[entry.custom_id] = f"errored: {result.error.error.type}"
+        else:
+            outcome.errors[entry.custom_id] = result.type
+    return outcome
+
+
+async def arun_batch(
+    client: anthropic.AsyncAnthropic,
+    requests: dict[str, dict],
+    batch_id: Optional[str] = None,
+    on_submitted: Optional[Callable[[str], None]] = None,
+    verbose: bool = False,
+) -> BatchOutcome:
+    """Run {custom_id: messages.create kwargs} as one batch and wait for the results.
+
+    Requests found in the active cassette are served from it and not
+    submitted; successful results are recorded to it under the same key as
+    an individual messages.create call, so replays need no batch endpoint.
+
+    Args:
+        client: Async Anthropic client.
+        requests: Request kwargs by custom_id (1-64 chars of [a-zA-Z0-9_-]).
+        batch_id: Resume waiting on an already submitted batch instead of submitting.
+        on_submitted: Called with the new batch id right after submission,
+            e.g. to checkpoint it.
+        verbose: Print polling progress to stderr.
+    """
+    outcome = BatchOutcome()
+    cassette = get_active_cassette()
+    pending = {}
+    for custom_id, params in requests.items():
+        recorded = cassette.lookup(CASSETTE_KIND, params) if cassette is not None else None
+        if recorded is not None:
+            outcome.messages[custom_id] = anthropic.types.Message.model_validate(recorded)
+        else:
+            pending[custom_id] = params
+    if not pending:
+        return outcome
+
+    fetched = None
+    if batch_id is not None:
+        try:
+            await await_batch(client, batch_id, verbose=verbose)
+            fetched = await afetch_batch_results(client, batch_id)
+        except anthropic.NotFoundError:
+            # Results are only kept for 29 days; submit afresh
+            print(f"[batch] {batch_id} no longer exists, resubmitting", file=sys.stderr)
+    if fetched is None:
+        batch_id = await asubmit_batch(client, pending)
+        if verbose:
+            print(f"[batch] submitted {batch_id} with {len(pending)} requests", file=sys.stderr)
+        if on_submitted is not None:
+            on_submitted(batch_id)
+        await await_batch(client, batch_id, verbose=verbose)
+        fetched = await afetch_batch_results(client, batch_id)
+
+    for custom_id, params in pending.items():
+        message = fetched.messages.get(custom_id)
+        if message is not None:
+            outcome.messages[custom_id] = message
+            if cassette is not None:
+                cassette.record(CASSETTE_KIND, params, message.model_dump(mode="json"))
+        else:
+            outcome.errors[custom_id] = fetched.errors.get(custom_id, "missing from batch results")
+    return outcome
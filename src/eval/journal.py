@@ -0,0 +1,115 @@
+"""Append-only checkpoint journal for eval runs.
+
+Every completed agent run and judge call is appended to journal.jsonl in
+the run directory as soon as it finishes. Resuming a run replays the
+journal and only runs the (dataset, side, item, stage) units it is missing.
+
+Full agent results only stay in the journal until their dataset's
+transcripts are written; the runner then compacts them into references to
+transcript lines, so a finished run's journal holds little beyond scores.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.agent import AgentResult
+
+JOURNAL_FILENAME = "journal.jsonl"
+
+
+@dataclass(frozen=True)
+class Unit:
+    """One item of one dataset run by one side's agent.
+
+    The agent config name and query are part of the identity, so resuming
+    with a different agent or an edited dataset re-runs the affected items.
+    """
+
+    dataset: str
+    side: str
+    agent: str
+    index: int
+    query: str
+
+
+def _to_json(obj: Any) -> Any:
+    """json.dumps default hook: SDK content blocks keep their structure."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+def agent_result_to_dict(result: AgentResult) -> dict:
+    return json.loads(json.dumps(asdict(result), default=_to_json))
+
+
+def agent_result_from_dict(data: dict) -> AgentResult:
+    return AgentResult(**data)
+
+
+class RunJournal:
+    """Completed units of a run, backed by <run_dir>/journal.jsonl.
+
+    A partially written last line (e.g. from a crash mid-write) is ignored.
+    """
+
+    def __init__(self, run_dir: Path):
+        self.path = Path(run_dir) / JOURNAL_FILENAME
+        self._entries: dict[tuple[Unit, str], Any] = {}
+        self._file = None
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    unit = Unit(**record["unit"])
+                    self._entries[(unit, record["stage"])] = record["payload"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, unit: Unit, stage: str) -> Optional[Any]:
+        """Payload recorded for unit at stage ('agent' or 'judge'), or None."""
+        return self._entries.get((unit, stage))
+
+    def record(self, unit: Unit, stage: str, payload: Any) -> None:
+        """Append a completed unit stage and flush it to disk."""
+        self._entries[(unit, stage)] = payload
+        if self._file is None:
+            torn = self.path.exists() and self.path.stat().st_size > 0 and not self._ends_with_newline()
+            self._file = open(self.path, "a", encoding="utf-8")
+            if torn:
+                self._file.write("\n")
+        line = json.dumps({"unit": asdict(unit), "stage": stage, "payload": payload}, default=_to_json)
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def compact(self, stage: str, payloads: dict[Unit, Any]) -> None:
+        """Replace the stage payloads of units and rewrite the journal without superseded lines.
+
+        Written to a temporary file first, so a crash mid-compaction keeps the old journal.
+        """
+        for unit, payload in payloads.items():
+            self._entries[(unit, stage)] = payload
+        self.close()
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for (unit, entry_stage), payload in self._entries.items():
+                f.write(json.dumps({"unit": asdict(unit), "stage": entry_stage, "payload": payload}, default=_to_json))
+                f.write("\n")
+        os.replace(tmp, self.path)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -2,32 +2,14 @@
 
 import json
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, field
+from typing import Callable, Optional
 
 import anthropic
 
 from src.agent import AgentResult
-from src.utils import create_with_retries
-
-MAX_EVAL_CONCURRENCY = 2
-
-
-@dataclass
-class OnesidedItem:
-    query: str
-    response: str
-    scores: dict[str, int]
-    explanation: str
-    context: str
-
-
-@dataclass
-class OnesidedResult:
-    dataset_name: str
-    dimensions: list[str] = field(default_factory=list)
-    items: list[OnesidedItem] = field(default_factory=list)
-    mean_scores: dict[str, float] = field(default_factory=dict)
+from src.eval.batch import arun_batch
+from src.eval.results import OnesidedItem, OnesidedResult
+from src.utils import acreate_with_retries
 
 
 def _build_context(dataset_item: dict) -> str:
@@ -82,6 +64,22 @@ def _parse_scores(
             f"Invalid JSON in judge response: {e}\nRaw: {judge_response!r}"
         ) from e
 
+    return _validate_entry(data, dimensions, judge_response)
+
+
+def _validate_entry(
+    data: dict,
+    dimensions: dict[str, str],
+    judge_response: str,
+) -> tuple[dict[str, int], str]:
+    """Check one scored JSON object. Returns (scores_dict, explanation).
+
+    Raises:
+        JudgeParseError: If the expected dimension keys are missing or a
+            score is not an integer in [1, 3].
+    """
+    if not isinstance(data, dict):
+        raise JudgeParseError(f"Judge entry is not a JSON object. Got: {data!r}")
     raw_scores = data.get("scores")
     if not isinstance(raw_scores, dict):
         raise JudgeParseError(f"Judge response missing 'scores' dict. Got: {data!r}")
@@ -108,26 +106,92 @@ def _parse_scores(
     return scores, explanation
 
 
-def judge_onesided(
+def _find_entry_array(text: str) -> Optional[list]:
+    """First JSON array of objects in text, decoded up to its own closing bracket.
+
+    Prose around the array, or a second array after it, is ignored.
+    """
+    decoder = json.JSONDecoder()
+    start = text.find("[")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            value = None
+        if isinstance(value, list) and any(isinstance(entry, dict) for entry in value):
+            return value
+        start = text.find("[", start + 1)
+    return None
+
+
+def _parse_packed_scores(
+    judge_response: str,
+    dimensions: dict[str, str],
+    count: int,
+) -> tuple[dict[int, tuple[dict[str, int], str]], dict[int, str]]:
+    """Parse a packed judge response: a JSON array of scored entries keyed by "index".
+
+    Every entry is validated on its own, so one bad entry does not discard
+    the rest.
+
+    Returns:
+        (scores and explanation by item index, error message by item index).
+        Every index in range(count) appears in exactly one of the two.
+    """
+    entries = _find_entry_array(judge_response)
+    if entries is None:
+        error = f"No valid JSON array in packed judge response: {judge_response!r}"
+        return {}, {i: error for i in range(count)}
+
+    parsed, errors = {}, {}
+    for entry in entries:
+        idx = entry.get("index") if isinstance(entry, dict) else None
+        if not isinstance(idx, int) or not 0 <= idx < count or idx in parsed:
+            continue
+        try:
+            parsed[idx] = _validate_entry(entry, dimensions, judge_response)
+        except JudgeParseError as e:
+            errors[idx] = str(e)
+        else:
+            # A valid entry wins over an earlier invalid one for the same item
+            errors.pop(idx, None)
+    for i in range(count):
+        if i not in parsed and i not in errors:
+            errors[i] = f"No entry for item {i} in packed judge response"
+    return parsed, errors
+
+
+def _judge_prompt(
     query: str,
     response: str,
     context: str,
     dimensions: dict[str, str],
     prompt_template: str,
-    client: anthropic.Anthropic,
-    judge_model: str,
-    judge_max_tokens: int,
-) -> tuple[dict[str, int], str]:
-    """Make a single judge LLM call. Returns (scores_dict, explanation)."""
-    prompt = prompt_template.format(
+) -> str:
+    return prompt_template.format(
         dimensions=_format_dimensions(dimensions),
         query=query,
         context=context,
         response=response,
         score_keys=_format_score_keys(dimensions),
     )
-    judge_response = create_with_retries(
+
+
+async def ajudge_onesided(
+    query: str,
+    response: str,
+    context: str,
+    dimensions: dict[str, str],
+    prompt_template: str,
+    client: anthropic.AsyncAnthropic,
+    judge_model: str,
+    judge_max_tokens: int,
+) -> tuple[dict[str, int], str]:
+    """Make a single judge LLM call. Returns (scores_dict, explanation)."""
+    prompt = _judge_prompt(query, response, context, dimensions, prompt_template)
+    judge_response = await acreate_with_retries(
         client,
+        lane="judge",
         model=judge_model,
         max_tokens=judge_max_tokens,
         messages=[{"role": "user", "content": prompt}],
@@ -135,59 +199,173 @@ def judge_onesided(
     return _parse_scores(judge_response.content[0].text, dimensions)
 
 
-def evaluate_onesided(
-    dataset_name: str,
-    agent_results: list[tuple[dict, AgentResult]],
+async def ajudge_item(
+    dataset_item: dict,
+    result: AgentResult,
     dimensions: dict[str, str],
     prompt_template: str,
+    client: anthropic.AsyncAnthropic,
     judge_model: str,
     judge_max_tokens: int,
-) -> OnesidedResult:
-    """Evaluate a dataset using one-sided LLM-as-judge with multiple dimensions.
+) -> OnesidedItem:
+    """Judge one agent result as soon as it is available.
 
     Args:
-        dataset_name: Name of the dataset (for the report).
-        agent_results: List of (dataset_item, AgentResult) pairs.
+        dataset_item: The dataset row, with its query and any judge context fields.
+        result: The agent's result for it.
         dimensions: Dict mapping dimension name to rubric text.
         prompt_template: The onesided template from prompts/evals.yaml.
+        client: Async Anthropic client.
         judge_model: Model ID for the judge.
-        judge_max_tokens: Max tokens for judge response.
+        judge_max_tokens: Max tokens for the judge response.
     """
-    client = anthropic.Anthropic()
-    dim_names = list(dimensions.keys())
+    context = _build_context(dataset_item)
+    scores, explanation = await ajudge_onesided(
+        query=dataset_item["query"],
+        response=result.final_text,
+        context=context,
+        dimensions=dimensions,
+        prompt_template=prompt_template,
+        client=client,
+        judge_model=judge_model,
+        judge_max_tokens=judge_max_tokens,
+    )
+    return OnesidedItem(
+        query=dataset_item["query"],
+        response=result.final_text,
+        scores=scores,
+        explanation=explanation,
+        context=context,
+    )
 
-    def _judge_item(idx: int, dataset_item: dict, result: AgentResult) -> tuple[int, OnesidedItem]:
-        context = _build_context(dataset_item)
-        scores, explanation = judge_onesided(
-            query=dataset_item["query"],
+
+async def ajudge_batch(
+    pending: dict[str, tuple[dict, AgentResult]],
+    dimensions: dict[str, str],
+    prompt_template: str,
+    client: anthropic.AsyncAnthropic,
+    judge_model: str,
+    judge_max_tokens: int,
+    batch_id: Optional[str] = None,
+    on_submitted: Optional[Callable[[str], None]] = None,
+    verbose: bool = False,
+) -> tuple[dict[str, OnesidedItem], dict[str, str]]:
+    """Judge many agent results as one Message Batch.
+
+    Args:
+        pending: (dataset_item, AgentResult) pairs by batch custom_id.
+        batch_id: Id of an already submitted batch for these items, to resume waiting on it.
+        on_submitted: Called with the batch id once submitted.
+        Other args: as for ajudge_item.
+
+    Returns:
+        (judged items, failure reasons), both keyed by custom_id. Requests that
+        errored or expired and responses that fail to parse land in failures,
+        for the caller to re-judge individually.
+    """
+    contexts = {custom_id: _build_context(item) for custom_id, (item, _) in pending.items()}
+    requests = {
+        custom_id: {
+            "model": judge_model,
+            "max_tokens": judge_max_tokens,
+            "messages": [{
+                "role": "user",
+                "content": _judge_prompt(
+                    item["query"], result.final_text, contexts[custom_id], dimensions, prompt_template
+                ),
+            }],
+        }
+        for custom_id, (item, result) in pending.items()
+    }
+    outcome = await arun_batch(client, requests, batch_id=batch_id, on_submitted=on_submitted, verbose=verbose)
+
+    judged: dict[str, OnesidedItem] = {}
+    failures = dict(outcome.errors)
+    for custom_id, message in outcome.messages.items():
+        item, result = pending[custom_id]
+        try:
+            scores, explanation = _parse_scores(message.content[0].text, dimensions)
+        except JudgeParseError as e:
+            failures[custom_id] = str(e)
+            continue
+        judged[custom_id] = OnesidedItem(
+            query=item["query"],
             response=result.final_text,
-            context=context,
-            dimensions=dimensions,
-            prompt_template=prompt_template,
-            client=client,
-            judge_model=judge_model,
-            judge_max_tokens=judge_max_tokens,
+            scores=scores,
+            explanation=explanation,
+            context=contexts[custom_id],
         )
-        return idx, OnesidedItem(
-            query=dataset_item["query"],
-            response=result.final_text,
+    return judged, failures
+
+
+def _packed_prompt(
+    pack: list[tuple[dict, AgentResult]],
+    contexts: list[str],
+    dimensions: dict[str, str],
+    prompt_template: str,
+) -> str:
+    items = "\n\n".join(
+        f'<item index="{i}">\n<query>\n{item["query"]}\n</query>\n\n<context>\n{context}\n</context>\n\n'
+        f"<agent_response>\n{result.final_text}\n</agent_response>\n</item>"
+        for i, ((item, result), context) in enumerate(zip(pack, contexts, strict=True))
+    )
+    return prompt_template.format(
+        count=len(pack),
+        items=items,
+        dimensions=_format_dimensions(dimensions),
+        score_keys=_format_score_keys(dimensions),
+    )
+
+
+async def ajudge_packed(
+    pack: list[tuple[dict, AgentResult]],
+    dimensions: dict[str, str],
+    prompt_template: str,
+    client: anthropic.AsyncAnthropic,
+    judge_model: str,
+    judge_max_tokens: int,
+) -> tuple[dict[int, OnesidedItem], dict[int, str]]:
+    """Score several agent results in one judge call, sending the rubric once.
+
+    Args:
+        pack: (dataset_item, AgentResult) pairs to score together.
+        prompt_template: The onesided_packed template from prompts/evals.yaml.
+        judge_max_tokens: Max tokens per item; the call allows this times len(pack).
+        Other args: as for ajudge_item.
+
+    Returns:
+        (judged items, error messages), both keyed by position in pack, for
+        the caller to re-judge failed items individually.
+    """
+    contexts = [_build_context(item) for item, _ in pack]
+    judge_response = await acreate_with_retries(
+        client,
+        lane="judge",
+        model=judge_model,
+        max_tokens=judge_max_tokens * len(pack),
+        messages=[{"role": "user", "content": _packed_prompt(pack, contexts, dimensions, prompt_template)}],
+    )
+    parsed, errors = _parse_packed_scores(judge_response.content[0].text, dimensions, len(pack))
+    judged = {
+        i: OnesidedItem(
+            query=pack[i][0]["query"],
+            response=pack[i][1].final_text,
             scores=scores,
             explanation=explanation,
-            context=context,
+            context=contexts[i],
         )
+        for i, (scores, explanation) in parsed.items()
+    }
+    return judged, errors
 
-    # Run judge calls concurrently
-    items = [None] * len(agent_results)
-    with ThreadPoolExecutor(max_workers=MAX_EVAL_CONCURRENCY) as executor:
-        futures = {
-            executor.submit(_judge_item, i, dataset_item, result): i
-            for i, (dataset_item, result) in enumerate(agent_results)
-        }
-        for future in as_completed(futures):
-            idx, item = future.result()
-            items[idx] = item
 
-    # Compute per-dimension means
+def summarize_onesided(
+    dataset_name: str,
+    dimensions: dict[str, str],
+    items: list[OnesidedItem],
+) -> OnesidedResult:
+    """Collect judged items into an OnesidedResult with per-dimension means."""
+    dim_names = list(dimensions.keys())
     mean_scores = {}
     for dim in dim_names:
         vals = [item.scores[dim] for item in items]
@@ -0,0 +1,288 @@
+"""Eval report: rebuild report.md from a run folder's judge outputs and transcripts.
+
+Imports nothing from the Anthropic SDK, so `evals report` can regenerate a
+report without the cost of loading it.
+"""
+
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.config import PROJECT_ROOT, USAGE_FIELDS, estimate_cost, load_pricing
+from src.eval.results import OnesidedItem, OnesidedResult, TrajectoryItem, TrajectoryResult
+from src.eval.transcripts import iter_transcripts, transcript_files
+
+
+def _load_template() -> str:
+    path = PROJECT_ROOT / "eval_outputs" / "TEMPLATE.md"
+    with open(path) as f:
+        return f.read()
+
+
+def _load_trajectory_from_disk(run_dir: Path, side: str) -> dict[str, TrajectoryResult]:
+    """Load all trajectory judge outputs for a side from disk."""
+    judge_dir = run_dir / "judge_outputs"
+    results = {}
+    if not judge_dir.exists():
+        return results
+    for path in sorted(judge_dir.glob(f"*_{side}.json")):
+        data = json.loads(path.read_text())
+        if "metrics" not in data:
+            continue
+        ds_name = data["dataset"]
+        items = [TrajectoryItem(**item) for item in data["items"]]
+        results[ds_name] = TrajectoryResult(
+            items=items,
+            accuracy=data["metrics"]["accuracy"],
+            precision=data["metrics"]["precision"],
+            recall=data["metrics"]["recall"],
+            f1=data["metrics"]["f1"],
+        )
+    return results
+
+
+def _load_onesided_from_disk(run_dir: Path, side: str) -> dict[str, OnesidedResult]:
+    """Load all onesided judge outputs for a side from disk."""
+    judge_dir = run_dir / "judge_outputs"
+    results = {}
+    if not judge_dir.exists():
+        return results
+    for path in sorted(judge_dir.glob(f"*_{side}.json")):
+        data = json.loads(path.read_text())
+        if "dimensions" not in data:
+            continue
+        ds_name = data["dataset"]
+        items = [
+            OnesidedItem(
+                query=item["query"],
+                response="",
+                scores=item["scores"],
+                explanation=item.get("explanation", ""),
+                context="",
+            )
+            for item in data["items"]
+        ]
+        results[ds_name] = OnesidedResult(
+            dataset_name=ds_name,
+            dimensions=data["dimensions"],
+            items=items,
+            mean_scores=data["mean_scores"],
+        )
+    return results
+
+
+def _load_query_stats_from_disk(run_dir: Path, side: str) -> dict[str, list[dict]]:
+    """Load per-query usage, wall time and LLM call stats for a side from its transcripts, keyed by dataset."""
+    results = {}
+    for ds_name, path in transcript_files(run_dir / f"transcripts_{side}").items():
+        results[ds_name] = [
+            {
+                "usage": r.get("usage") or {},
+                "wall_time_s": r.get("wall_time_s"),
+                "llm_calls": r.get("llm_calls") or [],
+                "prefetch": r.get("prefetch"),
+            }
+            for r in iter_transcripts(path)
+        ]
+    return results
+
+
+def _load_usage_from_disk(run_dir: Path, side: str) -> dict[str, list[dict]]:
+    """Load per-query token usage for a side from its transcripts, keyed by dataset."""
+    results = {}
+    for ds_name, stats in _load_query_stats_from_disk(run_dir, side).items():
+        usages = [s["usage"] for s in stats if s["usage"]]
+        if usages:
+            results[ds_name] = usages
+    return results
+
+
+def _build_trajectory_table(
+    base_tr: TrajectoryResult,
+    test_tr: Optional[TrajectoryResult] = None,
+) -> str:
+    n = len(base_tr.items)
+    if test_tr:
+
+        def _diff_pct(t, b):
+            d = t - b
+            return f"+{d:.0%}" if d >= 0 else f"{d:.0%}"
+
+        lines = [
+            f"n={n}",
+            "",
+            "| Metric | Base | Test | Diff |",
+            "|--------|------|------|------|",
+            f"| Accuracy  | {base_tr.accuracy:.0%} | {test_tr.accuracy:.0%} | {_diff_pct(test_tr.accuracy, base_tr.accuracy)} |",
+            f"| Precision | {base_tr.precision:.0%} | {test_tr.precision:.0%} | {_diff_pct(test_tr.precision, base_tr.precision)} |",
+            f"| Recall    | {base_tr.recall:.0%} | {test_tr.recall:.0%} | {_diff_pct(test_tr.recall, base_tr.recall)} |",
+            f"| F1        | {base_tr.f1:.0%} | {test_tr.f1:.0%} | {_diff_pct(test_tr.f1, base_tr.f1)} |",
+        ]
+    else:
+        lines = [
+            f"n={n}",
+            "",
+            "| Metric    | Value  |",
+            "|-----------|--------|",
+            f"| Accuracy  | {base_tr.accuracy:.0%} |",
+            f"| Precision | {base_tr.precision:.0%} |",
+            f"| Recall    | {base_tr.recall:.0%} |",
+            f"| F1        | {base_tr.f1:.0%} |",
+        ]
+    return "\n".join(lines)
+
+
+def _build_rubric_table(
+    onesided_base: dict[str, OnesidedResult],
+    onesided_test: Optional[dict[str, OnesidedResult]] = None,
+) -> str:
+    sections = []
+    for ds_name, base_osr in onesided_base.items():
+        test_osr = onesided_test.get(ds_name) if onesided_test else None
+        n = len(base_osr.items)
+        lines = [f"### {ds_name}", "", f"n={n}", ""]
+        if test_osr:
+            lines.append("| Dimension | Base | Test | Diff |")
+            lines.append("|-----------|------|------|------|")
+            for dim in base_osr.dimensions:
+                base_val = base_osr.mean_scores.get(dim, 0)
+                test_val = test_osr.mean_scores.get(dim, 0)
+                diff = test_val - base_val
+                diff_str = f"+{diff:.1f}" if diff >= 0 else f"{diff:.1f}"
+                lines.append(f"| {dim} | {base_val:.1f} | {test_val:.1f} | {diff_str} |")
+        else:
+            lines.append("| Dimension | Mean |")
+            lines.append("|-----------|------|")
+            for dim in base_osr.dimensions:
+                val = base_osr.mean_scores.get(dim, 0)
+                lines.append(f"| {dim} | {val:.1f} |")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def _build_usage_table(
+    usage_base: dict[str, list[dict]],
+    usage_test: Optional[dict[str, list[dict]]] = None,
+) -> str:
+    lines = [
+        "| Dataset | Side | Input | Output | Cache write | Cache read | Cache hit rate |",
+        "|---------|------|-------|--------|-------------|------------|----------------|",
+    ]
+    sides = [("Base", usage_base)] + ([("Test", usage_test)] if usage_test else [])
+    for ds_name in usage_base:
+        for side_name, usage_by_ds in sides:
+            usages = usage_by_ds.get(ds_name)
+            if not usages:
+                continue
+            n = len(usages)
+            mean = {k: sum(u.get(k, 0) for u in usages) / n for k in USAGE_FIELDS}
+            prompt_tokens = (
+                mean["input_tokens"] + mean["cache_creation_input_tokens"] + mean["cache_read_input_tokens"]
+            )
+            hit_rate = mean["cache_read_input_tokens"] / prompt_tokens if prompt_tokens else 0.0
+            lines.append(
+                f"| {ds_name} | {side_name} | {mean['input_tokens']:.0f} | {mean['output_tokens']:.0f} "
+                f"| {mean['cache_creation_input_tokens']:.0f} | {mean['cache_read_input_tokens']:.0f} "
+                f"| {hit_rate:.0%} |"
+            )
+    return "\n".join(lines)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _build_efficiency_table(
+    stats_base: dict[str, list[dict]],
+    stats_test: Optional[dict[str, list[dict]]] = None,
+) -> str:
+    pricing = load_pricing()
+    lines = [
+        "| Dataset | Side | p50 latency | p95 latency | p95 LLM call | LLM calls/query | Retries "
+        "| Tokens/query | Cost/query | Total cost | Prefetch hits |",
+        "|---------|------|-------------|-------------|--------------|-----------------|---------"
+        "|--------------|------------|------------|---------------|",
+    ]
+    sides = [("Base", stats_base)] + ([("Test", stats_test)] if stats_test else [])
+    for ds_name in stats_base:
+        for side_name, stats_by_ds in sides:
+            # Queries from runs that predate instrumentation have no llm_calls
+            stats = [s for s in stats_by_ds.get(ds_name, []) if s["llm_calls"]]
+            if not stats:
+                continue
+            n = len(stats)
+            calls = [call for s in stats for call in s["llm_calls"]]
+            latencies = [s["wall_time_s"] for s in stats]
+            call_latencies = [call["wall_time_s"] for call in calls]
+            tokens = sum(call.get(f, 0) for call in calls for f in USAGE_FIELDS) / n
+            costs = [estimate_cost(call["model"], call, pricing) for call in calls]
+            if None in costs:
+                cost_cells = "n/a | n/a"
+            else:
+                cost_cells = f"${sum(costs) / n:.4f} | ${sum(costs):.2f}"
+            prefetched = [s["prefetch"] for s in stats if s["prefetch"] is not None]
+            prefetch_cell = f"{prefetched.count('hit')}/{len(prefetched)}" if prefetched else "-"
+            lines.append(
+                f"| {ds_name} | {side_name} | {_percentile(latencies, 50):.1f}s | {_percentile(latencies, 95):.1f}s "
+                f"| {_percentile(call_latencies, 95):.1f}s | {len(calls) / n:.1f} "
+                f"| {sum(call.get('retries', 0) for call in calls)} | {tokens:.0f} | {cost_cells} | {prefetch_cell} |"
+            )
+    return "\n".join(lines) if len(lines) > 2 else "N/A"
+
+
+def write_report(run_dir: Path, base_agent: str, test_agent: Optional[str] = None) -> Path:
+    """Fill eval_outputs/TEMPLATE.md from everything on disk in run_dir and write report.md.
+
+    Returns:
+        Path to the written report.
+    """
+    # Load all results from disk (includes both current run and previous runs)
+    all_trajectory_base = _load_trajectory_from_disk(run_dir, "base")
+    all_trajectory_test = _load_trajectory_from_disk(run_dir, "test")
+    all_onesided_base = _load_onesided_from_disk(run_dir, "base")
+    all_onesided_test = _load_onesided_from_disk(run_dir, "test")
+
+    # Build table strings and fill template
+    # Use the first trajectory result found (there should be at most one)
+    trajectory_table = "N/A"
+    if all_trajectory_base:
+        first_base_tr = next(iter(all_trajectory_base.values()))
+        first_test_tr = next(iter(all_trajectory_test.values())) if all_trajectory_test else None
+        trajectory_table = _build_trajectory_table(first_base_tr, first_test_tr)
+
+    rubric_table = "N/A"
+    if all_onesided_base:
+        rubric_table = _build_rubric_table(
+            all_onesided_base,
+            all_onesided_test if all_onesided_test else None,
+        )
+
+    usage_table = "N/A"
+    all_usage_base = _load_usage_from_disk(run_dir, "base")
+    if all_usage_base:
+        usage_table = _build_usage_table(all_usage_base, _load_usage_from_disk(run_dir, "test") or None)
+
+    efficiency_table = "N/A"
+    all_stats_base = _load_query_stats_from_disk(run_dir, "base")
+    if all_stats_base:
+        efficiency_table = _build_efficiency_table(
+            all_stats_base, _load_query_stats_from_disk(run_dir, "test") or None
+        )
+
+    report = _load_template().format(
+        timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        base_agent=base_agent,
+        test_agent_line=f"**Test agent:** `{test_agent}`" if test_agent else "",
+        trajectory_table=trajectory_table,
+        rubric_table=rubric_table,
+        usage_table=usage_table,
+        efficiency_table=efficiency_table,
+    )
+
+    report_path = run_dir / "report.md"
+    report_path.write_text(report)
+    return report_path
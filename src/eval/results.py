@@ -0,0 +1,40 @@
+"""Judge result types shared by the raters, the runner and the report.
+
+Plain data with no SDK imports, so reports can be rebuilt from a run folder cheaply.
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TrajectoryItem:
+    query: str
+    expected: bool
+    actual: bool
+    correct: bool
+
+
+@dataclass
+class TrajectoryResult:
+    items: list[TrajectoryItem] = field(default_factory=list)
+    accuracy: float = 0.0
+    precision: float = 0.0
+    recall: float = 0.0
+    f1: float = 0.0
+
+
+@dataclass
+class OnesidedItem:
+    query: str
+    response: str
+    scores: dict[str, int]
+    explanation: str
+    context: str
+
+
+@dataclass
+class OnesidedResult:
+    dataset_name: str
+    dimensions: list[str] = field(default_factory=list)
+    items: list[OnesidedItem] = field(default_factory=list)
+    mean_scores: dict[str, float] = field(default_factory=dict)
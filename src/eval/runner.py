@@ -1,18 +1,38 @@
 """Eval runner: orchestrates agent runs, rater dispatch, and report generation."""
 
+import asyncio
 import json
+import sqlite3
 import sys
+import threading
 import yaml
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from src.agent import run_agent, AgentResult
-from src.config import PROJECT_ROOT, load_agent_config
-from src.eval.trajectory import evaluate_trajectory, TrajectoryItem, TrajectoryResult
-from src.eval.onesided import evaluate_onesided, OnesidedItem, OnesidedResult, MAX_EVAL_CONCURRENCY
+import anthropic
+
+from src.agent import arun_agent, AgentResult
+from src.cache import get_tool_cache
+from src.config import PROJECT_ROOT
+from src.eval.journal import RunJournal, Unit, agent_result_from_dict, agent_result_to_dict
+from src.eval.report import write_report
+from src.eval.transcripts import (
+    SUFFIX as TRANSCRIPT_SUFFIX,
+    iter_transcripts,
+    record_to_agent_result,
+    transcript_record,
+    write_transcripts,
+)
+from src.eval.warehouse import EVAL_OUTPUTS_DIR, Warehouse, read_manifest, write_manifest
+from src.eval.trajectory import evaluate_trajectory, TrajectoryResult
+from src.eval.onesided import ajudge_batch, ajudge_item, ajudge_packed, summarize_onesided, OnesidedItem, OnesidedResult
+from src.mediawiki import aclose_async_mediawiki_client
+from src.registry import get_config_registry
+from src.scheduler import RateLimitScheduler, get_scheduler, set_scheduler
+
+SCHEDULER_STATS_INTERVAL = 30.0
 
 
 def _load_eval_config() -> dict:
@@ -27,54 +47,264 @@ def _load_judge_prompts() -> dict[str, str]:
         return yaml.safe_load(f) or {}
 
 
-def _load_template() -> str:
-    path = PROJECT_ROOT / "eval_outputs" / "TEMPLATE.md"
-    with open(path) as f:
-        return f.read()
-
-
 def _load_dataset(path_str: str) -> list[dict]:
     path = PROJECT_ROOT / path_str
     with open(path) as f:
         return yaml.safe_load(f) or []
 
 
-def _run_agent_on_dataset(
-    dataset: list[dict],
-    agent_config_name: str,
-    verbose: bool = False,
-) -> list[tuple[dict, AgentResult]]:
-    """Run the agent on every item in a dataset concurrently."""
-    config = load_agent_config(agent_config_name)
+# Values of judge_mode in configs/evals.yaml; pack_size turns 'inline' into packed judging
+JUDGE_MODES = ("inline", "batch")
 
-    def _run_one(idx: int, item: dict) -> tuple[int, dict, AgentResult]:
-        if verbose:
-            print(
-                f"  [{idx + 1}/{len(dataset)}] {item['query'][:60]}...",
-                file=sys.stderr,
+
+def _judge_mode(ds_config: dict) -> str:
+    """How a onesided dataset's items are judged.
+
+    'inline' (the judge_mode default): one call per item as it finishes, or
+    'packed' when pack_size is above 1: pack_size items per call as packs
+    fill up. 'batch': one Message Batch per side.
+    """
+    if ds_config.get("judge_mode", "inline") == "batch":
+        return "batch"
+    return "packed" if ds_config.get("pack_size", 1) > 1 else "inline"
+
+
+async def _arun_pipeline(
+    config: dict,
+    datasets: dict[str, list[dict]],
+    sides: dict[str, str],
+    judge_prompts: dict[str, str],
+    run_dir: Path,
+    journal: RunJournal,
+    verbose: bool,
+    max_concurrency: int,
+) -> None:
+    """Run every (dataset, side, item) unit of an eval as one streaming pipeline.
+
+    All units share one pool of max_concurrency slots. A unit runs the agent
+    and, for onesided datasets, judges the result straight away, so nothing
+    waits on the slowest item of an earlier phase. Datasets with a pack_size
+    above 1 are judged pack_size items per call as packs fill up; datasets
+    with judge_mode: batch are instead judged as one Message Batch per side once
+    all of that side's agent runs are in. Each finished stage is
+    appended to the journal, and stages already in it are not run again.
+    When the last unit of a dataset-side finishes, its transcripts and judge
+    output are written.
+
+    Args:
+        config: Parsed configs/evals.yaml.
+        datasets: Loaded items per dataset name.
+        sides: Agent config name per side ('base', and 'test' if comparing).
+        judge_prompts: Parsed prompts/evals.yaml.
+        run_dir: Run directory to write outputs into.
+        journal: Checkpoint journal of the run.
+        verbose: Print per-item progress to stderr.
+        max_concurrency: Units in flight at once.
+    """
+    client = anthropic.AsyncAnthropic(max_retries=0)
+    slots = asyncio.Semaphore(max_concurrency)
+    # Pin one config snapshot for the whole run, so prompt edits mid-run don't mix versions
+    snapshot = get_config_registry().snapshot()
+    agent_configs = {side: snapshot.agent(name) for side, name in sides.items()}
+    agent_prompts = {
+        side: dict(
+            system_prompt=snapshot.system_instruction(config.system_instruction),
+            tool_descriptions=snapshot.tool_description(config.tool_description),
+        )
+        for side, config in agent_configs.items()
+    }
+
+    def _judge_kwargs(ds_config: dict) -> dict:
+        return dict(
+            dimensions=ds_config["dimensions"],
+            prompt_template=judge_prompts["onesided"],
+            client=client,
+            judge_model=ds_config.get("judge_model", "claude-haiku-4-5-20251001"),
+            judge_max_tokens=ds_config.get("judge_max_tokens", 1024),
+        )
+
+    async def _judge_one(ds_config: dict, unit: Unit, item: dict, result: AgentResult) -> OnesidedItem:
+        judged = await ajudge_item(item, result, **_judge_kwargs(ds_config))
+        journal.record(unit, "judge", asdict(judged))
+        return judged
+
+    written_transcripts: dict[tuple[str, str], list[dict]] = {}
+
+    def _recorded_result(unit: Unit) -> Optional[AgentResult]:
+        """Agent result of unit from the journal, or from the transcript line it was compacted into."""
+        recorded = journal.get(unit, "agent")
+        if recorded is None or "transcript_line" not in recorded:
+            return agent_result_from_dict(recorded) if recorded is not None else None
+        key = (unit.dataset, unit.side)
+        if key not in written_transcripts:
+            path = run_dir / f"transcripts_{unit.side}" / f"{unit.dataset}{TRANSCRIPT_SUFFIX}"
+            written_transcripts[key] = list(iter_transcripts(path)) if path.exists() else []
+        records = written_transcripts[key]
+        line = recorded["transcript_line"]
+        if line < len(records) and records[line]["query"] == unit.query:
+            return record_to_agent_result(records[line])
+        return None
+
+    async def _run_unit(
+        ds_config: dict, unit: Unit, item: dict
+    ) -> tuple[dict, AgentResult, Optional[OnesidedItem]]:
+        # Packed and batch judging happen in _run_dataset_side
+        needs_judge = ds_config["rater"] == "onesided" and _judge_mode(ds_config) == "inline"
+        result = _recorded_result(unit)
+        judged_record = journal.get(unit, "judge")
+        judged = OnesidedItem(**judged_record) if judged_record else None
+        if result is not None and (not needs_judge or judged is not None):
+            return item, result, judged
+        async with slots:
+            if result is None:
+                result = await arun_agent(
+                    query=item["query"],
+                    agent_config=agent_configs[unit.side],
+                    client=client,
+                    **agent_prompts[unit.side],
+                )
+                journal.record(unit, "agent", agent_result_to_dict(result))
+            if needs_judge:
+                judged = await _judge_one(ds_config, unit, item, result)
+        return item, result, judged
+
+    async def _judge_batch(
+        ds_config: dict, pending: dict[Unit, tuple[dict, AgentResult]]
+    ) -> dict[Unit, OnesidedItem]:
+        """Judge pending units as Message Batches, re-judging failures individually.
+
+        Units whose batch id is already in the journal wait on that batch
+        rather than being submitted again.
+        """
+        groups: dict[Optional[str], dict[str, Unit]] = {}
+        for unit in pending:
+            recorded = journal.get(unit, "batch")
+            groups.setdefault(recorded["batch_id"] if recorded else None, {})[f"item-{unit.index}"] = unit
+
+        async def _run_group(batch_id: Optional[str], units: dict[str, Unit]) -> dict[Unit, OnesidedItem]:
+            def _checkpoint(new_batch_id: str) -> None:
+                for unit in units.values():
+                    journal.record(unit, "batch", {"batch_id": new_batch_id})
+
+            done, failures = await ajudge_batch(
+                {custom_id: pending[unit] for custom_id, unit in units.items()},
+                batch_id=batch_id,
+                on_submitted=_checkpoint,
+                verbose=verbose,
+                **_judge_kwargs(ds_config),
             )
-        result = run_agent(query=item["query"], agent_config=config)
-        return idx, item, result
+            judged = {}
+            for custom_id, item in done.items():
+                journal.record(units[custom_id], "judge", asdict(item))
+                judged[units[custom_id]] = item
 
-    results = [None] * len(dataset)
-    with ThreadPoolExecutor(max_workers=MAX_EVAL_CONCURRENCY) as executor:
-        futures = {executor.submit(_run_one, i, item): i for i, item in enumerate(dataset)}
-        for future in as_completed(futures):
-            idx, item, result = future.result()
-            results[idx] = (item, result)
+            async def _fallback(unit: Unit) -> None:
+                async with slots:
+                    judged[unit] = await _judge_one(ds_config, unit, *pending[unit])
 
-    return results
+            for custom_id, reason in failures.items():
+                unit = units[custom_id]
+                if verbose:
+                    print(
+                        f"  [{unit.dataset}/{unit.side}] batch judging of item {unit.index} failed ({reason}); "
+                        "judging individually",
+                        file=sys.stderr,
+                    )
+            await asyncio.gather(*(_fallback(units[custom_id]) for custom_id in failures))
+            return judged
+
+        judged: dict[Unit, OnesidedItem] = {}
+        for group in await asyncio.gather(*(_run_group(b, u) for b, u in groups.items())):
+            judged.update(group)
+        return judged
+
+    async def _judge_pack(ds_config: dict, pack: dict[Unit, tuple[dict, AgentResult]]) -> dict[Unit, OnesidedItem]:
+        """Judge a pack of units in one call, re-judging entries that fail validation individually."""
+        units = list(pack)
+        async with slots:
+            done, failures = await ajudge_packed(
+                [pack[unit] for unit in units],
+                **{**_judge_kwargs(ds_config), "prompt_template": judge_prompts["onesided_packed"]},
+            )
+        judged = {}
+        for i, item in done.items():
+            journal.record(units[i], "judge", asdict(item))
+            judged[units[i]] = item
 
+        async def _fallback(unit: Unit) -> None:
+            async with slots:
+                judged[unit] = await _judge_one(ds_config, unit, *pack[unit])
 
-def _serialize_messages(messages: list) -> list:
-    """Convert message list to JSON-safe format."""
-    serialized = []
-    for msg in messages:
-        if isinstance(msg, dict):
-            serialized.append(msg)
+        for i, reason in failures.items():
+            if verbose:
+                print(
+                    f"  [{units[i].dataset}/{units[i].side}] packed judging of item {units[i].index} failed "
+                    f"({reason[:100]}); judging individually",
+                    file=sys.stderr,
+                )
+        await asyncio.gather(*(_fallback(units[i]) for i in failures))
+        return judged
+
+    async def _run_dataset_side(ds_name: str, side: str) -> None:
+        ds_config = config[ds_name]
+        dataset = datasets[ds_name]
+        packing = ds_config["rater"] == "onesided" and _judge_mode(ds_config) == "packed"
+        pack: dict[Unit, tuple[dict, AgentResult]] = {}
+        pack_tasks: list[asyncio.Task] = []
+        done = 0
+
+        async def _tracked(unit: Unit, item: dict) -> tuple[dict, AgentResult, Optional[OnesidedItem]]:
+            nonlocal done
+            outcome = await _run_unit(ds_config, unit, item)
+            done += 1
+            if verbose:
+                print(f"  [{ds_name}/{side} {done}/{len(dataset)}] {item['query'][:60]}...", file=sys.stderr)
+            if packing and outcome[2] is None:
+                # Judge a pack as soon as it fills up rather than after the whole dataset
+                pack[unit] = outcome[:2]
+                if len(pack) >= ds_config["pack_size"]:
+                    pack_tasks.append(asyncio.create_task(_judge_pack(ds_config, dict(pack))))
+                    pack.clear()
+            return outcome
+
+        units = [
+            Unit(dataset=ds_name, side=side, agent=sides[side], index=i, query=item["query"])
+            for i, item in enumerate(dataset)
+        ]
+        outcomes = await asyncio.gather(*(_tracked(unit, item) for unit, item in zip(units, dataset, strict=True)))
+        agent_results = [(item, result) for item, result, _ in outcomes]
+        _dump_transcripts(run_dir, side, ds_name, agent_results)
+        # The transcripts now hold the full results; keep only a pointer to each line
+        journal.compact("agent", {unit: {"transcript_line": i} for i, unit in enumerate(units)})
+        written_transcripts.pop((ds_name, side), None)
+        if ds_config["rater"] == "trajectory":
+            _dump_trajectory_judge(run_dir, ds_name, side, evaluate_trajectory(agent_results))
         else:
-            serialized.append(str(msg))
-    return serialized
+            judged = [judged for _, _, judged in outcomes]
+            pending = {
+                unit: (item, result)
+                for unit, (item, result, item_judged) in zip(units, outcomes, strict=True)
+                if item_judged is None
+            }
+            if pending:
+                if packing:
+                    if pack:
+                        pack_tasks.append(asyncio.create_task(_judge_pack(ds_config, dict(pack))))
+                    late_judged = {}
+                    for pack_judged in await asyncio.gather(*pack_tasks):
+                        late_judged.update(pack_judged)
+                else:
+                    late_judged = await _judge_batch(ds_config, pending)
+                judged = [item_judged or late_judged[unit] for unit, item_judged in zip(units, judged, strict=True)]
+            _dump_onesided_judge(run_dir, ds_name, side, summarize_onesided(ds_name, ds_config["dimensions"], judged))
+        if verbose:
+            print(f"Finished {ds_name} ({side})", file=sys.stderr)
+
+    try:
+        await asyncio.gather(*(_run_dataset_side(ds_name, side) for ds_name in config for side in sides))
+    finally:
+        await client.close()
+        await aclose_async_mediawiki_client()
 
 
 def _dump_transcripts(
@@ -83,23 +313,15 @@ def _dump_transcripts(
     dataset_name: str,
     agent_results: list[tuple[dict, AgentResult]],
 ) -> None:
-    """Dump all agent transcripts for a dataset into a single JSON file."""
+    """Stream all agent transcripts for a dataset into one compressed JSONL file."""
     transcript_dir = run_dir / f"transcripts_{side}"
     transcript_dir.mkdir(exist_ok=True)
-    records = []
-    for dataset_item, result in agent_results:
-        records.append(
-            {
-                "query": dataset_item["query"],
-                "dataset_item": dataset_item,
-                "final_text": result.final_text,
-                "turn_count": result.turn_count,
-                "tool_calls_made": result.tool_calls_made,
-                "messages": _serialize_messages(result.messages),
-            }
-        )
-    path = transcript_dir / f"{dataset_name}.json"
-    path.write_text(json.dumps(records, indent=2, default=str))
+    write_transcripts(
+        transcript_dir / f"{dataset_name}{TRANSCRIPT_SUFFIX}",
+        (transcript_record(dataset_item, result) for dataset_item, result in agent_results),
+    )
+    # A resumed pre-JSONL run would otherwise keep a stale copy
+    (transcript_dir / f"{dataset_name}.json").unlink(missing_ok=True)
 
 
 def _dump_trajectory_judge(
@@ -159,119 +381,11 @@ def _dump_onesided_judge(
     path.write_text(json.dumps(output, indent=2, default=str))
 
 
-def _load_trajectory_from_disk(run_dir: Path, side: str) -> dict[str, TrajectoryResult]:
-    """Load all trajectory judge outputs for a side from disk."""
-    judge_dir = run_dir / "judge_outputs"
-    results = {}
-    if not judge_dir.exists():
-        return results
-    for path in judge_dir.glob(f"*_{side}.json"):
-        data = json.loads(path.read_text())
-        if "metrics" not in data:
-            continue
-        ds_name = data["dataset"]
-        items = [TrajectoryItem(**item) for item in data["items"]]
-        results[ds_name] = TrajectoryResult(
-            items=items,
-            accuracy=data["metrics"]["accuracy"],
-            precision=data["metrics"]["precision"],
-            recall=data["metrics"]["recall"],
-            f1=data["metrics"]["f1"],
-        )
-    return results
-
-
-def _load_onesided_from_disk(run_dir: Path, side: str) -> dict[str, OnesidedResult]:
-    """Load all onesided judge outputs for a side from disk."""
-    judge_dir = run_dir / "judge_outputs"
-    results = {}
-    if not judge_dir.exists():
-        return results
-    for path in judge_dir.glob(f"*_{side}.json"):
-        data = json.loads(path.read_text())
-        if "dimensions" not in data:
-            continue
-        ds_name = data["dataset"]
-        items = [
-            OnesidedItem(
-                query=item["query"],
-                response="",
-                scores=item["scores"],
-                explanation=item.get("explanation", ""),
-                context="",
-            )
-            for item in data["items"]
-        ]
-        results[ds_name] = OnesidedResult(
-            dataset_name=ds_name,
-            dimensions=data["dimensions"],
-            items=items,
-            mean_scores=data["mean_scores"],
-        )
-    return results
-
-
-def _build_trajectory_table(
-    base_tr: TrajectoryResult,
-    test_tr: Optional[TrajectoryResult] = None,
-) -> str:
-    n = len(base_tr.items)
-    if test_tr:
-
-        def _diff_pct(t, b):
-            d = t - b
-            return f"+{d:.0%}" if d >= 0 else f"{d:.0%}"
-
-        lines = [
-            f"n={n}",
-            "",
-            "| Metric | Base | Test | Diff |",
-            "|--------|------|------|------|",
-            f"| Accuracy  | {base_tr.accuracy:.0%} | {test_tr.accuracy:.0%} | {_diff_pct(test_tr.accuracy, base_tr.accuracy)} |",
-            f"| Precision | {base_tr.precision:.0%} | {test_tr.precision:.0%} | {_diff_pct(test_tr.precision, base_tr.precision)} |",
-            f"| Recall    | {base_tr.recall:.0%} | {test_tr.recall:.0%} | {_diff_pct(test_tr.recall, base_tr.recall)} |",
-            f"| F1        | {base_tr.f1:.0%} | {test_tr.f1:.0%} | {_diff_pct(test_tr.f1, base_tr.f1)} |",
-        ]
-    else:
-        lines = [
-            f"n={n}",
-            "",
-            "| Metric    | Value  |",
-            "|-----------|--------|",
-            f"| Accuracy  | {base_tr.accuracy:.0%} |",
-            f"| Precision | {base_tr.precision:.0%} |",
-            f"| Recall    | {base_tr.recall:.0%} |",
-            f"| F1        | {base_tr.f1:.0%} |",
-        ]
-    return "\n".join(lines)
-
-
-def _build_rubric_table(
-    onesided_base: dict[str, OnesidedResult],
-    onesided_test: Optional[dict[str, OnesidedResult]] = None,
-) -> str:
-    sections = []
-    for ds_name, base_osr in onesided_base.items():
-        test_osr = onesided_test.get(ds_name) if onesided_test else None
-        n = len(base_osr.items)
-        lines = [f"### {ds_name}", "", f"n={n}", ""]
-        if test_osr:
-            lines.append("| Dimension | Base | Test | Diff |")
-            lines.append("|-----------|------|------|------|")
-            for dim in base_osr.dimensions:
-                base_val = base_osr.mean_scores.get(dim, 0)
-                test_val = test_osr.mean_scores.get(dim, 0)
-                diff = test_val - base_val
-                diff_str = f"+{diff:.1f}" if diff >= 0 else f"{diff:.1f}"
-                lines.append(f"| {dim} | {base_val:.1f} | {test_val:.1f} | {diff_str} |")
-        else:
-            lines.append("| Dimension | Mean |")
-            lines.append("|-----------|------|")
-            for dim in base_osr.dimensions:
-                val = base_osr.mean_scores.get(dim, 0)
-                lines.append(f"| {dim} | {val:.1f} |")
-        sections.append("\n".join(lines))
-    return "\n\n".join(sections)
+def _print_scheduler_stats(scheduler: RateLimitScheduler, stop: threading.Event) -> None:
+    while not stop.wait(SCHEDULER_STATS_INTERVAL):
+        stats = scheduler.format_stats()
+        if stats:
+            print(stats, file=sys.stderr)
 
 
 def run_eval(
@@ -279,134 +393,123 @@ def run_eval(
     test_agent: Optional[str] = None,
     verbose: bool = False,
     run_id: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    output_root: Optional[Path] = None,
+    scheduler: Optional[RateLimitScheduler] = None,
 ) -> Path:
     """Run all evals defined in configs/evals.yaml.
 
+    Every dataset and side runs through one streaming pipeline: each item is
+    judged as soon as its agent run finishes. Agent and judge calls share one
+    RateLimitScheduler built from configs/rate_limits.yaml, which paces them
+    against per-model budgets.
+
     Args:
         base_agent: Agent config name for the base side.
         test_agent: Agent config name for the test side (optional).
-        verbose: Print progress to stderr.
-        run_id: Existing run folder name to resume (e.g. '2026-02-22_14-30-00').
+        verbose: Print progress (and periodic scheduler stats) to stderr.
+        run_id: Existing run folder name to resume (e.g. '2026-02-22_14-30-00'). Agent runs
+            and judge calls already in its journal are not repeated.
+        max_concurrency: Cap on concurrent API calls per model and on items in flight.
+            Defaults to the config's max.
+        output_root: Directory to create run folders in. Defaults to eval_outputs/;
+            runs elsewhere are not ingested into the results warehouse.
+        scheduler: Scheduler to use instead of one built from configs/rate_limits.yaml.
 
     Returns:
         Path to the generated run directory.
     """
+    previous = get_scheduler()
+    if scheduler is None:
+        scheduler = RateLimitScheduler.from_config(max_concurrency=max_concurrency)
+    set_scheduler(scheduler)
+    stop_stats = threading.Event()
+    if verbose:
+        threading.Thread(target=_print_scheduler_stats, args=(scheduler, stop_stats), daemon=True).start()
+    try:
+        return _run_eval(
+            base_agent, test_agent, verbose, run_id, scheduler.max_concurrency, output_root or EVAL_OUTPUTS_DIR
+        )
+    finally:
+        stop_stats.set()
+        set_scheduler(previous)
+        if verbose:
+            print(scheduler.format_stats(), file=sys.stderr)
+
+
+def _run_eval(
+    base_agent: str,
+    test_agent: Optional[str],
+    verbose: bool,
+    run_id: Optional[str],
+    max_concurrency: int,
+    output_root: Path,
+) -> Path:
     config = _load_eval_config()
     judge_prompts = _load_judge_prompts()
-    template = _load_template()
     has_test = test_agent is not None
 
     # Create or reuse run directory
     if run_id:
-        run_dir = PROJECT_ROOT / "eval_outputs" / run_id
+        run_dir = output_root / run_id
         if not run_dir.exists():
             raise FileNotFoundError(f"Run directory not found: {run_dir}")
         if verbose:
             print(f"Resuming run: {run_dir}", file=sys.stderr)
     else:
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        run_dir = PROJECT_ROOT / "eval_outputs" / timestamp
+        run_dir = output_root / timestamp
     run_dir.mkdir(parents=True, exist_ok=True)
-
-    base_trajectory: Optional[TrajectoryResult] = None
-    test_trajectory: Optional[TrajectoryResult] = None
-    onesided_base: dict[str, OnesidedResult] = {}
-    onesided_test: dict[str, OnesidedResult] = {}
+    manifest = read_manifest(run_dir)
+    started_at = manifest.get("started_at") if manifest else None
+    write_manifest(
+        run_dir, base_agent, test_agent, datetime.fromisoformat(started_at) if started_at else datetime.now()
+    )
 
     for ds_name, ds_config in config.items():
-        dataset = _load_dataset(ds_config["path"])
-        rater = ds_config["rater"]
-
-        if verbose:
-            print(f"\n=== Dataset: {ds_name} (rater: {rater}) ===", file=sys.stderr)
-
-        # Run base agent
-        if verbose:
-            print(f"Running base agent '{base_agent}' on {ds_name}...", file=sys.stderr)
-        results_base = _run_agent_on_dataset(dataset, base_agent, verbose=verbose)
-        _dump_transcripts(run_dir, "base", ds_name, results_base)
-
-        # Run test agent if provided
-        results_test = None
-        if has_test:
-            if verbose:
-                print(f"Running test agent '{test_agent}' on {ds_name}...", file=sys.stderr)
-            results_test = _run_agent_on_dataset(dataset, test_agent, verbose=verbose)
-            _dump_transcripts(run_dir, "test", ds_name, results_test)
-
-        if rater == "trajectory":
-            base_trajectory = evaluate_trajectory(results_base)
-            _dump_trajectory_judge(run_dir, ds_name, "base", base_trajectory)
-            if has_test and results_test:
-                test_trajectory = evaluate_trajectory(results_test)
-                _dump_trajectory_judge(run_dir, ds_name, "test", test_trajectory)
-
-        elif rater == "onesided":
-            judge_model = ds_config.get("judge_model", "claude-haiku-4-5-20251001")
-            judge_max_tokens = ds_config.get("judge_max_tokens", 1024)
-            dimensions = ds_config["dimensions"]
-
-            if verbose:
-                print(f"Judging base results for {ds_name}...", file=sys.stderr)
-            onesided_base[ds_name] = evaluate_onesided(
-                dataset_name=ds_name,
-                agent_results=results_base,
-                dimensions=dimensions,
-                prompt_template=judge_prompts["onesided"],
-                judge_model=judge_model,
-                judge_max_tokens=judge_max_tokens,
-            )
-            _dump_onesided_judge(run_dir, ds_name, "base", onesided_base[ds_name])
-
-            if has_test and results_test:
-                if verbose:
-                    print(f"Judging test results for {ds_name}...", file=sys.stderr)
-                onesided_test[ds_name] = evaluate_onesided(
-                    dataset_name=ds_name,
-                    agent_results=results_test,
-                    dimensions=dimensions,
-                    prompt_template=judge_prompts["onesided"],
-                    judge_model=judge_model,
-                    judge_max_tokens=judge_max_tokens,
-                )
-                _dump_onesided_judge(run_dir, ds_name, "test", onesided_test[ds_name])
-
-        else:
-            raise ValueError(f"Unknown rater type: {rater}")
-
-    # Load all results from disk (includes both current run and previous runs)
-    all_trajectory_base = _load_trajectory_from_disk(run_dir, "base")
-    all_trajectory_test = _load_trajectory_from_disk(run_dir, "test")
-    all_onesided_base = _load_onesided_from_disk(run_dir, "base")
-    all_onesided_test = _load_onesided_from_disk(run_dir, "test")
-
-    # Build table strings and fill template
-    # Use the first trajectory result found (there should be at most one)
-    trajectory_table = "N/A"
-    if all_trajectory_base:
-        first_base_tr = next(iter(all_trajectory_base.values()))
-        first_test_tr = next(iter(all_trajectory_test.values())) if all_trajectory_test else None
-        trajectory_table = _build_trajectory_table(first_base_tr, first_test_tr)
-
-    rubric_table = "N/A"
-    if all_onesided_base:
-        rubric_table = _build_rubric_table(
-            all_onesided_base,
-            all_onesided_test if all_onesided_test else None,
+        if ds_config["rater"] not in ("trajectory", "onesided"):
+            raise ValueError(f"Unknown rater type: {ds_config['rater']}")
+        if ds_config.get("judge_mode", "inline") not in JUDGE_MODES:
+            raise ValueError(f"Unknown judge_mode for {ds_name}: {ds_config['judge_mode']}")
+        if not isinstance(ds_config.get("pack_size", 1), int) or ds_config.get("pack_size", 1) < 1:
+            raise ValueError(f"pack_size for {ds_name} must be a positive integer")
+    datasets = {ds_name: _load_dataset(ds_config["path"]) for ds_name, ds_config in config.items()}
+    sides = {"base": base_agent, **({"test": test_agent} if has_test else {})}
+
+    journal = RunJournal(run_dir)
+    if verbose:
+        total = sum(len(d) for d in datasets.values()) * len(sides)
+        print(f"Running {total} items across {len(datasets)} datasets ({', '.join(sides.values())})...", file=sys.stderr)
+        if len(journal):
+            print(f"Reusing {len(journal)} completed stages from {journal.path.name}", file=sys.stderr)
+    try:
+        asyncio.run(
+            _arun_pipeline(config, datasets, sides, judge_prompts, run_dir, journal, verbose, max_concurrency)
         )
+    finally:
+        journal.close()
 
-    report = template.format(
-        timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        base_agent=base_agent,
-        test_agent_line=f"**Test agent:** `{test_agent}`" if has_test else "",
-        trajectory_table=trajectory_table,
-        rubric_table=rubric_table,
-    )
+    report_path = write_report(run_dir, base_agent, test_agent)
 
-    report_path = run_dir / "report.md"
-    report_path.write_text(report)
+    if output_root == EVAL_OUTPUTS_DIR:
+        try:
+            warehouse = Warehouse()
+            try:
+                warehouse.ingest_run(run_dir)
+            finally:
+                warehouse.close()
+        except sqlite3.Error as e:
+            print(f"Could not ingest run into the results warehouse: {e}", file=sys.stderr)
 
     if verbose:
         print(f"\nReport written to: {report_path}", file=sys.stderr)
+        cache = get_tool_cache()
+        if cache is not None:
+            stats = cache.stats
+            print(
+                f"Tool cache: {stats.hits} hits ({stats.memory_hits} memory, {stats.disk_hits} disk), "
+                f"{stats.misses} misses, {stats.coalesced} coalesced",
+                file=sys.stderr,
+            )
 
     return run_dir
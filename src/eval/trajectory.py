@@ -1,25 +1,7 @@
 """Trajectory autorater for tool-triggering evaluation."""
 
-from dataclasses import dataclass, field
-
 from src.agent import AgentResult
-
-
-@dataclass
-class TrajectoryItem:
-    query: str
-    expected: bool
-    actual: bool
-    correct: bool
-
-
-@dataclass
-class TrajectoryResult:
-    items: list[TrajectoryItem] = field(default_factory=list)
-    accuracy: float = 0.0
-    precision: float = 0.0
-    recall: float = 0.0
-    f1: float = 0.0
+from src.eval.results import TrajectoryItem, TrajectoryResult
 
 
 def evaluate_trajectory(
@@ -0,0 +1,96 @@
+"""Transcript storage: one gzipped JSONL file per dataset-side, one record per query.
+
+Content blocks are stored structurally (as the API would accept them), so a
+record's messages can be sent back to messages.create or loaded into an
+AgentResult. Runs from before this format (indented .json files) can still
+be read.
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+if TYPE_CHECKING:
+    # Importing src.agent loads the SDK; reading and writing transcripts doesn't need it
+    from src.agent import AgentResult
+
+SUFFIX = ".jsonl.gz"
+LEGACY_SUFFIX = ".json"
+
+
+def _to_json(obj: Any) -> Any:
+    """json.dumps default hook: SDK models become API-shaped dicts."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    return str(obj)
+
+
+def transcript_record(dataset_item: dict, result: "AgentResult") -> dict:
+    return {
+        "query": dataset_item["query"],
+        "dataset_item": dataset_item,
+        "final_text": result.final_text,
+        "turn_count": result.turn_count,
+        "tool_calls_made": result.tool_calls_made,
+        "usage": result.usage,
+        "wall_time_s": result.wall_time_s,
+        "llm_calls": result.llm_calls,
+        "prefetch": result.prefetch,
+        "messages": result.messages,
+    }
+
+
+def record_to_agent_result(record: dict) -> "AgentResult":
+    from src.agent import AgentResult
+
+    return AgentResult(
+        final_text=record["final_text"],
+        messages=record["messages"],
+        turn_count=record["turn_count"],
+        tool_calls_made=record["tool_calls_made"],
+        usage=record.get("usage", {}),
+        llm_calls=record.get("llm_calls", []),
+        wall_time_s=record.get("wall_time_s", 0.0),
+        prefetch=record.get("prefetch"),
+    )
+
+
+def write_transcripts(path: Path, records: Iterable[dict]) -> None:
+    """Stream records to path, one compact JSON line each.
+
+    Written to a temporary file first, so readers never see a partial file.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":"), default=_to_json))
+            f.write("\n")
+    os.replace(tmp, path)
+
+
+def iter_transcripts(path: Path) -> Iterator[dict]:
+    """Lazily yield the records of a transcript file in either format."""
+    if path.name.endswith(SUFFIX):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from json.loads(path.read_text())
+
+
+def transcript_files(transcript_dir: Path) -> dict[str, Path]:
+    """Transcript file per dataset name in a transcripts_<side> directory.
+
+    Where a dataset has both formats, the compressed JSONL file wins.
+    """
+    files: dict[str, Path] = {}
+    if not transcript_dir.exists():
+        return files
+    for path in sorted(transcript_dir.glob(f"*{LEGACY_SUFFIX}")):
+        files[path.name[: -len(LEGACY_SUFFIX)]] = path
+    for path in sorted(transcript_dir.glob(f"*{SUFFIX}")):
+        files[path.name[: -len(SUFFIX)]] = path
+    return dict(sorted(files.items()))
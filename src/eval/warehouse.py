@@ -0,0 +1,260 @@
+"""SQLite warehouse of eval results across runs.
+
+Ingests every run under eval_outputs/ into one indexed database: a row per
+run, per (run, side, dataset, item) with turns, tool calls, tokens and wall
+time, and per (item, dimension) score. Trajectory items are stored as the
+0/1 dimension 'tool_triggering'. The database is derived data and can be
+rebuilt from the run folders at any time.
+"""
+
+import json
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.config import PROJECT_ROOT
+from src.eval.transcripts import iter_transcripts, transcript_files
+
+DEFAULT_WAREHOUSE_PATH = PROJECT_ROOT / ".cache" / "eval_warehouse.sqlite"
+EVAL_OUTPUTS_DIR = PROJECT_ROOT / "eval_outputs"
+MANIFEST_FILENAME = "run.json"
+RUN_ID_FORMAT = "%Y-%m-%d_%H-%M-%S"
+TRAJECTORY_DIMENSION = "tool_triggering"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    base_agent TEXT,
+    test_agent TEXT,
+    fingerprint REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id TEXT,
+    side TEXT,
+    agent TEXT,
+    dataset TEXT,
+    idx INTEGER,
+    query TEXT,
+    turn_count INTEGER,
+    tool_calls INTEGER,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    wall_time_s REAL,
+    PRIMARY KEY (run_id, side, dataset, idx)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    run_id TEXT,
+    side TEXT,
+    agent TEXT,
+    dataset TEXT,
+    idx INTEGER,
+    query TEXT,
+    dimension TEXT,
+    score REAL,
+    PRIMARY KEY (run_id, side, dataset, idx, dimension)
+);
+CREATE INDEX IF NOT EXISTS scores_by_agent ON scores (agent, dimension, dataset);
+CREATE INDEX IF NOT EXISTS scores_by_query ON scores (dataset, query, dimension);
+CREATE INDEX IF NOT EXISTS items_by_agent ON items (agent, dataset);
+"""
+
+
+def write_manifest(run_dir: Path, base_agent: str, test_agent: Optional[str], started_at: datetime) -> None:
+    """Record which agents a run compared, for ingestion."""
+    manifest = {
+        "run_id": run_dir.name,
+        "base_agent": base_agent,
+        "test_agent": test_agent,
+        "started_at": started_at.isoformat(timespec="seconds"),
+    }
+    (run_dir / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2))
+
+
+def read_manifest(run_dir: Path) -> Optional[dict]:
+    """run.json, or one reconstructed from report.md for runs that predate it."""
+    path = run_dir / MANIFEST_FILENAME
+    if path.exists():
+        return json.loads(path.read_text())
+    report = run_dir / "report.md"
+    if not report.exists():
+        return None
+    text = report.read_text()
+    base = re.search(r"\*\*Base agent:\*\* `([^`]+)`", text)
+    test = re.search(r"\*\*Test agent:\*\* `([^`]+)`", text)
+    try:
+        started_at = datetime.strptime(run_dir.name, RUN_ID_FORMAT).isoformat(timespec="seconds")
+    except ValueError:
+        started_at = None
+    return {
+        "run_id": run_dir.name,
+        "base_agent": base.group(1) if base else None,
+        "test_agent": test.group(1) if test else None,
+        "started_at": started_at,
+    }
+
+
+def _fingerprint(run_dir: Path) -> float:
+    """Latest modification time of any file in the run, to skip unchanged runs."""
+    return max((p.stat().st_mtime for p in run_dir.rglob("*") if p.is_file()), default=0.0)
+
+
+class Warehouse:
+    """Indexed store of eval results.
+
+    Args:
+        path: SQLite database file. Created on first use.
+    """
+
+    def __init__(self, path: Path = DEFAULT_WAREHOUSE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def ingest_run(self, run_dir: Path, force: bool = False) -> bool:
+        """Load one run folder, replacing any earlier copy of it.
+
+        Returns False if the run was skipped: unchanged since last ingest
+        (unless force), or not a run folder.
+        """
+        manifest = read_manifest(run_dir)
+        if manifest is None:
+            return False
+        fingerprint = _fingerprint(run_dir)
+        row = self.conn.execute("SELECT fingerprint FROM runs WHERE run_id = ?", (run_dir.name,)).fetchone()
+        if row is not None and row[0] == fingerprint and not force:
+            return False
+
+        agents = {"base": manifest.get("base_agent"), "test": manifest.get("test_agent")}
+        run_id = run_dir.name
+        items, scores = [], []
+        for side, agent in agents.items():
+            if agent is None:
+                continue
+            for dataset, path in transcript_files(run_dir / f"transcripts_{side}").items():
+                for idx, record in enumerate(iter_transcripts(path)):
+                    usage = record.get("usage") or {}
+                    items.append((
+                        run_id, side, agent, dataset, idx, record["query"],
+                        record.get("turn_count"), len(record.get("tool_calls_made", [])),
+                        usage.get("input_tokens"), usage.get("output_tokens"), record.get("wall_time_s"),
+                    ))
+            for path in (run_dir / "judge_outputs").glob(f"*_{side}.json"):
+                data = json.loads(path.read_text())
+                for idx, item in enumerate(data["items"]):
+                    key = (run_id, side, agent, data["dataset"], idx, item["query"])
+                    if "metrics" in data:
+                        scores.append((*key, TRAJECTORY_DIMENSION, float(item["correct"])))
+                    else:
+                        scores.extend((*key, dim, float(score)) for dim, score in item["scores"].items())
+
+        with self.conn:
+            for table in ("runs", "items", "scores"):
+                self.conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?)",
+                (run_id, manifest.get("started_at"), agents["base"], agents["test"], fingerprint),
+            )
+            self.conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", items)
+            self.conn.executemany("INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)", scores)
+        return True
+
+    def ingest_all(self, root: Path = EVAL_OUTPUTS_DIR, force: bool = False) -> int:
+        """Ingest every new or changed run folder under root. Returns how many were loaded."""
+        return sum(self.ingest_run(run_dir, force=force) for run_dir in sorted(root.iterdir()) if run_dir.is_dir())
+
+    def query(self, sql: str, params: tuple = ()) -> tuple[list[str], list[tuple]]:
+        """Run SQL and return (column names, rows)."""
+        cursor = self.conn.execute(sql, params)
+        return [d[0] for d in cursor.description or []], cursor.fetchall()
+
+    def agent_scores(
+        self,
+        agent: str,
+        dimension: Optional[str] = None,
+        dataset: Optional[str] = None,
+        last: int = 10,
+    ) -> tuple[list[str], list[tuple]]:
+        """Mean score per run and dimension for an agent over its last runs, newest first."""
+        filters, params = ["s.agent = ?"], [agent]
+        if dimension:
+            filters.append("s.dimension = ?")
+            params.append(dimension)
+        if dataset:
+            filters.append("s.dataset = ?")
+            params.append(dataset)
+        where = " AND ".join(filters)
+        return self.query(
+            f"""
+            WITH recent AS (
+                SELECT DISTINCT r.run_id, r.started_at FROM runs r JOIN scores s ON s.run_id = r.run_id
+                WHERE {where} ORDER BY r.started_at DESC LIMIT ?
+            )
+            SELECT s.run_id, s.dimension, COUNT(*) AS n, ROUND(AVG(s.score), 2) AS mean
+            FROM scores s JOIN recent USING (run_id)
+            WHERE {where}
+            GROUP BY s.run_id, s.dimension
+            ORDER BY recent.started_at DESC, s.dimension
+            """,
+            (*params, last, *params),
+        )
+
+    def regressions(
+        self,
+        base_agent: str,
+        test_agent: str,
+        dimension: Optional[str] = None,
+        dataset: Optional[str] = None,
+    ) -> tuple[list[str], list[tuple]]:
+        """Items that score lower for test_agent than for base_agent.
+
+        Each agent's score for an item is its most recent one across all runs.
+        """
+        filters, params = [], []
+        if dimension:
+            filters.append("dimension = ?")
+            params.append(dimension)
+        if dataset:
+            filters.append("dataset = ?")
+            params.append(dataset)
+        extra = "".join(f" AND {f}" for f in filters)
+        return self.query(
+            f"""
+            WITH latest AS (
+                SELECT s.agent, s.dataset, s.query, s.dimension, s.score, s.run_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY s.agent, s.dataset, s.query, s.dimension
+                           ORDER BY r.started_at DESC
+                       ) AS rank
+                FROM scores s JOIN runs r USING (run_id)
+                WHERE s.agent IN (?, ?){extra}
+            ),
+            base AS (SELECT * FROM latest WHERE agent = ? AND rank = 1),
+            test AS (SELECT * FROM latest WHERE agent = ? AND rank = 1)
+            SELECT base.dataset, base.dimension, base.score AS base_score, test.score AS test_score,
+                   test.run_id, base.query
+            FROM base JOIN test USING (dataset, query, dimension)
+            WHERE test.score < base.score
+            ORDER BY base.dataset, base.dimension, test.score - base.score
+            """,
+            (base_agent, test_agent, *params, base_agent, test_agent),
+        )
+
+
+def format_table(columns: list[str], rows: list[tuple], max_width: int = 60) -> str:
+    """Render query results as a markdown table, truncating long cells."""
+
+    def _cell(value) -> str:
+        text = "" if value is None else str(value).replace("\n", " ").replace("|", "\\|")
+        return text if len(text) <= max_width else text[: max_width - 3] + "..."
+
+    lines = ["| " + " | ".join(columns) + " |", "|" + "|".join("---" for _ in columns) + "|"]
+    lines += ["| " + " | ".join(_cell(v) for v in row) + " |" for row in rows]
+    return "\n".join(lines)
@@ -0,0 +1,161 @@
+"""MediaWiki API transport: one pooled keep-alive httpx client per event loop."""
+
+import asyncio
+import os
+import weakref
+from typing import Optional
+
+import httpx
+
+from src.retry import DEFAULT_RETRY_POLICY, RetryPolicy, acall_with_retries, get_circuit_breaker
+
+# Overridable so benchmarks and tests can point at a local stand-in
+API_URL = os.environ.get("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+USER_AGENT = "WikipediaAgent/1.0"
+HEADERS = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"}
+
+
+def _search_params(query: str, limit: int) -> dict:
+    return {
+        "action": "query",
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": limit,
+        "prop": "extracts",
+        "exintro": 1,
+        "explaintext": 1,
+        "exlimit": "max",
+    }
+
+
+def _article_params(title: str) -> dict:
+    # Full plain-text extracts are served one page per request; section
+    # headings are kept as "== Heading ==" lines
+    return {
+        "action": "query",
+        "titles": title,
+        "redirects": 1,
+        "prop": "extracts",
+        "explaintext": 1,
+        "exsectionformat": "wiki",
+        "exlimit": 1,
+    }
+
+
+def _article(pages: dict[str, dict]) -> Optional[tuple[str, str]]:
+    for page in pages.values():
+        if not page.get("missing") and page.get("extract"):
+            return page["title"], page["extract"]
+    return None
+
+
+def _merge_pages(pages: dict[str, dict], data: dict) -> Optional[dict]:
+    """Fold one action=query response into pages keyed by title.
+
+    Returns the continuation params to request next, or None when done.
+    Generator continuations (the next page of search hits) are not followed,
+    so the result covers exactly the pages the first request selected.
+    """
+    for page in data.get("query", {}).get("pages", []):
+        seen = pages.get(page["title"])
+        if seen is None:
+            pages[page["title"]] = page
+        elif "extract" in page:
+            seen["extract"] = page["extract"]
+    cont = data.get("continue", {})
+    return cont if "excontinue" in cont else None
+
+
+def _ranked(pages: dict[str, dict]) -> list[tuple[str, Optional[str]]]:
+    ordered = sorted(pages.values(), key=lambda p: p.get("index", 0))
+    return [(p["title"], p.get("extract")) for p in ordered]
+
+
+class AsyncMediaWikiClient:
+    """Thin client over the MediaWiki action API, built on httpx.AsyncClient.
+
+    Concurrent agent coroutines share its connection pool and reuse warm TLS
+    connections instead of opening one per request. An httpx.AsyncClient is
+    bound to the event loop it first runs on, so use
+    get_async_mediawiki_client() to get the instance for the running loop.
+
+    Args:
+        api_url: Endpoint of the action API.
+        pool_size: Max connections held open to the host.
+        timeout: Per-request timeout in seconds.
+        retry_policy: Retry policy for each API request; failures also feed
+            the shared 'mediawiki' circuit breaker.
+    """
+
+    def __init__(
+        self,
+        api_url: str = API_URL,
+        pool_size: int = 100,
+        timeout: float = 10,
+        retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    ):
+        self.api_url = api_url
+        self.retry_policy = retry_policy
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def _get(self, params: dict) -> dict:
+        async def attempt() -> dict:
+            resp = await self.client.get(
+                self.api_url,
+                params={**params, "format": "json", "formatversion": 2},
+            )
+            resp.raise_for_status()
+            return resp.json()
+
+        return await acall_with_retries(attempt, "mediawiki", self.retry_policy, get_circuit_breaker("mediawiki"))
+
+    async def _query_pages(self, params: dict) -> dict[str, dict]:
+        """Run an action=query request, following extract continuations only."""
+        pages: dict[str, dict] = {}
+        cont: Optional[dict] = {}
+        while cont is not None:
+            cont = _merge_pages(pages, await self._get({**params, **cont}))
+        return pages
+
+    async def search(self, query: str, limit: int = 3) -> list[tuple[str, Optional[str]]]:
+        """Search and fetch intro extracts in one generator=search round trip.
+
+        Returns (title, extract) pairs in search-rank order. extract is None for
+        pages without an intro.
+        """
+        return _ranked(await self._query_pages(_search_params(query, limit)))
+
+    async def article(self, title: str) -> Optional[tuple[str, str]]:
+        """Fetch an article's full plain text, following redirects.
+
+        Returns (normalized title, text), or None if there is no such page.
+        """
+        return _article(await self._query_pages(_article_params(title)))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMediaWikiClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_mediawiki_client() -> AsyncMediaWikiClient:
+    """Return the MediaWiki client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncMediaWikiClient()
+    return client
+
+
+async def aclose_async_mediawiki_client() -> None:
+    """Close the running loop's client, if one was created. Call before the loop exits."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,89 @@
+"""Split full Wikipedia articles into passages and rank them against a query with BM25."""
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from src.search_index import BM25_B, BM25_K1, TITLE_WEIGHT, tokenize
+
+PASSAGE_MAX_CHARS = 800
+
+# Sections that list sources or links rather than facts
+SKIPPED_SECTIONS = frozenset(
+    {"references", "external links", "see also", "further reading", "notes", "bibliography", "sources", "citations"}
+)
+
+_HEADING_RE = re.compile(r"^(=={1,4})\s*(.*?)\s*\1\s*$", re.MULTILINE)
+
+
+@dataclass
+class Passage:
+    section: str
+    text: str
+
+
+def _chunks(text: str, max_chars: int) -> list[str]:
+    """Pack paragraphs into chunks of at most max_chars, splitting long paragraphs on sentences."""
+    pieces = []
+    for paragraph in (p.strip() for p in text.split("\n")):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(re.split(r"(?<=[.!?])\s+", paragraph))
+    chunks, current = [], ""
+    for piece in filter(None, pieces):
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_MAX_CHARS) -> list[Passage]:
+    """Split an article's plain text (with '== Heading ==' lines) into passages.
+
+    Subsection passages are labeled 'Section > Subsection'. Reference and
+    link sections are dropped.
+    """
+    passages = []
+    path: list[str] = []
+    sections = [("", 1, 0)] + [(m.group(2), len(m.group(1)) - 1, m.end()) for m in _HEADING_RE.finditer(text)]
+    starts = [m.start() for m in _HEADING_RE.finditer(text)] + [len(text)]
+    for (heading, level, position), end in zip(sections, starts, strict=True):
+        if heading:
+            path = path[: level - 1] + [heading]
+        if path and path[0].lower() in SKIPPED_SECTIONS:
+            continue
+        section = " > ".join(path) or "Introduction"
+        passages.extend(Passage(section, chunk) for chunk in _chunks(text[position:end], max_chars))
+    return passages
+
+
+def rank_passages(query: str, passages: list[Passage], k: int = 3) -> list[tuple[Passage, float]]:
+    """Top k passages by BM25 over the article's passages. Section names count TITLE_WEIGHT times."""
+    docs = [
+        Counter(tokenize(p.text)) + Counter({t: TITLE_WEIGHT for t in tokenize(p.section)}) for p in passages
+    ]
+    if not docs:
+        return []
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+    terms = set(tokenize(query))
+    df = {t: sum(1 for d in docs if t in d) for t in terms}
+    scored = []
+    for i, doc in enumerate(docs):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(doc.values()) / avg_len)
+        score = 0.0
+        for term in terms:
+            tf = doc.get(term, 0)
+            if tf:
+                idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if score > 0:
+            scored.append((score, i))
+    top = heapq.nlargest(k, scored)
+    # Present in article order, which reads more naturally than score order
+    return [(passages[i], score) for score, i in sorted(top, key=lambda pair: pair[1])]
@@ -0,0 +1,104 @@
+"""Speculative search prefetch, started alongside the agent's first model call.
+
+For most questions the model's first move is a search_wikipedia call close
+to the question itself. Prefetch searches for the question's key terms while
+the first turn is generated; if the model's first-turn search is similar
+enough (Jaccard similarity of the two token sets), it is served from the
+prefetch instead of waiting for a fresh round trip.
+"""
+
+import asyncio
+import re
+from typing import Awaitable, Callable, Optional
+
+from src.search_index import STOPWORDS, tokenize
+
+PREFETCH_TOOL = "search_wikipedia"
+MIN_SIMILARITY = 0.5
+
+# Words that shape a question but are rarely part of the article's title or text
+QUESTION_WORDS = frozenset(
+    "how many much did does do can could would should tell me about explain describe whose whom "
+    "please know give list name".split()
+)
+
+_WORD_RE = re.compile(r"[\w][\w'.-]*")
+
+# Detached prefetches still running; the event loop only keeps weak references to tasks
+_detached: set[asyncio.Task] = set()
+
+
+def prefetch_query(query: str) -> str:
+    """Key terms of a question, keeping their original case."""
+    words = [w.strip(".'-") for w in _WORD_RE.findall(query)]
+    kept = [w for w in words if w and w.lower() not in STOPWORDS and w.lower() not in QUESTION_WORDS]
+    return " ".join(kept) or query
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of the token sets of two search queries."""
+    ta, tb = set(tokenize(a)), set(tokenize(b))
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class Prefetch:
+    """One speculative search for a query, claimable by a single first-turn tool call.
+
+    Args:
+        tool_map: The agent's async tool functions; nothing is prefetched
+            without a search_wikipedia tool.
+        query: The user's question.
+    """
+
+    def __init__(self, tool_map: dict[str, Callable[..., Awaitable[str]]], query: str):
+        self.query = prefetch_query(query)
+        tool_fn = tool_map.get(PREFETCH_TOOL)
+        self._task: Optional[asyncio.Task] = (
+            asyncio.ensure_future(tool_fn(query=self.query)) if tool_fn is not None else None
+        )
+        # None until settled; then "hit" or "miss"
+        self.outcome: Optional[str] = None
+
+    def match(self, tool_blocks: list) -> Optional[str]:
+        """Claim the prefetch for the most similar eligible tool call; returns its tool_use_id.
+
+        Settles the prefetch either way. A missed prefetch is left to finish
+        rather than cancelled: it still warms the tool cache, and another
+        agent may be waiting on the same in-flight search.
+        """
+        if self._task is None or self.outcome is not None:
+            return None
+        scored = [
+            (similarity(self.query, block.input["query"]), block.id)
+            for block in tool_blocks
+            if block.name == PREFETCH_TOOL and set(block.input) == {"query"}
+        ]
+        best = max(scored, default=None)
+        self.outcome = "hit" if best is not None and best[0] >= MIN_SIMILARITY else "miss"
+        return best[1] if self.outcome == "hit" else None
+
+    async def result(self) -> str:
+        return await self._task
+
+    def detach(self) -> None:
+        """Settle an unclaimed prefetch as a miss and let it finish in the background.
+
+        The agent never waits on it; any error it ends with is discarded.
+        """
+        if self._task is None:
+            return
+        if self.outcome is None:
+            self.outcome = "miss"
+        if self._task.done():
+            _discard_result(self._task)
+            return
+        _detached.add(self._task)
+        self._task.add_done_callback(_discard_result)
+
+
+def _discard_result(task: asyncio.Task) -> None:
+    _detached.discard(task)
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,206 @@
+"""In-memory registry of agent configs, prompts and tool definitions, reloaded when files change.
+
+The load_* functions in src/config.py re-read their YAML file on every call.
+A long-running process should use the registry instead: each file is parsed
+once, every agent is validated up front, tool definitions are prebuilt, and
+an edit to any of the files is picked up on the next lookup after
+check_interval seconds without a restart.
+"""
+
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from src.compaction import validate_strategy
+from src.config import PROJECT_ROOT, AgentConfig, agent_config_from_entry
+from src.tools import TOOL_SCHEMAS, build_tool_definitions
+
+SEARCH_BACKENDS = ("mediawiki", "offline")
+
+
+class UnknownConfig(KeyError):
+    """A lookup named an agent config, system instruction or tool description that doesn't exist."""
+
+    def __str__(self) -> str:
+        return self.args[0] if self.args else ""
+
+
+def _config_files(root: Path) -> dict[str, Path]:
+    return {
+        "agents": root / "configs" / "agents.yaml",
+        "system_instructions": root / "prompts" / "system_instructions.yaml",
+        "tool_descriptions": root / "prompts" / "tool_descriptions.yaml",
+    }
+
+
+def _mtimes(paths: dict[str, Path]) -> tuple:
+    stamps = []
+    for path in paths.values():
+        try:
+            stat = path.stat()
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamps.append(None)
+    return tuple(stamps)
+
+
+def _read(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """One consistent, validated view of the config files. Never mutated after loading."""
+
+    agents: dict[str, AgentConfig]
+    system_instructions: dict[str, str]
+    tool_descriptions: dict[str, dict[str, str]]
+    # Tool definitions per tool_description name
+    tool_definitions: dict[str, list[dict]] = field(repr=False)
+    mtimes: tuple = ()
+
+    def agent(self, name: str) -> AgentConfig:
+        """Same contract as load_agent_config: defaults if agents.yaml is missing."""
+        # mtimes[0] is agents.yaml's stamp, None when the file doesn't exist
+        if self.mtimes and self.mtimes[0] is None:
+            return AgentConfig()
+        if name not in self.agents:
+            raise UnknownConfig(f"Agent config '{name}' not found in configs/agents.yaml")
+        return self.agents[name]
+
+    def system_instruction(self, name: str) -> str:
+        if name not in self.system_instructions:
+            raise UnknownConfig(f"System instruction '{name}' not found in prompts/system_instructions.yaml")
+        return self.system_instructions[name]
+
+    def tool_description(self, name: str) -> dict[str, str]:
+        if name not in self.tool_descriptions:
+            raise UnknownConfig(f"Tool description '{name}' not found in prompts/tool_descriptions.yaml")
+        return self.tool_descriptions[name]
+
+
+def load_snapshot(root: Path = PROJECT_ROOT) -> ConfigSnapshot:
+    """Parse and validate the config files under root.
+
+    Raises:
+        ValueError: Listing every problem found, e.g. an agent that names a
+            missing prompt or an unknown compaction strategy.
+    """
+    paths = _config_files(root)
+    mtimes = _mtimes(paths)
+    raw_agents = _read(paths["agents"])
+    system_instructions = _read(paths["system_instructions"])
+    tool_descriptions = _read(paths["tool_descriptions"])
+
+    problems = []
+    known_tools = {schema["name"] for schema in TOOL_SCHEMAS}
+    for name, descriptions in tool_descriptions.items():
+        unknown = set(descriptions) - known_tools
+        if unknown:
+            problems.append(f"tool description '{name}' describes unknown tools: {', '.join(sorted(unknown))}")
+
+    agents = {}
+    for name, entry in raw_agents.items():
+        try:
+            config = agent_config_from_entry(entry)
+        except (TypeError, AttributeError) as e:
+            problems.append(f"agent '{name}': {e}")
+            continue
+        if config.system_instruction not in system_instructions:
+            problems.append(f"agent '{name}': unknown system_instruction '{config.system_instruction}'")
+        if config.tool_description not in tool_descriptions:
+            problems.append(f"agent '{name}': unknown tool_description '{config.tool_description}'")
+        if config.search_backend not in SEARCH_BACKENDS:
+            problems.append(f"agent '{name}': unknown search_backend '{config.search_backend}'")
+        elif config.search_backend == "offline" and not config.search_index:
+            problems.append(f"agent '{name}': search_backend 'offline' requires search_index")
+        try:
+            validate_strategy(config.compaction)
+        except ValueError as e:
+            problems.append(f"agent '{name}': {e}")
+        agents[name] = config
+    if problems:
+        raise ValueError("Invalid config:\n  " + "\n  ".join(problems))
+
+    return ConfigSnapshot(
+        agents=agents,
+        system_instructions=system_instructions,
+        tool_descriptions=tool_descriptions,
+        tool_definitions={name: build_tool_definitions(d) for name, d in tool_descriptions.items()},
+        mtimes=mtimes,
+    )
+
+
+class ConfigRegistry:
+    """Serves the latest valid ConfigSnapshot, reloading when a file's mtime changes.
+
+    Reloads swap in a fully built snapshot, so a caller that takes one
+    snapshot per request never sees half-updated config. If an edited file
+    fails to parse or validate, the previous snapshot keeps being served and
+    the error is printed to stderr.
+
+    Args:
+        root: Project root holding configs/ and prompts/.
+        check_interval: Seconds between mtime checks. 0 checks on every lookup.
+    """
+
+    def __init__(self, root: Path = PROJECT_ROOT, check_interval: float = 1.0):
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._paths = _config_files(self.root)
+        self._lock = threading.Lock()
+        self._snapshot = load_snapshot(self.root)
+        self._checked_at = time.monotonic()
+        self._failed_mtimes: Optional[tuple] = None
+        self.reloads = 0
+
+    def snapshot(self) -> ConfigSnapshot:
+        """The current snapshot, after reloading if files changed since the last check."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                mtimes = _mtimes(self._paths)
+                if mtimes != self._snapshot.mtimes and mtimes != self._failed_mtimes:
+                    self._reload(mtimes)
+            return self._snapshot
+
+    def _reload(self, mtimes: tuple) -> None:
+        try:
+            self._snapshot = load_snapshot(self.root)
+            self._failed_mtimes = None
+            self.reloads += 1
+        except (OSError, yaml.YAMLError, ValueError) as e:
+            # Don't retry (and re-print) until the files change again
+            self._failed_mtimes = mtimes
+            print(f"[config] reload failed, keeping previous config: {e}", file=sys.stderr)
+
+
+_registry: Optional[ConfigRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_config_registry() -> ConfigRegistry:
+    """Return the process-wide registry, loading it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ConfigRegistry()
+        return _registry
+
+
+def set_config_registry(registry: Optional[ConfigRegistry]) -> None:
+    """Replace the process-wide registry. None reloads from the project root on next use."""
+    global _registry
+    with _registry_lock:
+        _registry = registry
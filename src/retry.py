@@ -0,0 +1,275 @@
+"""Retry policy and circuit breaker for Anthropic and MediaWiki calls.
+
+Errors are classified by HTTP status (or as transport failures) rather than
+by client library, so the same policy covers anthropic, requests and httpx.
+"""
+
+import asyncio
+import email.utils
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling out while a circuit breaker is open."""
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK or HTTP client error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _transport_error_types() -> tuple:
+    """Connection/timeout error classes of whichever HTTP clients are loaded."""
+    types = []
+    if "anthropic" in sys.modules:
+        types.append(sys.modules["anthropic"].APIConnectionError)
+    if "requests" in sys.modules:
+        exceptions = sys.modules["requests"].exceptions
+        types += [exceptions.ConnectionError, exceptions.Timeout]
+    if "httpx" in sys.modules:
+        types.append(sys.modules["httpx"].TransportError)
+    return tuple(types)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Server-requested delay in seconds from retry-after-ms or retry-after headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Malformed header: fall back to backoff rather than hide the API error
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to retry a failed call.
+
+    Delays use full jitter: a uniform draw from [0, min(max_delay,
+    base_delay * 2 ** (attempt - 1))]. A server-provided Retry-After is
+    honored (up to max_retry_after) with up to base_delay of jitter added
+    so clients told the same delay don't retry in lockstep.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    max_retry_after: float = 120.0
+    retryable_statuses: frozenset = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+
+    def is_retryable(self, error: BaseException) -> bool:
+        status = status_of(error)
+        if status is not None:
+            return status in self.retryable_statuses
+        transport_errors = _transport_error_types()
+        return bool(transport_errors) and isinstance(error, transport_errors)
+
+    def delay(self, error: BaseException, attempt: int) -> float:
+        server_delay = retry_after(error)
+        if server_delay is not None:
+            return min(server_delay, self.max_retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class CircuitBreaker:
+    """Fail fast while a dependency is degraded.
+
+    After failure_threshold consecutive degradation failures (5xx, 529,
+    transport errors) the breaker opens and calls raise CircuitOpenError
+    for reset_timeout seconds. Then a single trial call is let through;
+    success closes the breaker, failure reopens it. 429s are left to the
+    retry policy and scheduler and do not count.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 8, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+            self._trial_in_flight = True
+
+    def release_trial(self) -> None:
+        """Give back a trial slot whose call ended without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        status = status_of(error)
+        degraded = (status is not None and (status >= 500 or status == 408)) or (
+            status is None and isinstance(error, _transport_error_types())
+        )
+        with self._lock:
+            self._trial_in_flight = False
+            if not degraded:
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"[retry] {self.name} circuit opened after {self._failures} failures", file=sys.stderr)
+                self._opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a named dependency (e.g. 'anthropic', 'mediawiki')."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def _log_retry(name: str, attempt: int, error: BaseException, delay: float) -> None:
+    print(f"[retry] {name} attempt {attempt} failed with {error!r}, retrying in {delay:.1f}s", file=sys.stderr)
+
+
+def _after_failure(
+    name: str, policy: RetryPolicy, breaker: Optional[CircuitBreaker], error: Exception, attempt: int
+) -> float:
+    """Record a failed attempt; return the delay before retrying, or re-raise."""
+    if breaker is not None:
+        breaker.record_failure(error)
+    if attempt == policy.max_attempts or not policy.is_retryable(error):
+        raise error
+    delay = policy.delay(error, attempt)
+    _log_retry(name, attempt, error, delay)
+    return delay
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    name: str,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    breaker: Optional[CircuitBreaker] = None,
+) -> T:
+    """Call fn under policy, consulting and updating breaker if given.
+
+    An attempt that ends without an outcome (KeyboardInterrupt, cancellation)
+    hands back a half-open breaker's trial slot, so the next call can try again.
+    """
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            time.sleep(_after_failure(name, policy, breaker, e, attempt))
+        except BaseException:
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+async def acall_with_retries(
+    fn: Callable[[], Awaitable[T]],
+    name: str,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    breaker: Optional[CircuitBreaker] = None,
+) -> T:
+    """Async call_with_retries."""
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await fn()
+        except Exception as e:
+            await asyncio.sleep(_after_failure(name, policy, breaker, e, attempt))
+        except BaseException:
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+async def aiter_with_retries(
+    fn: Callable[[], AsyncIterator[T]],
+    name: str,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    breaker: Optional[CircuitBreaker] = None,
+) -> AsyncIterator[T]:
+    """Iterate fn() under policy, retrying only until its first item is yielded.
+
+    After that a retry would repeat items, so errors propagate.
+    """
+    for attempt in range(1, policy.max_attempts + 1):
+        if breaker is not None:
+            breaker.before_call()
+        emitted = False
+        try:
+            async for item in fn():
+                emitted = True
+                yield item
+        except Exception as e:
+            if emitted:
+                if breaker is not None:
+                    breaker.record_failure(e)
+                raise
+            await asyncio.sleep(_after_failure(name, policy, breaker, e, attempt))
+        except BaseException:
+            # Includes the consumer closing the generator early
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return
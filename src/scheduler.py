@@ -0,0 +1,334 @@
+"""Rate-limit-aware scheduler shared by every Anthropic call in a process.
+
+Each model gets token buckets for requests, input tokens and output tokens
+per minute, plus an AIMD concurrency limit: it grows by about one slot per
+window of successful calls and halves when the API answers 429/529, at most
+once per window (calls already in flight when it halved don't halve it again).
+Output tokens are reserved at each lane's running average of actual output,
+not max_tokens, and settled against usage when the call finishes.
+Callers tag requests with a lane (e.g. "agent" or "judge"); when lanes
+compete for slots, the one with fewer calls in flight goes first.
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+import yaml
+
+from src.config import PROJECT_ROOT
+
+STATS_WINDOW = 60.0
+# Weight of the newest call in each lane's running average of output tokens
+OUTPUT_AVERAGE_WEIGHT = 0.2
+
+
+@dataclass
+class ModelBudget:
+    requests_per_minute: float = 50
+    input_tokens_per_minute: float = 50_000
+    output_tokens_per_minute: float = 10_000
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of budget.
+
+    A request larger than the whole bucket is admitted once the bucket is
+    full, driving it negative, so oversized requests are slowed, not starved.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken (0 if it can be taken now)."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Return over-estimated budget (or charge more if amount is negative)."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Ticket:
+    """A granted slot. Pass back to release() when the call finishes."""
+
+    model: str
+    lane: str
+    input_tokens: int
+    output_tokens: int
+    started: float = field(default_factory=time.monotonic)
+
+
+class _ModelState:
+    def __init__(self, budget: ModelBudget, initial_limit: float):
+        self.requests = TokenBucket(budget.requests_per_minute)
+        self.input_tokens = TokenBucket(budget.input_tokens_per_minute)
+        self.output_tokens = TokenBucket(budget.output_tokens_per_minute)
+        self.limit = initial_limit
+        self.in_flight: dict[str, int] = defaultdict(int)
+        self.waiting: dict[str, int] = defaultdict(int)
+        self.completed = 0
+        self.rate_limited = 0
+        # When the limit was last halved; 429s on calls started before it don't halve it again
+        self.decreased_at = -math.inf
+        # Running average of actual output tokens per lane, None until a call finishes
+        self.output_average: dict[str, Optional[float]] = defaultdict(lambda: None)
+        # (finish time, input tokens, output tokens) for throughput over STATS_WINDOW
+        self.recent: deque = deque()
+
+
+def estimate_input_tokens(kwargs: dict) -> int:
+    """Rough prompt size (~4 characters per token) for admission control."""
+    payload = {k: kwargs.get(k) for k in ("system", "tools", "messages")}
+    return len(json.dumps(payload, default=str)) // 4
+
+
+class RateLimitScheduler:
+    """Admission control for Anthropic calls, usable from threads and event loops.
+
+    Args:
+        budgets: Per-model budgets. Models not listed use default_budget.
+        default_budget: Budget for unlisted models.
+        initial_concurrency: Starting AIMD limit per model.
+        min_concurrency: Floor for the AIMD limit.
+        max_concurrency: Ceiling for the AIMD limit; also how many workers callers should run.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[dict[str, ModelBudget]] = None,
+        default_budget: Optional[ModelBudget] = None,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+    ):
+        self.budgets = budgets or {}
+        self.default_budget = default_budget or ModelBudget()
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self._models: dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        # Futures of async waiters, resolved on their loop when a slot or lane frees up
+        self._async_waiters: dict[asyncio.Future, asyncio.AbstractEventLoop] = {}
+
+    @classmethod
+    def from_config(cls, max_concurrency: Optional[int] = None) -> "RateLimitScheduler":
+        """Build from configs/rate_limits.yaml, optionally capping max concurrency."""
+        path = PROJECT_ROOT / "configs" / "rate_limits.yaml"
+        data = {}
+        if path.exists():
+            with open(path) as f:
+                data = yaml.safe_load(f) or {}
+        concurrency = data.get("concurrency", {})
+        models = data.get("models", {})
+        default = ModelBudget(**models.pop("default", {}))
+        cap = concurrency.get("max", 64) if max_concurrency is None else max_concurrency
+        return cls(
+            budgets={name: ModelBudget(**budget) for name, budget in models.items()},
+            default_budget=default,
+            initial_concurrency=min(concurrency.get("initial", 4), cap),
+            min_concurrency=concurrency.get("min", 1),
+            max_concurrency=cap,
+        )
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            budget = self.budgets.get(model, self.default_budget)
+            state = self._models[model] = _ModelState(budget, self.initial_concurrency)
+        return state
+
+    def _try_acquire(self, ticket: Ticket) -> float:
+        """Take a slot and budget for ticket. Returns 0 on success, else seconds to wait.
+
+        Returns math.inf when blocked on concurrency or another lane, which only
+        a release or another waiter leaving can change. Must be called with the lock held.
+        """
+        state = self._state(ticket.model)
+        if sum(state.in_flight.values()) >= int(state.limit):
+            return math.inf
+        mine = state.in_flight[ticket.lane]
+        for lane, count in state.waiting.items():
+            if lane != ticket.lane and count > 0 and state.in_flight[lane] < mine:
+                return math.inf
+        now = time.monotonic()
+        wait = max(
+            state.requests.wait_time(1, now),
+            state.input_tokens.wait_time(ticket.input_tokens, now),
+            state.output_tokens.wait_time(ticket.output_tokens, now),
+        )
+        if wait > 0:
+            return wait
+        state.requests.take(1)
+        state.input_tokens.take(ticket.input_tokens)
+        state.output_tokens.take(ticket.output_tokens)
+        state.in_flight[ticket.lane] += 1
+        ticket.started = now
+        return 0.0
+
+    def _ticket(self, kwargs: dict, lane: str, input_tokens: int) -> Ticket:
+        """Ticket for a request, reserving the lane's expected output. Must be called with the lock held."""
+        max_tokens = kwargs.get("max_tokens", 0)
+        average = self._state(kwargs["model"]).output_average[lane]
+        return Ticket(
+            model=kwargs["model"],
+            lane=lane,
+            input_tokens=input_tokens,
+            # Until the lane has a finished call to go by, reserve max_tokens like the API
+            output_tokens=max_tokens if average is None else min(max_tokens, math.ceil(average)),
+        )
+
+    def _notify(self) -> None:
+        """Wake every waiter to re-check. Must be called with the lock held."""
+        self._released.notify_all()
+        for future, loop in self._async_waiters.items():
+            loop.call_soon_threadsafe(_wake, future)
+        self._async_waiters.clear()
+
+    def acquire(self, kwargs: dict, lane: str = "agent") -> Ticket:
+        """Block the calling thread until the request described by kwargs may be sent."""
+        input_tokens = estimate_input_tokens(kwargs)
+        with self._lock:
+            ticket = self._ticket(kwargs, lane, input_tokens)
+            state = self._state(ticket.model)
+            state.waiting[lane] += 1
+            try:
+                while (wait := self._try_acquire(ticket)) > 0:
+                    self._released.wait(timeout=None if wait == math.inf else wait)
+            finally:
+                state.waiting[lane] -= 1
+                self._notify()
+        return ticket
+
+    async def aacquire(self, kwargs: dict, lane: str = "agent") -> Ticket:
+        """Async acquire. Waits on a future resolved by the next release, so the event loop keeps running."""
+        loop = asyncio.get_running_loop()
+        input_tokens = estimate_input_tokens(kwargs)
+        with self._lock:
+            ticket = self._ticket(kwargs, lane, input_tokens)
+            state = self._state(ticket.model)
+            state.waiting[lane] += 1
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_acquire(ticket)
+                    if wait == 0:
+                        return ticket
+                    woken = loop.create_future()
+                    self._async_waiters[woken] = loop
+                try:
+                    await asyncio.wait([woken], timeout=None if wait == math.inf else wait)
+                finally:
+                    with self._lock:
+                        self._async_waiters.pop(woken, None)
+        finally:
+            with self._lock:
+                state.waiting[lane] -= 1
+                self._notify()
+
+    def release(self, ticket: Ticket, usage=None, rate_limited: bool = False) -> None:
+        """Return a slot, settle token estimates against usage and adjust the AIMD limit.
+
+        Args:
+            ticket: The ticket returned by acquire/aacquire.
+            usage: The response's usage object, if the call succeeded.
+            rate_limited: True if the API rejected the call with 429 or 529.
+        """
+        with self._lock:
+            state = self._state(ticket.model)
+            state.in_flight[ticket.lane] -= 1
+            if rate_limited:
+                state.rate_limited += 1
+                if ticket.started >= state.decreased_at:
+                    state.limit = max(self.min_concurrency, state.limit / 2)
+                    state.decreased_at = time.monotonic()
+            elif usage is not None:
+                actual_in = (getattr(usage, "input_tokens", 0) or 0) + (
+                    getattr(usage, "cache_creation_input_tokens", 0) or 0
+                )
+                actual_out = getattr(usage, "output_tokens", 0) or 0
+                state.input_tokens.give_back(ticket.input_tokens - actual_in)
+                state.output_tokens.give_back(ticket.output_tokens - actual_out)
+                state.completed += 1
+                state.recent.append((time.monotonic(), actual_in, actual_out))
+                state.limit = min(self.max_concurrency, state.limit + 1 / max(state.limit, 1))
+                average = state.output_average[ticket.lane]
+                state.output_average[ticket.lane] = (
+                    actual_out if average is None else average + OUTPUT_AVERAGE_WEIGHT * (actual_out - average)
+                )
+            else:
+                # Failed without usage: nothing was generated
+                state.output_tokens.give_back(ticket.output_tokens)
+            self._notify()
+
+    def stats(self) -> dict[str, dict]:
+        """Live per-model snapshot: AIMD limit, in-flight by lane, and last-minute throughput."""
+        now = time.monotonic()
+        snapshot = {}
+        with self._lock:
+            for model, state in self._models.items():
+                while state.recent and now - state.recent[0][0] > STATS_WINDOW:
+                    state.recent.popleft()
+                snapshot[model] = {
+                    "limit": round(state.limit, 1),
+                    "in_flight": dict(state.in_flight),
+                    "waiting": dict(state.waiting),
+                    "completed": state.completed,
+                    "rate_limited": state.rate_limited,
+                    "requests_per_minute": len(state.recent),
+                    "input_tokens_per_minute": sum(r[1] for r in state.recent),
+                    "output_tokens_per_minute": sum(r[2] for r in state.recent),
+                }
+        return snapshot
+
+    def format_stats(self) -> str:
+        lines = []
+        for model, s in self.stats().items():
+            lanes = ", ".join(f"{lane}={n}" for lane, n in s["in_flight"].items() if n) or "idle"
+            lines.append(
+                f"[scheduler] {model}: limit={s['limit']} in_flight({lanes}) "
+                f"done={s['completed']} 429s={s['rate_limited']} "
+                f"rpm={s['requests_per_minute']} itpm={s['input_tokens_per_minute']} "
+                f"otpm={s['output_tokens_per_minute']}"
+            )
+        return "\n".join(lines)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+
+
+def get_scheduler() -> Optional[RateLimitScheduler]:
+    return _scheduler
+
+
+def set_scheduler(scheduler: Optional[RateLimitScheduler]) -> None:
+    """Install a process-wide scheduler for all Anthropic calls. None disables scheduling."""
+    global _scheduler
+    _scheduler = scheduler
@@ -0,0 +1,360 @@
+"""Offline Wikipedia search: BM25 inverted index over memory-mapped files.
+
+An index is a directory of flat binary files written once by build_index
+and opened read-only with mmap, so any number of worker processes share
+the OS page cache instead of each holding the index in memory:
+
+    meta.json     counts, BM25 parameters and byte order
+    docs.bin      concatenated UTF-8 "title\\0intro" records
+    docs.idx      uint64 offsets into docs.bin (num_docs + 1)
+    doclens.bin   uint32 token count per document
+    terms.bin     concatenated UTF-8 terms, sorted bytewise
+    terms.idx     uint64 (term offset, postings offset) pairs (num_terms + 1)
+    postings.bin  uint32 (doc id, term frequency) pairs grouped by term
+"""
+
+import bz2
+import json
+import math
+import mmap
+import re
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from pathlib import Path
+from typing import Iterator, Union
+
+import numpy as np
+
+INDEX_VERSION = 1
+MAX_INTRO_CHARS = 1000
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his in is it its of on or "
+    "she that the their they this to was were what when where which who why with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split on non-alphanumerics and drop stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+# ---------------------------------------------------------------------------
+# Source readers
+# ---------------------------------------------------------------------------
+
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_REF_RE = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.DOTALL | re.IGNORECASE)
+_TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
+_TABLE_RE = re.compile(r"\{\|.*?\|\}", re.DOTALL)
+_FILE_LINK_RE = re.compile(r"\[\[(?:File|Image):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]", re.IGNORECASE)
+_PIPED_LINK_RE = re.compile(r"\[\[[^\[\]|]*\|([^\[\]]*)\]\]")
+_LINK_RE = re.compile(r"\[\[([^\[\]]*)\]\]")
+_EXT_LINK_RE = re.compile(r"\[https?://\S+\s*([^\]]*)\]")
+_TAG_RE = re.compile(r"<[^>]+>")
+_HEADING_RE = re.compile(r"^==.*==\s*$", re.MULTILINE)
+
+
+def _wikitext_intro(wikitext: str) -> str:
+    """Return plain text of the lead section of an article's wikitext."""
+    heading = _HEADING_RE.search(wikitext)
+    text = wikitext[: heading.start()] if heading else wikitext
+    text = _COMMENT_RE.sub("", text)
+    text = _REF_RE.sub("", text)
+    # Templates nest, so strip innermost first until none are left
+    while True:
+        stripped = _TEMPLATE_RE.sub("", text)
+        if stripped == text:
+            break
+        text = stripped
+    text = _TABLE_RE.sub("", text)
+    text = _FILE_LINK_RE.sub("", text)
+    text = _PIPED_LINK_RE.sub(r"\1", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _EXT_LINK_RE.sub(r"\1", text)
+    text = _TAG_RE.sub("", text)
+    text = text.replace("'''", "").replace("''", "")
+    lines = [line.strip() for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+def _open_maybe_bz2(path: Path, mode: str = "rb"):
+    return bz2.open(path, mode) if path.suffix == ".bz2" else open(path, mode)
+
+
+def iter_dump_docs(path: Path) -> Iterator[tuple[str, str]]:
+    """Yield (title, intro) for main-namespace, non-redirect pages of an XML dump."""
+    with _open_maybe_bz2(path) as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag.rsplit("}", 1)[-1] != "page":
+                continue
+            fields = {child.tag.rsplit("}", 1)[-1]: child for child in elem}
+            is_article = fields.get("ns") is not None and fields["ns"].text == "0"
+            if is_article and "redirect" not in fields:
+                revision = fields.get("revision")
+                text_elem = None
+                if revision is not None:
+                    text_elem = next((c for c in revision if c.tag.rsplit("}", 1)[-1] == "text"), None)
+                wikitext = text_elem.text if text_elem is not None else None
+                if wikitext:
+                    intro = _wikitext_intro(wikitext)
+                    if intro:
+                        yield fields["title"].text, intro
+            elem.clear()
+
+
+def iter_jsonl_docs(path: Path) -> Iterator[tuple[str, str]]:
+    """Yield (title, intro) from a JSONL file with 'title' and 'extract' (or 'intro'/'text') keys."""
+    with _open_maybe_bz2(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            intro = record.get("extract") or record.get("intro") or record.get("text") or ""
+            if record.get("title") and intro:
+                yield record["title"], intro
+
+
+def _detect_format(path: Path) -> str:
+    name = path.name.removesuffix(".bz2")
+    if name.endswith(".jsonl") or name.endswith(".json"):
+        return "jsonl"
+    if name.endswith(".xml"):
+        return "xml"
+    raise ValueError(f"Cannot infer source format from {path.name}; pass source_format explicitly")
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+
+def build_index(
+    source: Union[str, Path],
+    out_dir: Union[str, Path],
+    source_format: str = "auto",
+    verbose: bool = False,
+) -> dict:
+    """Build an offline search index from a Wikipedia dump or intro-extract JSONL.
+
+    Postings are accumulated as compact uint32 arrays in memory, so building
+    from a full English dump needs a few GB of RAM; the resulting index is
+    served without loading it.
+
+    Args:
+        source: Path to a pages-articles XML dump (optionally .bz2) or a JSONL file.
+        out_dir: Directory to write the index files into.
+        source_format: 'xml', 'jsonl' or 'auto' to infer from the file name.
+        verbose: Print progress to stderr.
+
+    Returns:
+        The index metadata written to meta.json.
+    """
+    source = Path(source)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if source_format == "auto":
+        source_format = _detect_format(source)
+    docs = iter_dump_docs(source) if source_format == "xml" else iter_jsonl_docs(source)
+
+    postings: dict[str, array] = {}
+    doc_offsets = array("Q", [0])
+    doc_lens = array("I")
+    total_len = 0
+
+    with open(out_dir / "docs.bin", "wb") as docs_file:
+        for doc_id, (title, intro) in enumerate(docs):
+            if len(intro) > MAX_INTRO_CHARS:
+                intro = intro[:MAX_INTRO_CHARS] + "..."
+            record = f"{title}\0{intro}".encode("utf-8")
+            docs_file.write(record)
+            doc_offsets.append(doc_offsets[-1] + len(record))
+
+            counts: dict[str, int] = {}
+            for token in tokenize(title):
+                counts[token] = counts.get(token, 0) + TITLE_WEIGHT
+            for token in tokenize(intro):
+                counts[token] = counts.get(token, 0) + 1
+            length = sum(counts.values())
+            doc_lens.append(length)
+            total_len += length
+            for token, tf in counts.items():
+                plist = postings.get(token)
+                if plist is None:
+                    plist = postings[token] = array("I")
+                plist.append(doc_id)
+                plist.append(tf)
+
+            if verbose and (doc_id + 1) % 100_000 == 0:
+                print(f"  indexed {doc_id + 1:,} documents", file=sys.stderr)
+
+    num_docs = len(doc_lens)
+    terms = sorted(postings, key=lambda t: t.encode("utf-8"))
+    term_index = array("Q")
+    term_off = postings_off = 0
+    with open(out_dir / "terms.bin", "wb") as terms_file, open(out_dir / "postings.bin", "wb") as postings_file:
+        for term in terms:
+            encoded = term.encode("utf-8")
+            term_index.append(term_off)
+            term_index.append(postings_off)
+            terms_file.write(encoded)
+            postings[term].tofile(postings_file)
+            term_off += len(encoded)
+            postings_off += len(postings[term]) // 2
+            del postings[term]
+    term_index.append(term_off)
+    term_index.append(postings_off)
+
+    with open(out_dir / "terms.idx", "wb") as f:
+        term_index.tofile(f)
+    with open(out_dir / "docs.idx", "wb") as f:
+        doc_offsets.tofile(f)
+    with open(out_dir / "doclens.bin", "wb") as f:
+        doc_lens.tofile(f)
+
+    meta = {
+        "version": INDEX_VERSION,
+        "byteorder": sys.byteorder,
+        "num_docs": num_docs,
+        "num_terms": len(terms),
+        "avg_doc_len": total_len / num_docs if num_docs else 0.0,
+        "k1": BM25_K1,
+        "b": BM25_B,
+    }
+    (out_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    if verbose:
+        print(f"Indexed {num_docs:,} documents, {len(terms):,} terms into {out_dir}", file=sys.stderr)
+    return meta
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+
+class SearchIndex:
+    """Read-only view of an index directory built by build_index."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        if not (self.path / "meta.json").exists():
+            raise FileNotFoundError(
+                f"No search index at {self.path}; build one with "
+                f"`python -m src.cli build-index <dump> {self.path}`"
+            )
+        meta = json.loads((self.path / "meta.json").read_text())
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {meta.get('version')} in {self.path}")
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"Index {self.path} was built on a {meta['byteorder']}-endian machine")
+        self.num_docs = meta["num_docs"]
+        self.avg_doc_len = meta["avg_doc_len"] or 1.0
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+
+        self._maps = {}
+        self._docs = self._map("docs.bin")
+        self._doc_offsets = self._map("docs.idx").cast("Q")
+        self._doc_lens = np.frombuffer(self._map("doclens.bin"), dtype=np.uint32)
+        self._terms = self._map("terms.bin")
+        self._term_index = self._map("terms.idx").cast("Q")
+        self._postings = np.frombuffer(self._map("postings.bin"), dtype=np.uint32)
+        self.num_terms = len(self._term_index) // 2 - 1
+        self._local = threading.local()
+
+    def _map(self, name: str) -> memoryview:
+        with open(self.path / name, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return memoryview(b"")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[name] = mm
+        return memoryview(mm)
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._terms[self._term_index[2 * i] : self._term_index[2 * i + 2]])
+
+    def _postings_range(self, term: str) -> tuple[int, int]:
+        """Binary search the sorted term table. Returns (start, end) posting indices."""
+        target = term.encode("utf-8")
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.num_terms and self._term(lo) == target:
+            return self._term_index[2 * lo + 1], self._term_index[2 * lo + 3]
+        return 0, 0
+
+    def document(self, doc_id: int) -> tuple[str, str]:
+        """Return (title, intro) for a document id."""
+        raw = bytes(self._docs[self._doc_offsets[doc_id] : self._doc_offsets[doc_id + 1]])
+        title, _, intro = raw.decode("utf-8").partition("\0")
+        return title, intro
+
+    def _score_buffer(self) -> np.ndarray:
+        """Per-thread dense score array, all zeros between searches."""
+        scores = getattr(self._local, "scores", None)
+        if scores is None:
+            scores = self._local.scores = np.zeros(self.num_docs, dtype=np.float32)
+        return scores
+
+    def search(self, query: str, k: int = 3) -> list[tuple[str, str, float]]:
+        """Rank documents against query with BM25. Returns [(title, intro, score)].
+
+        Each term's postings are scored as one vectorized pass over the
+        memory-mapped arrays, and the top k are selected with argpartition
+        rather than sorting every matching document.
+        """
+        scores = self._score_buffer()
+        k1, b, avg_len = self.k1, self.b, self.avg_doc_len
+        matched = []
+        try:
+            for term in set(tokenize(query)):
+                start, end = self._postings_range(term)
+                df = end - start
+                if df == 0:
+                    continue
+                idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+                doc_ids = self._postings[2 * start : 2 * end : 2]
+                tf = self._postings[2 * start + 1 : 2 * end : 2].astype(np.float32)
+                norm = k1 * (1 - b + b * self._doc_lens[doc_ids] / np.float32(avg_len))
+                # A term's postings hold each document once, so this scatter-add has no collisions
+                scores[doc_ids] += np.float32(idf) * tf * (k1 + 1) / (tf + norm)
+                matched.append(doc_ids)
+            if not matched:
+                return []
+            candidates = np.concatenate(matched) if len(matched) > 1 else matched[0]
+            candidate_scores = scores[candidates]
+            # A document appears once per matched term, so this many slots always hold k distinct ones
+            m = min(len(candidates), k * len(matched))
+            top = np.argpartition(-candidate_scores, m - 1)[:m] if m < len(candidates) else np.arange(m)
+            best = {}
+            for i in top:
+                best[int(candidates[i])] = float(candidate_scores[i])
+            ranked = sorted(best.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+        finally:
+            for doc_ids in matched:
+                scores[doc_ids] = 0
+        return [(*self.document(doc_id), score) for doc_id, score in ranked]
+
+
+_open_indexes: dict[Path, SearchIndex] = {}
+
+
+def open_search_index(path: Union[str, Path]) -> SearchIndex:
+    """Open an index once per process and reuse it for every lookup."""
+    resolved = Path(path).resolve()
+    index = _open_indexes.get(resolved)
+    if index is None:
+        index = _open_indexes[resolved] = SearchIndex(resolved)
+    return index
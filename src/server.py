@@ -0,0 +1,314 @@
+"""Long-running HTTP API over the agent.
+
+One process keeps the SDK imported, the config registry parsed, and its
+HTTP connections warm: a background event loop runs every query, with one
+AsyncAnthropic client per agent config and the loop's shared MediaWiki
+client. Identical questions in flight at the same time (same config, same
+query after whitespace normalization) share one agent run.
+
+Endpoints:
+    POST /ask       {"query": "...", "config": "agent_v3"} -> answer and run stats
+    GET  /healthz   200 while Anthropic and MediaWiki circuits are closed, else 503
+    GET  /metrics   request counters, latency percentiles, cache and scheduler stats
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import anthropic
+
+from src.agent import AgentResult, arun_agent
+from src.cache import get_tool_cache
+from src.mediawiki import aclose_async_mediawiki_client
+from src.registry import ConfigSnapshot, UnknownConfig, get_config_registry
+from src.retry import get_circuit_breaker
+from src.scheduler import RateLimitScheduler, get_scheduler, set_scheduler
+
+LATENCY_WINDOW = 1000
+MAX_BODY_BYTES = 64 * 1024
+
+
+@dataclass
+class ServerMetrics:
+    requests: int = 0
+    answered: int = 0
+    coalesced: int = 0
+    rejected: int = 0
+    errors: int = 0
+    agent_runs: int = 0
+
+
+def _percentile(values: list[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 3)
+
+
+class Overloaded(Exception):
+    """More questions are waiting than the server accepts."""
+
+
+class AgentService:
+    """Runs agent queries on a background event loop with bounded concurrency and coalescing.
+
+    Args:
+        max_concurrency: Agent runs executing at once.
+        max_pending: Distinct runs allowed to wait for a slot; beyond that, ask raises Overloaded.
+        timeout: Seconds a caller waits for an answer.
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_pending: int = 64, timeout: float = 300.0):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.metrics = ServerMetrics()
+        self.started_at = time.time()
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agent-loop", daemon=True)
+        self._thread.start()
+        # Only touched from the loop thread
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._clients: dict[str, anthropic.AsyncAnthropic] = {}
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+        # Callers waiting on each in-flight run; the last one to give up cancels it
+        self._waiters: dict[asyncio.Future, int] = {}
+        self._waiting = 0
+
+    def _count(self, **increments: int) -> None:
+        with self._lock:
+            for name, n in increments.items():
+                setattr(self.metrics, name, getattr(self.metrics, name) + n)
+
+    def _client(self, config_name: str) -> anthropic.AsyncAnthropic:
+        client = self._clients.get(config_name)
+        if client is None:
+            client = self._clients[config_name] = anthropic.AsyncAnthropic(max_retries=0)
+        return client
+
+    async def _run(self, snapshot: ConfigSnapshot, config_name: str, query: str) -> AgentResult:
+        agent_config = snapshot.agent(config_name)
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            self._count(agent_runs=1)
+            return await arun_agent(
+                query,
+                agent_config=agent_config,
+                system_prompt=snapshot.system_instruction(agent_config.system_instruction),
+                tool_descriptions=snapshot.tool_description(agent_config.tool_description),
+                client=self._client(config_name),
+            )
+        finally:
+            self._slots.release()
+
+    async def _ask(self, config_name: str, query: str) -> tuple[AgentResult, bool]:
+        key = (config_name, " ".join(query.split()))
+        future = self._in_flight.get(key)
+        coalesced = future is not None
+        if not coalesced:
+            if self._waiting >= self.max_pending:
+                raise Overloaded(f"{self._waiting} questions already waiting")
+            snapshot = get_config_registry().snapshot()
+            # Validate the config before registering, so a bad name fails only this caller
+            snapshot.agent(config_name)
+            future = self._in_flight[key] = asyncio.ensure_future(self._run(snapshot, config_name, query))
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future), coalesced
+        except asyncio.CancelledError:
+            if self._waiters[future] == 1:
+                future.cancel()
+            raise
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+
+    def ask(self, config_name: str, query: str) -> tuple[AgentResult, bool]:
+        """Answer query with an agent config from any thread. Returns (result, coalesced).
+
+        Raises:
+            UnknownConfig: Unknown config name.
+            TimeoutError: No answer within timeout seconds.
+            Overloaded: Too many questions waiting for a slot.
+        """
+        self._count(requests=1)
+        started = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(self._ask(config_name, query), self._loop)
+        try:
+            result, coalesced = future.result(self.timeout)
+        except (UnknownConfig, Overloaded):
+            self._count(rejected=1)
+            raise
+        except TimeoutError:
+            # Stop waiting on the run; it is cancelled unless other callers still want its answer
+            future.cancel()
+            self._count(errors=1)
+            raise
+        except Exception:
+            self._count(errors=1)
+            raise
+        with self._lock:
+            self.metrics.answered += 1
+            self.metrics.coalesced += coalesced
+            self._latencies.append(time.perf_counter() - started)
+        return result, coalesced
+
+    def health(self) -> dict:
+        breakers = {name: get_circuit_breaker(name) for name in ("anthropic", "mediawiki")}
+        return {
+            "status": "degraded" if any(b.is_open for b in breakers.values()) else "ok",
+            "circuits": {name: "open" if b.is_open else "closed" for name, b in breakers.items()},
+        }
+
+    def snapshot_metrics(self) -> dict:
+        with self._lock:
+            latencies = list(self._latencies)
+            counters = dict(vars(self.metrics))
+        cache = get_tool_cache()
+        scheduler = get_scheduler()
+        registry = get_config_registry()
+        return {
+            "uptime_s": round(time.time() - self.started_at, 1),
+            **counters,
+            "in_flight": len(self._in_flight),
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "latency_p50_s": _percentile(latencies, 50),
+            "latency_p95_s": _percentile(latencies, 95),
+            "latency_p99_s": _percentile(latencies, 99),
+            "tool_cache": vars(cache.stats) | {"hit_rate": round(cache.stats.hit_rate, 3)} if cache else None,
+            "scheduler": scheduler.stats() if scheduler else None,
+            "config_reloads": registry.reloads,
+        }
+
+    def close(self) -> None:
+        async def _close() -> None:
+            for client in self._clients.values():
+                await client.close()
+            await aclose_async_mediawiki_client()
+
+        asyncio.run_coroutine_threadsafe(_close(), self._loop).result(30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _result_payload(config_name: str, result: AgentResult, coalesced: bool) -> dict:
+    return {
+        "answer": result.final_text,
+        "config": config_name,
+        "turn_count": result.turn_count,
+        "tool_calls": [{"tool": c["tool"], "input": c["input"]} for c in result.tool_calls_made],
+        "usage": result.usage,
+        "wall_time_s": result.wall_time_s,
+        "coalesced": coalesced,
+    }
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts at gateway QPS would overflow the default listen backlog of 5
+    request_queue_size = 1024
+
+
+def make_handler(service: AgentService, default_config: str) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                health = service.health()
+                self._send(200 if health["status"] == "ok" else 503, health)
+            elif self.path == "/metrics":
+                self._send(200, service.snapshot_metrics())
+            else:
+                self._send(404, {"error": f"no such endpoint: {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/ask":
+                self._send(404, {"error": f"no such endpoint: {self.path}"})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._send(413, {"error": "request body too large"})
+                return
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+                query = body["query"]
+                config_name = body.get("config", default_config)
+                if not isinstance(query, str) or not query.strip():
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {"error": 'expected a JSON body like {"query": "...", "config": "agent_v3"}'})
+                return
+            try:
+                result, coalesced = service.ask(config_name, query)
+            except UnknownConfig as e:
+                self._send(400, {"error": str(e)})
+            except Overloaded as e:
+                self._send(503, {"error": str(e)}, {"Retry-After": "1"})
+            except TimeoutError:
+                self._send(504, {"error": f"no answer within {service.timeout:.0f}s"})
+            except Exception as e:
+                self._send(502, {"error": f"{type(e).__name__}: {e}"})
+            else:
+                self._send(200, _result_payload(config_name, result, coalesced))
+
+        def log_message(self, format, *args) -> None:
+            print(f"[serve] {self.address_string()} {format % args}", file=sys.stderr)
+
+    return Handler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    default_config: str = "agent_v3",
+    max_concurrency: int = 16,
+    max_pending: int = 64,
+    quiet: bool = False,
+) -> None:
+    """Serve the agent over HTTP until interrupted.
+
+    Anthropic calls go through a RateLimitScheduler built from
+    configs/rate_limits.yaml, capped at max_concurrency.
+    """
+    set_scheduler(RateLimitScheduler.from_config(max_concurrency=max_concurrency))
+    service = AgentService(max_concurrency=max_concurrency, max_pending=max_pending)
+    handler = make_handler(service, default_config)
+    if quiet:
+        handler.log_message = lambda *args: None
+    httpd = _HTTPServer((host, port), handler)
+    print(f"Serving on http://{host}:{httpd.server_port} (default config {default_config})", file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
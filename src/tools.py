@@ -1,6 +1,14 @@
-"""Wikipedia search tool for the agent."""
+"""Wikipedia tools for the agent: intro search and passage retrieval from full articles."""
 
-import requests
+from functools import partial
+from typing import Awaitable, Callable, Optional
+
+from src.cache import cache_key, get_tool_cache
+from src.cassette import get_active_cassette
+from src.config import PROJECT_ROOT
+from src.mediawiki import get_async_mediawiki_client
+from src.passages import rank_passages, split_passages
+from src.search_index import open_search_index
 
 WIKIPEDIA_TOOL_SCHEMA = {
     "name": "search_wikipedia",
@@ -16,67 +24,166 @@ WIKIPEDIA_TOOL_SCHEMA = {
     },
 }
 
+WIKIPEDIA_PASSAGES_TOOL_SCHEMA = {
+    "name": "get_wikipedia_passages",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "title": {
+                "type": "string",
+                "description": "Exact title of the Wikipedia article to read, e.g. from a search result.",
+            },
+            "query": {
+                "type": "string",
+                "description": "What to look for in the article; used to pick the most relevant passages.",
+            },
+        },
+        "required": ["title", "query"],
+    },
+}
+
+TOOL_SCHEMAS = [WIKIPEDIA_TOOL_SCHEMA, WIKIPEDIA_PASSAGES_TOOL_SCHEMA]
 
-def build_tool_definition(descriptions: dict[str, str]) -> dict:
-    """Build the Anthropic tool definition with the given description."""
-    return {**WIKIPEDIA_TOOL_SCHEMA, "description": descriptions["search_wikipedia"]}
 
+def build_tool_definitions(descriptions: dict[str, str]) -> list[dict]:
+    """Build definitions for every tool the descriptions cover, in TOOL_SCHEMAS order."""
+    return [
+        {**schema, "description": descriptions[schema["name"]]}
+        for schema in TOOL_SCHEMAS
+        if schema["name"] in descriptions
+    ]
 
-def search_wikipedia(query: str, num_results: int = 3) -> str:
+
+async def asearch_wikipedia(query: str, num_results: int = 3) -> str:
     """Search Wikipedia and return plain-text summaries of top results.
 
-    Uses the MediaWiki API action=query with list=search to find pages,
-    then fetches extracts for the top results.
+    Results are served from the active cassette or the shared tool cache
+    when possible, the latter keyed on the normalized query and num_results.
     """
-    api_url = "https://en.wikipedia.org/w/api.php"
-    headers = {"User-Agent": "WikipediaAgent/1.0"}
-
-    # Step 1: Search for page titles
-    search_params = {
-        "action": "query",
-        "list": "search",
-        "srsearch": query,
-        "srlimit": num_results,
-        "format": "json",
-    }
-    resp = requests.get(api_url, params=search_params, headers=headers, timeout=10)
-    resp.raise_for_status()
-    search_results = resp.json().get("query", {}).get("search", [])
-
-    if not search_results:
-        return f"No Wikipedia articles found for: {query}"
+    request = {"query": query, "num_results": num_results}
+    cassette = get_active_cassette()
+    if cassette is not None:
+        recorded = cassette.lookup("search_wikipedia", request)
+        if recorded is not None:
+            return recorded
+
+    cache = get_tool_cache()
+    if cache is None:
+        result = await _afetch_search_results(query, num_results)
+    else:
+        key = cache_key("search_wikipedia", query, num_results)
+        result = await cache.aget_or_fetch(key, lambda: _afetch_search_results(query, num_results))
+
+    if cassette is not None:
+        cassette.record("search_wikipedia", request, result)
+    return result
+
 
-    # Step 2: Fetch extracts for found pages
-    titles = [r["title"] for r in search_results]
-    extract_params = {
-        "action": "query",
-        "titles": "|".join(titles),
-        "prop": "extracts",
-        "exintro": True,
-        "explaintext": True,
-        "format": "json",
-    }
-    resp = requests.get(api_url, params=extract_params, headers=headers, timeout=10)
-    resp.raise_for_status()
-    pages = resp.json().get("query", {}).get("pages", {})
-
-    # Step 3: Format results
+async def _afetch_search_results(query: str, num_results: int) -> str:
+    """Query the MediaWiki API directly.
+
+    A single action=query request with generator=search returns the top
+    titles together with their intro extracts.
+    """
+    pages = await get_async_mediawiki_client().search(query, limit=num_results)
+    return _format_pages(query, pages)
+
+
+def _format_pages(query: str, pages: list[tuple[str, Optional[str]]]) -> str:
     results = []
-    for page_id, page in pages.items():
-        if page_id == "-1":
-            continue
-        title = page.get("title", "Unknown")
-        extract = page.get("extract", "No summary available.")
+    for title, extract in pages:
+        extract = extract or "No summary available."
         if len(extract) > 1000:
             extract = extract[:1000] + "..."
-        results.append(f"## {title}\n{extract}")
+        results.append((title, extract))
+
+    return _format_results(query, results)
 
+
+def _format_results(query: str, results: list[tuple[str, str]]) -> str:
+    """Render (title, extract) pairs as the markdown block the agent sees."""
     if not results:
         return f"No Wikipedia articles found for: {query}"
+    return "\n\n---\n\n".join(f"## {title}\n{extract}" for title, extract in results)
+
+
+async def aget_wikipedia_passages(title: str, query: str, num_passages: int = 3) -> str:
+    """Fetch a full article and return the passages most relevant to query.
+
+    The article text is cached (tool cache, keyed by title), so follow-up
+    lookups in the same article only re-rank locally.
+    """
+    request = {"title": title, "query": query, "num_passages": num_passages}
+    cassette = get_active_cassette()
+    if cassette is not None:
+        recorded = cassette.lookup("get_wikipedia_passages", request)
+        if recorded is not None:
+            return recorded
+
+    cache = get_tool_cache()
+    if cache is None:
+        article = await _afetch_article(title)
+    else:
+        article = await cache.aget_or_fetch(cache_key("wikipedia_article", title, lowercase=False), lambda: _afetch_article(title))
+    result = _format_passages(title, query, article, num_passages)
+
+    if cassette is not None:
+        cassette.record("get_wikipedia_passages", request, result)
+    return result
+
+
+async def _afetch_article(title: str) -> str:
+    """Article as its normalized title, a newline and the full text; '' if there is no such page."""
+    article = await get_async_mediawiki_client().article(title)
+    return "\n".join(article) if article else ""
+
 
-    return "\n\n---\n\n".join(results)
+def _format_passages(title: str, query: str, article: str, num_passages: int) -> str:
+    if not article:
+        return f"No Wikipedia article titled: {title}"
+    title, _, text = article.partition("\n")
+    ranked = rank_passages(query, split_passages(text), k=num_passages)
+    if not ranked:
+        return f"No passages in '{title}' match: {query}"
+    return "\n\n---\n\n".join(f"## {title} > {passage.section}\n{passage.text}" for passage, _ in ranked)
 
 
-TOOL_MAP = {
-    "search_wikipedia": search_wikipedia,
+def search_offline_index(query: str, num_results: int = 3, *, index_path: str) -> str:
+    """Search a local index built with `build-index` instead of the MediaWiki API.
+
+    Same output format as asearch_wikipedia. Extracts are truncated at build time.
+    """
+    index = open_search_index(PROJECT_ROOT / index_path)
+    hits = index.search(query, k=num_results)
+    return _format_results(query, [(title, intro) for title, intro, _ in hits])
+
+
+ASYNC_TOOL_MAP = {
+    "search_wikipedia": asearch_wikipedia,
+    "get_wikipedia_passages": aget_wikipedia_passages,
 }
+
+
+def build_async_tool_map(
+    search_backend: str = "mediawiki", search_index: Optional[str] = None
+) -> dict[str, Callable[..., Awaitable[str]]]:
+    """Resolve the tool functions for an agent config's search backend, used by arun_agent.
+
+    Args:
+        search_backend: 'mediawiki' for the live API or 'offline' for a local index.
+        search_index: Index directory relative to the project root. Required for 'offline'.
+    """
+    if search_backend == "mediawiki":
+        return ASYNC_TOOL_MAP
+    if search_backend != "offline":
+        raise ValueError(f"Unknown search backend: {search_backend}")
+    if not search_index:
+        raise ValueError("search_backend 'offline' requires search_index to be set")
+    offline_search = partial(search_offline_index, index_path=search_index)
+
+    # Offline lookups are sub-millisecond, so run them inline rather than in a thread.
+    # The local index only holds intros, so there are no full articles to read passages from.
+    async def search(**kwargs) -> str:
+        return offline_search(**kwargs)
+
+    return {"search_wikipedia": search}
@@ -1,25 +1,155 @@
 """Shared utilities."""
 
-import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Union
 
 import anthropic
 
+from src.cassette import get_active_cassette
+from src.retry import (
+    DEFAULT_RETRY_POLICY,
+    RetryPolicy,
+    acall_with_retries,
+    aiter_with_retries,
+    get_circuit_breaker,
+)
+from src.scheduler import Ticket, get_scheduler
 
-def create_with_retries(
-    client: anthropic.Anthropic,
+CASSETTE_KIND = "messages.create"
+
+
+@dataclass
+class CallStats:
+    """Filled in by the *_with_retries helpers for callers that want to instrument a call."""
+
+    retries: int = 0
+    replayed: bool = False
+
+
+def _replayed_message(kwargs: dict) -> Optional[anthropic.types.Message]:
+    """Serve a message from the active cassette, if it has one for these kwargs."""
+    cassette = get_active_cassette()
+    if cassette is None:
+        return None
+    recorded = cassette.lookup(CASSETTE_KIND, kwargs)
+    return anthropic.types.Message.model_validate(recorded) if recorded is not None else None
+
+
+def _record_message(kwargs: dict, response: anthropic.types.Message) -> None:
+    cassette = get_active_cassette()
+    if cassette is not None:
+        cassette.record(CASSETTE_KIND, kwargs, response.model_dump(mode="json"))
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """429 (rate limited) and 529 (overloaded) both mean: send less."""
+    return isinstance(error, anthropic.APIStatusError) and error.status_code in (429, 529)
+
+
+def _release(ticket: Optional[Ticket], response=None, error: Optional[BaseException] = None) -> None:
+    """Hand a scheduler ticket back, if the call was scheduled."""
+    if ticket is not None:
+        get_scheduler().release(
+            ticket,
+            usage=response.usage if response is not None else None,
+            rate_limited=error is not None and _is_rate_limited(error),
+        )
+
+
+class _AttemptCounter:
+    """Mirrors the number of attempts made so far into stats.retries."""
+
+    def __init__(self, stats: Optional[CallStats]):
+        self.stats = stats
+        self.count = 0
+
+    def __call__(self) -> None:
+        self.count += 1
+        if self.stats is not None:
+            self.stats.retries = self.count - 1
+
+
+async def acreate_with_retries(
+    client: anthropic.AsyncAnthropic,
     *,
-    max_retries: int = 3,
-    initial_delay: float = 3.0,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    lane: str = "agent",
+    stats: Optional[CallStats] = None,
     **kwargs,
 ) -> anthropic.types.Message:
-    """Call client.messages.create with exponential backoff retries."""
-    delay = initial_delay
-    for attempt in range(1, max_retries + 1):
+    """Call client.messages.create, retrying transient failures under policy.
+
+    Only retryable errors (429, 529, 5xx, timeouts, connection errors) are
+    retried, after the server's retry-after delay when given. Every attempt
+    first checks the shared 'anthropic' circuit breaker. When a scheduler is
+    installed, every attempt waits for admission under the given lane
+    ("agent" or "judge") and reports its outcome back. Pass stats to learn
+    how many retries the call took and whether it was replayed.
+    """
+    replayed = _replayed_message(kwargs)
+    if replayed is not None:
+        if stats is not None:
+            stats.replayed = True
+        return replayed
+    count_attempt = _AttemptCounter(stats)
+
+    async def attempt() -> anthropic.types.Message:
+        count_attempt()
+        scheduler = get_scheduler()
+        ticket = await scheduler.aacquire(kwargs, lane) if scheduler else None
+        try:
+            response = await client.messages.create(**kwargs)
+        except BaseException as e:
+            _release(ticket, error=e)
+            raise
+        _release(ticket, response=response)
+        return response
+
+    response = await acall_with_retries(attempt, "anthropic", policy, get_circuit_breaker("anthropic"))
+    _record_message(kwargs, response)
+    return response
+
+
+async def astream_with_retries(
+    client: anthropic.AsyncAnthropic,
+    *,
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    lane: str = "agent",
+    stats: Optional[CallStats] = None,
+    **kwargs,
+) -> AsyncIterator[Union[str, anthropic.types.Message]]:
+    """Stream a message, yielding text deltas as str and then the final Message.
+
+    Failures are retried like acreate_with_retries only until the first delta
+    has been yielded; after that a retry would duplicate output, so errors propagate.
+    Replayed cassette responses arrive as a single delta.
+    """
+    replayed = _replayed_message(kwargs)
+    if replayed is not None:
+        if stats is not None:
+            stats.replayed = True
+        text = "".join(block.text for block in replayed.content if block.type == "text")
+        if text:
+            yield text
+        yield replayed
+        return
+    count_attempt = _AttemptCounter(stats)
+
+    async def attempt() -> AsyncIterator[Union[str, anthropic.types.Message]]:
+        count_attempt()
+        scheduler = get_scheduler()
+        ticket = await scheduler.aacquire(kwargs, lane) if scheduler else None
         try:
-            return client.messages.create(**kwargs)
-        except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
-            if attempt == max_retries:
-                raise e
-            print(f"Attempt {attempt} failed with {e}, retrying in {delay}s...")
-            time.sleep(delay)
-            delay *= 2
+            async with client.messages.stream(**kwargs) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                response = await stream.get_final_message()
+        except BaseException as e:
+            _release(ticket, error=e)
+            raise
+        _release(ticket, response=response)
+        _record_message(kwargs, response)
+        yield response
+
+    async for chunk in aiter_with_retries(attempt, "anthropic", policy, get_circuit_breaker("anthropic")):
+        yield chunk
@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+from src import agent
+from src.config import AgentConfig
+
+
+class _FakeMessages:
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text="Paris.")],
+            stop_reason="end_turn",
+            usage=SimpleNamespace(input_tokens=10, output_tokens=2, cache_read_input_tokens=0),
+        )
+
+
+def test_prompt_caching_without_tools(monkeypatch):
+    monkeypatch.setattr(agent, "build_async_tool_map", lambda backend, index: {})
+    client = SimpleNamespace(messages=_FakeMessages())
+    result = asyncio.run(agent.arun_agent(
+        "What is the capital of France?",
+        agent_config=AgentConfig(prompt_caching=True),
+        system_prompt="Be brief.",
+        tool_descriptions={},
+        client=client,
+    ))
+    assert result.final_text == "Paris."
+    request = client.messages.requests[0]
+    assert request["tools"] == []
+    assert request["system"][0]["cache_control"] == agent.CACHE_CONTROL
@@ -0,0 +1,30 @@
+from click.testing import CliRunner
+
+from src import ask_batch
+from src.cli import cli
+
+
+def _fake_batch(seen):
+    async def fake(questions, write, **kwargs):
+        for question in questions:
+            seen.append(question.query)
+        return ask_batch.BatchSummary(answered=len(seen))
+
+    return fake
+
+
+def test_csv_keeps_line_breaks_inside_quoted_fields(tmp_path, monkeypatch):
+    seen = []
+    monkeypatch.setattr(ask_batch, "arun_ask_batch", _fake_batch(seen))
+    path = tmp_path / "questions.csv"
+    path.write_bytes(b'id,query\r\n1,"What is\r\nthe capital of France?"\r\n2,Who wrote Hamlet?\r\n')
+    outcome = CliRunner().invoke(cli, ["ask-batch", str(path), "-o", str(tmp_path / "answers.jsonl")])
+    assert outcome.exit_code == 0, outcome.output
+    assert seen == ["What is\r\nthe capital of France?", "Who wrote Hamlet?"]
+
+
+def test_malformed_input_is_a_clean_error(monkeypatch):
+    monkeypatch.setattr(ask_batch, "arun_ask_batch", _fake_batch([]))
+    outcome = CliRunner().invoke(cli, ["ask-batch"], input='{"query": "x"\n')
+    assert outcome.exit_code == 1
+    assert "<stdin>:1: invalid JSON" in outcome.output
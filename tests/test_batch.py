@@ -0,0 +1,131 @@
+import asyncio
+
+import anthropic
+import pytest
+
+from benchmarks.fake_servers import AnthropicScript, FakeAnthropic, Latency
+from src.agent import AgentResult
+from src.eval import batch, runner
+from src.eval.journal import RunJournal, Unit
+from src.eval.onesided import ajudge_batch
+
+DIMENSIONS = {"correctness": "Is it right?", "tone_and_style": "Is it polite?"}
+DATASET = [{"query": f"Question {i}?", "ground_truth": f"Answer {i}"} for i in range(3)]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.setattr(batch, "POLL_INITIAL_DELAY", 0.0)
+    servers = []
+
+    def start(**script):
+        server = FakeAnthropic(AnthropicScript(latency=Latency(0, 0), **script))
+        servers.append(server)
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _pending():
+    return {
+        f"item-{i}": (item, AgentResult(final_text=f"Answer {i}.", messages=[]))
+        for i, item in enumerate(DATASET)
+    }
+
+
+def _judge(batch_id=None, on_submitted=None):
+    async def main():
+        async with anthropic.AsyncAnthropic(max_retries=0) as client:
+            return await ajudge_batch(
+                _pending(),
+                DIMENSIONS,
+                runner._load_judge_prompts()["onesided"],
+                client,
+                judge_model="claude-haiku-4-5-20251001",
+                judge_max_tokens=256,
+                batch_id=batch_id,
+                on_submitted=on_submitted,
+            )
+
+    return asyncio.run(main())
+
+
+def test_mixed_batch_splits_successes_and_failures(fake):
+    server = fake(batch_polls=2, batch_failures={"item-1": "errored", "item-2": "expired"})
+    submitted = []
+    judged, failures = _judge(on_submitted=submitted.append)
+    assert list(server.batches) == submitted
+    assert set(judged) == {"item-0"}
+    assert judged["item-0"].scores == {"correctness": 3, "tone_and_style": 3}
+    assert failures == {"item-1": "errored: api_error", "item-2": "expired"}
+
+
+def test_resumed_batch_id_is_not_resubmitted(fake):
+    server = fake(batch_failures={"item-2": "canceled"})
+    submitted = []
+    _judge(on_submitted=submitted.append)
+
+    resubmitted = []
+    judged, failures = _judge(batch_id=submitted[0], on_submitted=resubmitted.append)
+    assert resubmitted == []
+    assert list(server.batches) == submitted
+    assert set(judged) == {"item-0", "item-1"}
+    assert failures == {"item-2": "canceled"}
+
+
+def test_unknown_batch_id_is_resubmitted(fake):
+    server = fake()
+    submitted = []
+    judged, failures = _judge(batch_id="msgbatch_gone", on_submitted=submitted.append)
+    assert len(submitted) == 1 and submitted[0] in server.batches
+    assert set(judged) == set(_pending())
+    assert failures == {}
+
+
+def _run_pipeline(run_dir, journal, monkeypatch):
+    async def fake_agent(query, **kwargs):
+        return AgentResult(final_text=f"Answer to {query}", messages=[])
+
+    monkeypatch.setattr(runner, "arun_agent", fake_agent)
+    config = {"direct": {"rater": "onesided", "judge_mode": "batch", "dimensions": DIMENSIONS}}
+    asyncio.run(runner._arun_pipeline(
+        config, {"direct": DATASET}, {"base": "agent_v2"}, runner._load_judge_prompts(),
+        run_dir, journal, verbose=False, max_concurrency=4,
+    ))
+
+
+def _unit(i):
+    return Unit(dataset="direct", side="base", agent="agent_v2", index=i, query=DATASET[i]["query"])
+
+
+def test_pipeline_rejudges_failed_batch_items_individually(fake, tmp_path, monkeypatch):
+    server = fake(batch_failures={"item-1": "errored"})
+    journal = RunJournal(tmp_path)
+    _run_pipeline(tmp_path, journal, monkeypatch)
+    journal.close()
+
+    assert len(server.batches) == 1
+    # Only the errored item is judged with an individual call
+    assert server.requests == 1
+    for i in range(len(DATASET)):
+        assert journal.get(_unit(i), "judge")["scores"] == {"correctness": 3, "tone_and_style": 3}
+
+
+def test_pipeline_resumes_journaled_batch(fake, tmp_path, monkeypatch):
+    server = fake()
+    submitted = []
+    _judge(on_submitted=submitted.append)
+    # As if the run was interrupted right after submitting its batch
+    journal = RunJournal(tmp_path)
+    for i in range(len(DATASET)):
+        journal.record(_unit(i), "batch", {"batch_id": submitted[0]})
+    _run_pipeline(tmp_path, journal, monkeypatch)
+    journal.close()
+
+    assert list(server.batches) == submitted
+    assert server.requests == 0
+    assert all(journal.get(_unit(i), "judge") is not None for i in range(len(DATASET)))
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src import cache as cache_module
+from src.cache import ToolCache, cache_key
+
+
+def test_search_keys_ignore_case_and_whitespace():
+    assert cache_key("search_wikipedia", "  Mona   Lisa ", 5) == cache_key("search_wikipedia", "mona lisa", 5)
+    assert cache_key("search_wikipedia", "mona lisa", 5) != cache_key("search_wikipedia", "mona lisa", 3)
+
+
+def test_article_keys_keep_title_case():
+    assert cache_key("wikipedia_article", "Mercury", lowercase=False) != cache_key(
+        "wikipedia_article", "MERCURY", lowercase=False
+    )
+    assert cache_key("wikipedia_article", "New  York", lowercase=False) == cache_key(
+        "wikipedia_article", "New York", lowercase=False
+    )
+
+
+def test_concurrent_threads_share_one_fetch():
+    cache = ToolCache(path=None)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=1)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_fetch, "key", fetch) for _ in range(8)]
+        deadline = time.monotonic() + 1
+        while cache.stats.misses + cache.stats.coalesced < 8 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        assert [f.result() for f in futures] == ["result"] * 8
+    assert len(calls) == 1
+    assert cache.stats.coalesced == 7
+
+
+def test_concurrent_coroutines_share_one_fetch_and_errors_are_not_cached():
+    cache = ToolCache(path=None)
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    async def main():
+        fetches = [cache.aget_or_fetch("key", failing) for _ in range(5)]
+        outcomes = await asyncio.gather(*fetches, return_exceptions=True)
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+        assert len(calls) == 1
+
+        async def working():
+            return "result"
+
+        return await cache.aget_or_fetch("key", working)
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    cache = ToolCache(path=None)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return f"result {len(calls)}"
+
+    async def main():
+        leader = asyncio.create_task(cache.aget_or_fetch("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.aget_or_fetch("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await waiter == "result 2"
+        assert leader.cancelled()
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_async_calls_share_the_disk_tier(tmp_path):
+    async def fetch():
+        return "value"
+
+    cache = ToolCache(path=tmp_path / "cache.sqlite")
+    assert asyncio.run(cache.aget_or_fetch("key", fetch)) == "value"
+    other = ToolCache(path=tmp_path / "cache.sqlite")
+    assert asyncio.run(other.aget("key")) == "value"
+    assert other.stats.disk_hits == 1
+
+
+def test_disk_tier_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "DISK_SIZE_CHECK_EVERY", 2)
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ToolCache(path=tmp_path / "cache.sqlite", max_memory_entries=1, max_disk_entries=3)
+    for i in range(6):
+        now[0] += 1
+        cache.put(f"key {i}", str(i))
+    assert cache.get("key 0") is None
+    assert cache.get("key 5") == "5"
+    assert cache.stats.evictions >= 3
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ToolCache(path=tmp_path / "cache.sqlite", ttl_seconds=60)
+    cache.put("key", "value")
+    now[0] += 30
+    assert cache.get("key") == "value"
+
+    # A second process sees the disk copy until it expires too
+    other = ToolCache(path=tmp_path / "cache.sqlite", ttl_seconds=60)
+    assert other.get("key") == "value"
+    now[0] += 31
+    assert cache.get("key") is None
+    assert other.get("key") is None
+    assert cache.get_or_fetch("key", lambda: "fresh") == "fresh"
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ToolCache(path=None, max_memory_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats.evictions == 1
@@ -0,0 +1,90 @@
+import asyncio
+import json
+
+from src.agent import AgentResult
+from src.eval import runner
+from src.eval.journal import RunJournal, Unit, agent_result_to_dict
+
+DATASET = [
+    {"query": "Who wrote Hamlet?", "wiki_tool_call_expected": True},
+    {"query": "Hi there", "wiki_tool_call_expected": False},
+]
+
+
+def _unit(index=0, query="q"):
+    return Unit(dataset="ds", side="base", agent="agent_v2", index=index, query=query)
+
+
+def _result(query):
+    return AgentResult(final_text=f"answer to {query}", messages=[{"role": "user", "content": query}], turn_count=1)
+
+
+def test_record_survives_reload_and_torn_line(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.record(_unit(0), "judge", {"score": 3})
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"unit": {"dataset"')
+
+    reloaded = RunJournal(tmp_path)
+    assert reloaded.get(_unit(0), "judge") == {"score": 3}
+    reloaded.record(_unit(1), "judge", {"score": 1})
+    reloaded.close()
+    assert RunJournal(tmp_path).get(_unit(1), "judge") == {"score": 1}
+
+
+def test_compact_drops_superseded_payloads(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.record(_unit(0), "agent", agent_result_to_dict(_result("q")))
+    journal.record(_unit(0), "judge", {"score": 3})
+    journal.compact("agent", {_unit(0): {"transcript_line": 0}})
+    journal.record(_unit(1), "judge", {"score": 2})
+    journal.close()
+
+    lines = [json.loads(line) for line in journal.path.read_text().splitlines()]
+    assert [line["payload"] for line in lines] == [{"transcript_line": 0}, {"score": 3}, {"score": 2}]
+    assert RunJournal(tmp_path).get(_unit(0), "agent") == {"transcript_line": 0}
+
+
+def _run(run_dir, journal, monkeypatch, calls):
+    async def fake_agent(query, **kwargs):
+        calls.append(query)
+        return _result(query)
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setattr(runner, "arun_agent", fake_agent)
+    asyncio.run(runner._arun_pipeline(
+        {"ds": {"rater": "trajectory"}}, {"ds": DATASET}, {"base": "agent_v2"}, {},
+        run_dir, journal, verbose=False, max_concurrency=2,
+    ))
+
+
+def test_resume_reads_compacted_results_from_transcripts(tmp_path, monkeypatch):
+    calls = []
+    journal = RunJournal(tmp_path)
+    _run(tmp_path, journal, monkeypatch, calls)
+    journal.close()
+    assert sorted(calls) == sorted(item["query"] for item in DATASET)
+    assert "answer to" not in journal.path.read_text()
+
+    calls.clear()
+    resumed = RunJournal(tmp_path)
+    _run(tmp_path, resumed, monkeypatch, calls)
+    resumed.close()
+    assert calls == []
+    judge = json.loads((tmp_path / "judge_outputs" / "ds_base.json").read_text())
+    assert judge["metrics"]["accuracy"] == 0.5
+
+
+def test_resume_reruns_items_missing_from_transcripts(tmp_path, monkeypatch):
+    calls = []
+    journal = RunJournal(tmp_path)
+    _run(tmp_path, journal, monkeypatch, calls)
+    journal.close()
+    (tmp_path / "transcripts_base" / "ds.jsonl.gz").unlink()
+
+    calls.clear()
+    resumed = RunJournal(tmp_path)
+    _run(tmp_path, resumed, monkeypatch, calls)
+    resumed.close()
+    assert sorted(calls) == sorted(item["query"] for item in DATASET)
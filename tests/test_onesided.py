@@ -0,0 +1,57 @@
+import json
+
+from src.eval.onesided import _parse_packed_scores
+
+DIMENSIONS = {"accuracy": "Is it right?", "tone": "Is it polite?"}
+
+
+def _entry(index, accuracy=2, tone=3):
+    return {"index": index, "scores": {"accuracy": accuracy, "tone": tone}, "reasoning": f"item {index}"}
+
+
+def test_parses_every_entry():
+    response = "Scores:\n" + json.dumps([_entry(0), _entry(1, accuracy=1)])
+    parsed, errors = _parse_packed_scores(response, DIMENSIONS, 2)
+    assert errors == {}
+    assert parsed[0] == ({"accuracy": 2, "tone": 3}, "item 0")
+    assert parsed[1][0]["accuracy"] == 1
+
+
+def test_bad_entry_only_fails_its_item():
+    response = json.dumps([_entry(0), _entry(1, accuracy=7)])
+    parsed, errors = _parse_packed_scores(response, DIMENSIONS, 3)
+    assert set(parsed) == {0}
+    assert set(errors) == {1, 2}
+    assert "out of range" in errors[1]
+    assert "No entry for item 2" in errors[2]
+
+
+def test_valid_entry_after_invalid_one_wins():
+    response = json.dumps([_entry(0, accuracy="bad"), _entry(0)])
+    parsed, errors = _parse_packed_scores(response, DIMENSIONS, 1)
+    assert set(parsed) == {0}
+    assert errors == {}
+
+
+def test_first_valid_entry_wins_over_later_ones():
+    response = json.dumps([_entry(0, accuracy=1), _entry(0, accuracy="bad")])
+    parsed, errors = _parse_packed_scores(response, DIMENSIONS, 1)
+    assert parsed[0][0]["accuracy"] == 1
+    assert errors == {}
+
+
+def test_ignores_brackets_around_the_array():
+    response = (
+        "Per the rubric [see above], here are the scores:\n"
+        + json.dumps([_entry(0)])
+        + "\nNotes: [none]"
+    )
+    parsed, errors = _parse_packed_scores(response, DIMENSIONS, 1)
+    assert set(parsed) == {0}
+    assert errors == {}
+
+
+def test_every_item_fails_without_an_array():
+    parsed, errors = _parse_packed_scores("I cannot score these.", DIMENSIONS, 2)
+    assert parsed == {}
+    assert set(errors) == {0, 1}
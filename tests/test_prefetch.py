@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.prefetch import Prefetch
+
+
+def _search_block(query, block_id="tool_1"):
+    return SimpleNamespace(name="search_wikipedia", input={"query": query}, id=block_id)
+
+
+def test_detach_does_not_wait_for_a_missed_prefetch():
+    async def main():
+        release = asyncio.Event()
+
+        async def slow_search(query):
+            await release.wait()
+            raise RuntimeError("search failed")
+
+        prefetch = Prefetch({"search_wikipedia": slow_search}, "Who painted the Mona Lisa?")
+        assert prefetch.match([_search_block("quantum chromodynamics")]) is None
+        prefetch.detach()
+        assert prefetch.outcome == "miss"
+        # The agent has returned; the search goes on and its error is discarded
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return prefetch
+
+    prefetch = asyncio.run(asyncio.wait_for(main(), timeout=1))
+    assert prefetch._task.done()
+
+
+def test_hit_is_served_from_the_prefetch():
+    async def main():
+        async def search(query):
+            return f"results for {query}"
+
+        prefetch = Prefetch({"search_wikipedia": search}, "Who painted the Mona Lisa?")
+        block_id = prefetch.match([_search_block("Mona Lisa painter")])
+        return prefetch, block_id, await prefetch.result()
+
+    prefetch, block_id, result = asyncio.run(main())
+    assert prefetch.outcome == "hit"
+    assert block_id == "tool_1"
+    assert result == "results for painted Mona Lisa"
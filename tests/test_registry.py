@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from src.registry import ConfigRegistry, UnknownConfig
+
+AGENTS = """
+agent_a:
+  model: {model}
+  system_instruction: concise
+  tool_description: default
+"""
+
+
+def _write_configs(root, model="claude-haiku-4-5-20251001"):
+    (root / "configs").mkdir(exist_ok=True)
+    (root / "prompts").mkdir(exist_ok=True)
+    (root / "configs" / "agents.yaml").write_text(AGENTS.format(model=model))
+    (root / "prompts" / "system_instructions.yaml").write_text("concise: Answer briefly.\n")
+    (root / "prompts" / "tool_descriptions.yaml").write_text("default:\n  search_wikipedia: Search Wikipedia.\n")
+
+
+def _edit(path, text):
+    stat = path.stat()
+    path.write_text(text)
+    # Filesystems with coarse mtimes could otherwise miss an edit made in the same tick
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_edit_is_picked_up_without_restart(tmp_path):
+    _write_configs(tmp_path)
+    registry = ConfigRegistry(tmp_path, check_interval=0)
+    before = registry.snapshot()
+    assert before.agent("agent_a").model == "claude-haiku-4-5-20251001"
+
+    _edit(tmp_path / "configs" / "agents.yaml", AGENTS.format(model="claude-sonnet-4-5"))
+    after = registry.snapshot()
+    assert after.agent("agent_a").model == "claude-sonnet-4-5"
+    assert registry.reloads == 1
+    # Snapshots already handed out never change
+    assert before.agent("agent_a").model == "claude-haiku-4-5-20251001"
+
+
+def test_invalid_edit_keeps_previous_snapshot(tmp_path, capsys):
+    _write_configs(tmp_path)
+    registry = ConfigRegistry(tmp_path, check_interval=0)
+    _edit(tmp_path / "configs" / "agents.yaml", AGENTS.format(model="x").replace("concise", "missing"))
+
+    assert registry.snapshot().agent("agent_a").model == "claude-haiku-4-5-20251001"
+    assert registry.snapshot().agent("agent_a").model == "claude-haiku-4-5-20251001"
+    # Reported once, not on every lookup
+    assert capsys.readouterr().err.count("reload failed") == 1
+    assert registry.reloads == 0
+
+
+def test_checks_are_rate_limited(tmp_path):
+    _write_configs(tmp_path)
+    registry = ConfigRegistry(tmp_path, check_interval=3600)
+    _edit(tmp_path / "configs" / "agents.yaml", AGENTS.format(model="claude-sonnet-4-5"))
+    assert registry.snapshot().agent("agent_a").model == "claude-haiku-4-5-20251001"
+
+
+def test_unknown_names_raise_unknown_config(tmp_path):
+    _write_configs(tmp_path)
+    snapshot = ConfigRegistry(tmp_path).snapshot()
+    with pytest.raises(UnknownConfig, match="agent_b"):
+        snapshot.agent("agent_b")
+    with pytest.raises(UnknownConfig):
+        snapshot.system_instruction("verbose")
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from src.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    acall_with_retries,
+    aiter_with_retries,
+    call_with_retries,
+    retry_after,
+)
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=0.0)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(status_code)
+        self.status_code = status_code
+
+
+def _with_headers(**headers) -> StatusError:
+    error = StatusError(429)
+    error.response = SimpleNamespace(headers={k.replace("_", "-"): v for k, v in headers.items()})
+    return error
+
+
+def _opened_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure(StatusError(503))
+    assert breaker.is_open
+    time.sleep(0.02)
+    return breaker
+
+
+def test_retries_transient_errors_then_succeeds():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise StatusError(529)
+        return "ok"
+
+    assert call_with_retries(fn, "test", FAST) == "ok"
+    assert len(calls) == 3
+
+
+def test_does_not_retry_client_errors():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        call_with_retries(fn, "test", FAST)
+    assert len(calls) == 1
+
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure(StatusError(503))
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_rate_limits_do_not_open_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure(StatusError(429))
+    assert not breaker.is_open
+
+
+def test_half_open_trial_success_closes_breaker():
+    breaker = _opened_breaker()
+    assert call_with_retries(lambda: "ok", "test", FAST, breaker) == "ok"
+    assert not breaker.is_open
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = _opened_breaker()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_cancelled_trial_releases_breaker():
+    breaker = _opened_breaker()
+
+    async def scenario():
+        trial = asyncio.ensure_future(acall_with_retries(lambda: asyncio.sleep(10), "test", FAST, breaker))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        # The next call gets the trial slot instead of failing fast forever
+        return await acall_with_retries(lambda: asyncio.sleep(0, "ok"), "test", FAST, breaker)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert not breaker.is_open
+
+
+def test_interrupted_sync_trial_releases_breaker():
+    breaker = _opened_breaker()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        call_with_retries(interrupted, "test", FAST, breaker)
+    breaker.before_call()
+
+
+def test_iter_retries_only_before_first_item():
+    attempts = []
+
+    async def failing_before_output():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise StatusError(529)
+        yield "a"
+        yield "b"
+
+    async def failing_after_output():
+        attempts.append(1)
+        yield "a"
+        raise StatusError(529)
+
+    async def collect(fn):
+        return [item async for item in aiter_with_retries(fn, "test", FAST)]
+
+    assert asyncio.run(collect(failing_before_output)) == ["a", "b"]
+    assert len(attempts) == 2
+    attempts.clear()
+    with pytest.raises(StatusError):
+        asyncio.run(collect(failing_after_output))
+    assert len(attempts) == 1
+
+
+@pytest.mark.parametrize("value", ["soon", "Tue, 99 Foo 2026 25:00:00 GMT", "-"])
+def test_malformed_retry_after_is_ignored(value):
+    assert retry_after(_with_headers(retry_after=value)) is None
+
+
+def test_retry_after_accepts_seconds_milliseconds_and_dates():
+    assert retry_after(_with_headers(retry_after="2")) == 2.0
+    assert retry_after(_with_headers(retry_after_ms="1500", retry_after="9")) == 1.5
+    assert 8 < retry_after(_with_headers(retry_after=formatdate(time.time() + 10, usegmt=True))) <= 10
+
+
+def test_malformed_retry_after_keeps_the_original_error():
+    def fail():
+        raise _with_headers(retry_after="soon")
+
+    with pytest.raises(StatusError):
+        call_with_retries(fail, "test", FAST, CircuitBreaker("test"))
+
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from src.scheduler import ModelBudget, RateLimitScheduler
+
+MODEL = "claude-test"
+REQUEST = {"model": MODEL, "max_tokens": 1000, "messages": [{"role": "user", "content": "hi"}]}
+
+
+def _scheduler(**kwargs):
+    budget = ModelBudget(requests_per_minute=10_000, input_tokens_per_minute=1e9, output_tokens_per_minute=1e9)
+    return RateLimitScheduler(default_budget=budget, **kwargs)
+
+
+def _usage(output_tokens):
+    return SimpleNamespace(input_tokens=10, output_tokens=output_tokens)
+
+
+def _limit(scheduler):
+    return scheduler._state(MODEL).limit
+
+
+def test_limit_grows_on_success_and_halves_on_rate_limit():
+    scheduler = _scheduler(initial_concurrency=8, max_concurrency=16)
+    scheduler.release(scheduler.acquire(REQUEST), usage=_usage(5))
+    assert _limit(scheduler) == 8 + 1 / 8
+    scheduler.release(scheduler.acquire(REQUEST), rate_limited=True)
+    assert _limit(scheduler) == (8 + 1 / 8) / 2
+
+
+def test_one_decrease_per_congestion_window():
+    scheduler = _scheduler(initial_concurrency=8)
+    in_flight = [scheduler.acquire(REQUEST) for _ in range(4)]
+    for ticket in in_flight:
+        scheduler.release(ticket, rate_limited=True)
+    # All four were sent before the first 429 came back
+    assert _limit(scheduler) == 4
+    assert scheduler.stats()[MODEL]["rate_limited"] == 4
+
+    time.sleep(0.001)
+    scheduler.release(scheduler.acquire(REQUEST), rate_limited=True)
+    assert _limit(scheduler) == 2
+
+
+def test_output_reservation_follows_actual_output():
+    scheduler = _scheduler()
+    first = scheduler.acquire(REQUEST)
+    assert first.output_tokens == 1000
+    scheduler.release(first, usage=_usage(100))
+
+    second = scheduler.acquire(REQUEST)
+    assert second.output_tokens == 100
+    bucket = scheduler._state(MODEL).output_tokens
+    level = bucket.level
+    scheduler.release(second, usage=_usage(300))
+    # The 200 tokens generated beyond the reservation are charged on release
+    assert bucket.level < level - 190
+    assert scheduler.acquire(REQUEST, lane="judge").output_tokens == 1000
+
+
+def test_async_waiter_wakes_on_release_from_another_thread():
+    scheduler = _scheduler(initial_concurrency=1, min_concurrency=1)
+    held = scheduler.acquire(REQUEST)
+
+    async def main():
+        waiter = asyncio.create_task(scheduler.aacquire(REQUEST))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        threading.Timer(0.01, scheduler.release, args=(held,), kwargs={"usage": _usage(5)}).start()
+        return await asyncio.wait_for(waiter, timeout=1)
+
+    ticket = asyncio.run(main())
+    assert scheduler.stats()[MODEL]["in_flight"] == {"agent": 1}
+    scheduler.release(ticket, usage=_usage(5))
+
+
+def test_cancelled_async_waiter_leaves_no_trace():
+    scheduler = _scheduler(initial_concurrency=1, min_concurrency=1)
+    held = scheduler.acquire(REQUEST)
+
+    async def main():
+        waiter = asyncio.create_task(scheduler.aacquire(REQUEST, lane="judge"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(main())
+    assert scheduler.stats()[MODEL]["waiting"]["judge"] == 0
+    assert scheduler._async_waiters == {}
+    scheduler.release(held, usage=_usage(5))
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from src.search_index import SearchIndex, build_index, tokenize
+from src.tools import build_async_tool_map
+
+DOCS = [
+    ("Python (programming language)", "Python is a high-level programming language."),
+    ("Monty Python", "Monty Python were a British comedy troupe."),
+    ("Java (programming language)", "Java is a class-based programming language."),
+    ("Ball python", "The ball python is a python species native to Africa."),
+]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    root = tmp_path_factory.mktemp("index")
+    source = root / "docs.jsonl"
+    source.write_text("".join(json.dumps({"title": t, "extract": e}) + "\n" for t, e in DOCS))
+    build_index(source, root / "idx")
+    return SearchIndex(root / "idx")
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("What is the Python programming-language?") == ["python", "programming", "language"]
+
+
+def test_ranks_title_and_body_matches(index):
+    titles = [title for title, _, _ in index.search("python programming language", k=3)]
+    assert titles[0] == "Python (programming language)"
+    assert set(titles[1:]) <= {"Java (programming language)", "Monty Python", "Ball python"}
+
+
+def test_scores_are_descending_and_k_limited(index):
+    hits = index.search("python", k=2)
+    assert len(hits) == 2
+    assert hits[0][2] >= hits[1][2]
+
+
+def test_repeated_searches_do_not_leak_scores(index):
+    first = index.search("comedy troupe", k=4)
+    index.search("python programming", k=4)
+    assert index.search("comedy troupe", k=4) == first
+    assert [title for title, _, _ in first] == ["Monty Python"]
+
+
+def test_unknown_terms_return_nothing(index):
+    assert index.search("zyzzyva") == []
+    assert index.search("the of and") == []
+
+
+def test_missing_index_names_the_build_command(tmp_path):
+    with pytest.raises(FileNotFoundError, match="build-index"):
+        SearchIndex(tmp_path / "missing")
+
+
+def test_offline_backend_serves_search_from_the_index(index):
+    tool_map = build_async_tool_map("offline", str(index.path))
+    assert set(tool_map) == {"search_wikipedia"}
+    result = asyncio.run(tool_map["search_wikipedia"](query="comedy troupe", num_results=1))
+    assert result.startswith("## Monty Python\n")
+
+
+def test_offline_backend_requires_an_index():
+    with pytest.raises(ValueError, match="search_index"):
+        build_async_tool_map("offline")
+
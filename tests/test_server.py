@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import src.server
+from src.registry import UnknownConfig
+from src.server import AgentService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    service = AgentService(max_concurrency=2, max_pending=4, timeout=0.2)
+    yield service
+    service.close()
+
+
+def _fake_agent(monkeypatch, delay: float, events: list, error: Exception = None):
+    async def arun_agent(query, **kwargs):
+        events.append("started")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        if error is not None:
+            raise error
+        return f"answer to {query}"
+
+    monkeypatch.setattr(src.server, "arun_agent", arun_agent)
+
+
+def test_timeout_cancels_the_agent_run(service, monkeypatch):
+    events = []
+    _fake_agent(monkeypatch, 10, events)
+    with pytest.raises(TimeoutError):
+        service.ask("agent_v3", "slow question")
+    time.sleep(0.1)
+    assert events == ["started", "cancelled"]
+    assert service.snapshot_metrics()["in_flight"] == 0
+    assert service.metrics.errors == 1
+
+
+def test_coalesced_run_survives_one_caller_leaving(service, monkeypatch):
+    events = []
+    _fake_agent(monkeypatch, 0.3, events)
+    service.timeout = 1.0
+    results = []
+    follower = threading.Thread(target=lambda: results.append(service.ask("agent_v3", "same  question")))
+    leader = asyncio.run_coroutine_threadsafe(service._ask("agent_v3", "same question"), service._loop)
+    time.sleep(0.05)
+    follower.start()
+    time.sleep(0.05)
+    leader.cancel()
+    follower.join()
+    assert results == [("answer to same question", True)]
+    assert events == ["started"]
+
+
+def test_unknown_config_is_rejected(service):
+    with pytest.raises(UnknownConfig):
+        service.ask("no_such_agent", "question")
+    assert service.metrics.rejected == 1
+
+
+def test_key_error_inside_a_run_is_an_error_not_a_rejection(service, monkeypatch):
+    _fake_agent(monkeypatch, 0, [], error=KeyError("tool_use_id"))
+    with pytest.raises(KeyError) as excinfo:
+        service.ask("agent_v3", "question")
+    assert not isinstance(excinfo.value, UnknownConfig)
+    assert service.metrics.errors == 1
+    assert service.metrics.rejected == 0